@@ -0,0 +1,201 @@
+import json
+import os
+import threading
+
+import pandas as pd
+
+from figure_cache import row_fingerprint
+from scoring import (person_totals, score_weeks, summarize_totals,
+                     weekly_counts, weekly_drinks)
+
+
+BASE_COLUMNS = ["week", "person", "wednesday_count", "not_wednesday_count",
+                "drinks_done"]
+# Weeks kept in the small table of recent weeks, older ones are moved to
+# the history once twice as many weeks piled up
+RECENT_WEEKS = 8
+
+
+def _empty_weekly():
+    return score_weeks(pd.DataFrame({
+        "week": pd.Series(dtype="int64"),
+        "person": pd.Series(dtype=object),
+        "wednesday_count": pd.Series(dtype="int64"),
+        "not_wednesday_count": pd.Series(dtype="int64"),
+        "drinks_done": pd.Series(dtype="float64"),
+    }))
+
+
+class WeeklyAggregate:
+    """Scored totals per (ISO week, person), kept next to the sheets.
+
+    Both worksheets are append-only, so ``sync`` only folds in the rows added
+    since the last call and re-scores the weeks they fall in. The table is
+    split in the history and a small table of the recent weeks, new rows
+    nearly always fall in the recent weeks so only that one is rewritten.
+    The per-person totals are updated with the difference, so a sync costs
+    the same however long the history is. When a sheet shrank or its last
+    processed row changed, everything is rebuilt. Only that row is checked
+    to keep the cost flat, an edit further up is picked up after ``reset``
+    (Refresh).
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._reset()
+        if path is not None:
+            self._load()
+
+    def _reset(self):
+        self._history = _empty_weekly()
+        self._recent = _empty_weekly()
+        self._history_changed = True
+        self.totals = person_totals(self._recent)
+        self._synced = {"events": [0, None], "drinks": [0, None]}
+
+    @property
+    def weekly(self):
+        """The whole table, history and recent weeks."""
+        with self._lock:
+            return pd.concat([self._history, self._recent], ignore_index=True)
+
+    def _recent_path(self):
+        base, ext = os.path.splitext(self.path)
+        return f"{base}_recent{ext}"
+
+    def _load(self):
+        meta_path = self.path + ".json"
+        paths = [self.path, self._recent_path(), meta_path]
+        if not all(os.path.exists(path) for path in paths):
+            return
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                synced = json.load(f)
+            history = pd.read_parquet(self.path)
+            recent = pd.read_parquet(self._recent_path())
+        except (OSError, ValueError):
+            # Start over, the next sync rebuilds the table
+            return
+        self._history, self._recent, self._synced = history, recent, synced
+        self._history_changed = False
+        self.totals = person_totals(pd.concat([history, recent]))
+
+    def _save(self):
+        if self.path is None:
+            return
+        # The history only changes when weeks are moved into it
+        tables = [(self._recent_path(), self._recent)]
+        if self._history_changed:
+            tables.append((self.path, self._history))
+        for path, table in tables:
+            table.to_parquet(path + ".tmp", index=False)
+            os.replace(path + ".tmp", path)
+        self._history_changed = False
+        with open(self.path + ".json.tmp", "w", encoding="utf-8") as f:
+            json.dump(self._synced, f)
+        os.replace(self.path + ".json.tmp", self.path + ".json")
+
+    def _is_prefix(self, name, df):
+        # The last processed row has to be unchanged at the same position
+        n_rows, digest = self._synced[name]
+        if n_rows > len(df):
+            return False
+        return n_rows == 0 or row_fingerprint(df, n_rows - 1) == digest
+
+    def _mark_synced(self, name, df):
+        self._synced[name] = [len(df),
+                              row_fingerprint(df, len(df) - 1) if len(df)
+                              else None]
+
+    def reset(self):
+        """Forget everything, the next sync rebuilds from the sheets."""
+        with self._lock:
+            self._reset()
+            self._save()
+
+    def _move_to_recent(self, weeks):
+        # Rows for weeks that are already in the history, e.g. an adje
+        # entered for an old date. Rare, and the only step that copies it.
+        if self._history.empty or weeks.min() > self._history["week"].max():
+            return
+        moved = self._history["week"].isin(weeks)
+        if moved.any():
+            self._recent = pd.concat([self._recent, self._history[moved]],
+                                     ignore_index=True)
+            self._history = self._history[~moved]
+            self._history_changed = True
+
+    def _roll(self):
+        # Keep RECENT_WEEKS weeks when twice as many piled up
+        weeks = self._recent["week"].unique()
+        if len(weeks) <= 2 * RECENT_WEEKS:
+            return
+        old = self._recent["week"] < sorted(weeks)[-RECENT_WEEKS]
+        self._history = pd.concat([self._history, self._recent[old]],
+                                  ignore_index=True)
+        self._recent = self._recent[~old].reset_index(drop=True)
+        self._history_changed = True
+
+    def apply(self, new_weekly):
+        """Add weekly counts, only the weeks in ``new_weekly`` are re-scored."""
+        if new_weekly.empty:
+            return
+        new_weekly = new_weekly.reindex(columns=BASE_COLUMNS, fill_value=0)
+        weeks = new_weekly["week"].unique()
+        self._move_to_recent(weeks)
+
+        touched = self._recent["week"].isin(weeks)
+        old_scored = self._recent[touched]
+        merged = pd.concat([old_scored[BASE_COLUMNS], new_weekly])
+        merged = merged.groupby(["week", "person"]).sum().reset_index()
+        new_scored = score_weeks(merged)
+
+        self._recent = pd.concat([self._recent[~touched], new_scored],
+                                 ignore_index=True)
+        self.totals = self.totals.add(person_totals(new_scored), fill_value=0) \
+            .sub(person_totals(old_scored), fill_value=0)
+        self._roll()
+
+    def _sync(self, events, drinks_done):
+        if not (self._is_prefix("events", events)
+                and self._is_prefix("drinks", drinks_done)):
+            self._reset()
+
+        new_events = events.iloc[self._synced["events"][0]:]
+        new_drinks = drinks_done.iloc[self._synced["drinks"][0]:]
+        if new_events.empty and new_drinks.empty:
+            return
+
+        if not new_events.empty:
+            self.apply(weekly_counts(new_events))
+        if not new_drinks.empty:
+            self.apply(weekly_drinks(new_drinks))
+
+        self._mark_synced("events", events)
+        self._mark_synced("drinks", drinks_done)
+        self._save()
+
+    def sync(self, events, drinks_done):
+        """Bring the table up to date with both sheets.
+
+        ``events`` needs a datetime ``timestamp``, ``drinks_done`` is the
+        adjes_gedaan ledger.
+        """
+        with self._lock:
+            self._sync(events, drinks_done)
+
+    def summary(self, wednesdays):
+        """Per-person summary like scoring.summarize_scores."""
+        with self._lock:
+            return summarize_totals(self.totals, wednesdays)
+
+    def summary_for(self, events, drinks_done, wednesdays):
+        """Sync with both sheets and summarize, as one step.
+
+        Unlike sync followed by summary, no other sync can come in between,
+        so the summary always belongs to these sheets.
+        """
+        with self._lock:
+            self._sync(events, drinks_done)
+            return summarize_totals(self.totals, wednesdays)
@@ -0,0 +1,89 @@
+import os
+import re
+import zipfile
+
+import pandas as pd
+
+
+# A message line of a chat export: timestamp, sender and text
+PATTERN = r"^(\d{2}-\d{2}-\d{4} \d{2}:\d{2}) - (.*?): (.*)$"
+# Media files in an export with media are named like VID-20250611-WA0003.mp4
+MEDIA_NAME = re.compile(r"^(?P<kind>[A-Z]+)-(?P<date>\d{8})-WA\d+")
+# Messages holding a video note: "<Video note omitted>" in an export without
+# media, the attached PTV file in an export with media. VID files are
+# ordinary videos and don't count.
+VIDEO_NOTE = r"<Video note omitted>|PTV-\d{8}-WA\d+\.\w+ \(file attached\)"
+
+
+def is_archive(file):
+    """True for a path or binary buffer holding a zip file."""
+    if not isinstance(file, str):
+        position = file.tell()
+        try:
+            return zipfile.is_zipfile(file)
+        finally:
+            file.seek(position)
+    return zipfile.is_zipfile(file)
+
+
+def chat_member(zf):
+    """Name of the chat text in a WhatsApp export archive.
+
+    Android names it after the chat, iOS calls it _chat.txt. When there are
+    several text files the largest one is the chat.
+    """
+    texts = [info for info in zf.infolist()
+             if info.filename.lower().endswith(".txt") and not info.is_dir()]
+    if not texts:
+        raise ValueError("no chat text in the archive")
+    return max(texts, key=lambda info: info.file_size).filename
+
+
+def open_chat_bytes(file):
+    """Binary stream of the chat text of a .txt or .zip export.
+
+    For an archive only the chat member is decompressed, while it is read,
+    so the media in the archive never end up in memory.
+    """
+    if is_archive(file):
+        zf = zipfile.ZipFile(file)
+        try:
+            # The member keeps the archive file open until it is closed
+            return zf.open(chat_member(zf))
+        finally:
+            zf.close()
+    if isinstance(file, str):
+        return open(file, "rb")
+    return file
+
+
+def chat_size(file):
+    """Uncompressed size of the chat text in bytes."""
+    if is_archive(file):
+        with zipfile.ZipFile(file) as zf:
+            return zf.getinfo(chat_member(zf)).file_size
+    if isinstance(file, str):
+        return os.path.getsize(file)
+    return len(file.getbuffer())
+
+
+def list_media(file):
+    """Media files in an export archive, from the listing only.
+
+    Returns a frame with the file name, the kind (VID, IMG, PTT, ...), the
+    date in the name and the uncompressed size. Nothing is decompressed.
+    """
+    records = []
+    if is_archive(file):
+        with zipfile.ZipFile(file) as zf:
+            for info in zf.infolist():
+                name = os.path.basename(info.filename)
+                matched = MEDIA_NAME.match(name)
+                if matched and not info.is_dir():
+                    records.append((name, matched["kind"],
+                                    matched["date"], info.file_size))
+
+    media = pd.DataFrame(records, columns=["file", "kind", "date", "size"])
+    media["date"] = pd.to_datetime(media["date"], format="%Y%m%d")
+    return media
+
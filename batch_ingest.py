@@ -0,0 +1,234 @@
+"""Headless ingest of a directory of WhatsApp chat exports.
+
+Every export, a .txt or a .zip with media, is one waffle group named after
+the file. Run from the repository root:
+
+    python batch_ingest.py exports/ --config groups.json --output-dir results/
+    python batch_ingest.py exports/ --config groups.json --sheets
+
+The config is a JSON file with defaults and per-group settings, all keys
+optional::
+
+    {
+        "defaults": {"start_date": "2025-06-11"},
+        "groups": {
+            "mathematties": {
+                "start_date": "2025-06-11",
+                "persons": ["Kevin", "..."],
+                "connection": "gsheets",
+                "worksheet": "score"
+            }
+        }
+    }
+
+``text_obj`` is a regular expression for the messages to count. The default,
+archive.VIDEO_NOTE, also finds the video notes attached (as PTV files) in
+an export with media.
+
+Groups are parsed and scored in a process pool. With ``--output-dir`` every
+group gets an ``events.csv`` and ``scores.csv``, with ``--sheets`` the new
+video notes are appended to the group's worksheet in the storage backend of
+the app. The ``storage`` secret picks it like in the app: the Google sheets
+through the Streamlit GSheets connection named in ``connection``, or the
+SQLite file at ``sqlite_path``. The worksheet is named after the group
+unless ``worksheet`` is set, in the Google sheets it must exist already.
+"""
+import argparse
+import datetime
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from archive import (PATTERN, VIDEO_NOTE, chat_size, list_media,
+                     open_chat_bytes)
+from event_store import SHEET_FORMAT
+from functions import count_wednesdays, find_chat_object, load_chat
+from scoring import person_totals, score_weeks, summarize_totals, weekly_counts
+
+
+DEFAULTS = {
+    "pattern": PATTERN,
+    "text_obj": VIDEO_NOTE,
+    "start_date": "2025-06-11",
+    "end_date": None,
+    "persons": None,
+    "connection": "gsheets",
+    # None is the group name, so groups don't share a worksheet
+    "worksheet": None,
+}
+
+
+def load_config(path=None):
+    """Defaults and per-group settings from a JSON config file."""
+    config = {"defaults": {}, "groups": {}}
+    if path is not None:
+        with open(path, encoding="utf-8") as f:
+            config.update(json.load(f))
+    return config
+
+
+def group_settings(config, name):
+    settings = {**DEFAULTS, **config["defaults"],
+                **config["groups"].get(name, {})}
+    if settings["worksheet"] is None:
+        settings["worksheet"] = name
+    return settings
+
+
+def find_exports(directory):
+    """(group name, path) of every export in directory, sorted by name."""
+    exports = []
+    for entry in sorted(os.scandir(directory), key=lambda e: e.name):
+        stem, ext = os.path.splitext(entry.name)
+        if entry.is_file() and ext.lower() in (".txt", ".zip"):
+            exports.append((stem, entry.path))
+    return exports
+
+
+def process_group(name, path, settings):
+    """Parse and score one export, runs in a worker process."""
+    start = time.perf_counter()
+    with open_chat_bytes(path) as f:
+        n_lines = sum(block.count(b"\n")
+                      for block in iter(lambda: f.read(1 << 20), b""))
+
+    chat = load_chat(path, settings["pattern"])
+    events = find_chat_object(chat, settings["text_obj"],
+                              start_date=settings["start_date"])
+    # find_chat_object falls back to all messages when none match
+    events = events[events["message"].str.contains(
+        settings["text_obj"], case=False, na=False)]
+    events = events[["timestamp", "person"]].drop_duplicates()
+
+    persons = settings["persons"]
+    if persons is not None:
+        events = events[events["person"].isin(persons)]
+
+    start_date = datetime.date.fromisoformat(settings["start_date"])
+    if settings["end_date"] is not None:
+        end_date = datetime.date.fromisoformat(settings["end_date"])
+    elif not events.empty:
+        end_date = events["timestamp"].max().date()
+    else:
+        end_date = None
+    wednesdays = count_wednesdays(start_date, end_date=end_date)
+
+    totals = person_totals(score_weeks(weekly_counts(events)))
+    if persons is not None:
+        # Persons without a single video still get their missed weeks
+        totals = totals.reindex(persons, fill_value=0)
+    scores = summarize_totals(totals, wednesdays)
+
+    return {
+        "group": name,
+        "events": events.reset_index(drop=True),
+        "scores": scores,
+        "wednesdays": wednesdays,
+        "lines": n_lines,
+        "bytes": chat_size(path),
+        "media": len(list_media(path)),
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def write_local(result, output_dir):
+    directory = os.path.join(output_dir, result["group"])
+    os.makedirs(directory, exist_ok=True)
+    events = result["events"].assign(
+        timestamp=result["events"]["timestamp"].dt.strftime(SHEET_FORMAT))
+    events.to_csv(os.path.join(directory, "events.csv"), index=False)
+    result["scores"].to_csv(os.path.join(directory, "scores.csv"))
+    return len(events)
+
+
+def write_sheet(result, settings):
+    """Append the video notes that aren't in the worksheet yet."""
+    from dedup import DedupIndex
+    from functions import open_backend
+    from storage import WORKSHEETS, SheetWriter
+
+    # The worksheet of a group has the columns of the score worksheet
+    worksheet = settings["worksheet"]
+    backend = open_backend(settings["connection"],
+                           {**WORKSHEETS, worksheet: WORKSHEETS["score"]})
+    try:
+        old = backend.read(worksheet)
+
+        index = DedupIndex()
+        index.sync(old)
+        new, _ = index.split(result["events"])
+        new = new.assign(timestamp=new["timestamp"].dt.strftime(SHEET_FORMAT)) \
+            .reindex(columns=old.columns)
+
+        writer = SheetWriter(backend)
+        writer.append(worksheet, new)
+        writer.flush()
+    finally:
+        backend.close()
+    return len(new)
+
+
+def print_summary(results, wall_time):
+    print(f"{'group':<24} {'lines':>10} {'media':>7} {'events':>8} "
+          f"{'written':>8} {'seconds':>8} {'lines/sec':>12}")
+    for r in results:
+        print(f"{r['group']:<24} {r['lines']:>10,} {r['media']:>7,} "
+              f"{len(r['events']):>8,} {r['written']:>8,} {r['seconds']:>8.2f} "
+              f"{r['lines'] / r['seconds']:>12,.0f}")
+
+    n_lines = sum(r["lines"] for r in results)
+    n_bytes = sum(r["bytes"] for r in results)
+    print(f"{len(results)} groups, {n_lines:,} lines, "
+          f"{n_bytes / 2**20:,.1f} MiB in {wall_time:.2f}s: "
+          f"{n_lines / wall_time:,.0f} lines/sec, "
+          f"{n_bytes / 2**20 / wall_time:,.1f} MiB/sec")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("directory")
+    parser.add_argument("--config", default=None)
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--output-dir")
+    target.add_argument("--sheets", action="store_true",
+                        help="append to the worksheet of every group")
+    parser.add_argument("--jobs", type=int, default=None,
+                        help="worker processes, the number of cores by default")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    exports = find_exports(args.directory)
+    if not exports:
+        parser.exit(1, f"no exports found in {args.directory}\n")
+
+    settings = {name: group_settings(config, name) for name, _ in exports}
+    results = []
+    failed = 0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        futures = {pool.submit(process_group, name, path, settings[name]): name
+                   for name, path in exports}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                result = future.result()
+                # Writes happen here one at a time, not in the workers
+                if args.sheets:
+                    result["written"] = write_sheet(result, settings[name])
+                else:
+                    result["written"] = write_local(result, args.output_dir)
+            except Exception as e:
+                failed += 1
+                print(f"{name}: failed: {e}")
+                continue
+            results.append(result)
+    wall_time = time.perf_counter() - start
+
+    print_summary(sorted(results, key=lambda r: r["group"]), wall_time)
+    if failed:
+        parser.exit(1, f"{failed} groups failed\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Upload deduplication: merge against the whole sheet vs the dedup index.
+
+Run from the repository root:
+
+    python benchmarks/bench_dedup.py --rows 100000 --upload 500
+
+Builds a score worksheet with ``--rows`` rows and an upload of ``--upload``
+parsed video notes, half of them already in the sheet. Checks that both
+approaches keep the same rows, then times them per upload. A second check
+rewrites part of the sheet in another timestamp format: the merge takes
+those rows for new ones, the index reports them as conflicting.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dedup import DedupIndex  # noqa: E402
+from event_store import SHEET_FORMAT  # noqa: E402
+
+
+def make_sheet(n_rows):
+    timestamps = pd.date_range("2025-06-11 12:00", periods=n_rows, freq="17min")
+    return pd.DataFrame({
+        "timestamp": timestamps.strftime(SHEET_FORMAT),
+        "person": [f"Person {i % 8 + 1}" for i in range(n_rows)],
+    })
+
+
+def make_upload(sheet, n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    known = sheet.iloc[rng.choice(len(sheet), n_rows // 2, replace=False)]
+    known = known.assign(
+        timestamp=pd.to_datetime(known["timestamp"], format=SHEET_FORMAT))
+    last = pd.to_datetime(sheet["timestamp"].iloc[-1], format=SHEET_FORMAT)
+    new = pd.DataFrame({
+        "timestamp": last + pd.to_timedelta(
+            np.arange(1, n_rows - len(known) + 1) * 7, unit="min"),
+        "person": [f"Person {i % 8 + 1}" for i in range(n_rows - len(known))],
+    })
+    return pd.concat([known, new], ignore_index=True)
+
+
+def merge_dedup(old, df):
+    # The upload path before the index
+    df = df.assign(timestamp=df.timestamp.dt.strftime(SHEET_FORMAT))
+    df = df.drop_duplicates(subset=["timestamp", "person"])
+    known = df.merge(old[["timestamp", "person"]].drop_duplicates(),
+                     on=["timestamp", "person"], how="left",
+                     indicator=True)["_merge"] == "both"
+    return df[~known.values]
+
+
+def index_dedup(index, old, df):
+    index.sync(old)
+    new, counts = index.split(df)
+    return new.assign(timestamp=new.timestamp.dt.strftime(SHEET_FORMAT)), counts
+
+
+def per_call(repeat, func):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--upload", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    sheet = make_sheet(args.rows)
+    upload = make_upload(sheet, args.upload)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "dedup_index.parquet")
+        start = time.perf_counter()
+        DedupIndex(path).sync(sheet)
+        build = time.perf_counter() - start
+
+        index = DedupIndex(path)
+        expected = merge_dedup(sheet, upload).reset_index(drop=True)
+        actual, counts = index_dedup(index, sheet, upload)
+        pd.testing.assert_frame_equal(actual.reset_index(drop=True), expected)
+        assert counts == {"new": len(expected), "known": args.upload - len(expected),
+                          "conflicting": 0, "invalid": 0}, counts
+
+        merge_time = per_call(args.repeat, lambda: merge_dedup(sheet, upload))
+        index_time = per_call(args.repeat,
+                              lambda: index_dedup(index, sheet, upload))
+
+    # Rows the spreadsheet wrote back in another format
+    reformatted = sheet.copy()
+    reformatted["timestamp"] = pd.to_datetime(
+        sheet["timestamp"], format=SHEET_FORMAT).dt.strftime("%d/%m/%Y %H:%M")
+    index = DedupIndex()
+    _, counts = index_dedup(index, reformatted, upload)
+    assert counts["conflicting"] == args.upload - counts["new"], counts
+    merged = merge_dedup(reformatted, upload)
+
+    print(f"{args.rows} sheet rows, {args.upload} uploaded, same rows kept")
+    print(f"index build (once): {build * 1000:8.1f} ms")
+    print(f"merge per upload:   {merge_time * 1000:8.1f} ms")
+    print(f"index per upload:   {index_time * 1000:8.1f} ms")
+    print(f"reformatted sheet:  merge re-adds {len(merged) - counts['new']}, "
+          f"index reports {counts['conflicting']} conflicting")
+
+
+if __name__ == "__main__":
+    main()
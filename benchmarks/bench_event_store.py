@@ -0,0 +1,82 @@
+"""Memory per event and per-rerun time of the typed event store.
+
+Run from the repository root:
+
+    python benchmarks/bench_event_store.py --persons 8 --years 4
+
+Compares what pages/app.py did on every rerun (two deep copies of the sheet
+frame, parsing the string timestamps and adding the derived columns) with
+taking the shared EventStore, which is built once per version of the sheet.
+"""
+import argparse
+import copy
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_scoring import make_events  # noqa: E402
+from event_store import SHEET_FORMAT, EventStore  # noqa: E402
+
+
+def per_rerun_frames(timeseries):
+    # The old statistics preparation, on every rerun
+    df_waffles = copy.deepcopy(timeseries)
+    df_waffles.timestamp = pd.to_datetime(df_waffles.timestamp,
+                                          format=SHEET_FORMAT)
+    df_events = copy.deepcopy(timeseries)
+    df_events.timestamp = pd.to_datetime(df_events.timestamp,
+                                         format=SHEET_FORMAT)
+    df_events["day"] = df_events.timestamp.dt.day_name()
+    df_events["day_nr"] = df_events.timestamp.dt.dayofweek
+    df_events["date"] = df_events.timestamp.dt.date
+    df_events["time"] = df_events.timestamp.dt.time
+    df_events["week_nr"] = (
+        df_waffles["timestamp"].dt.isocalendar().year.astype(str) + "-"
+        + df_waffles["timestamp"].dt.isocalendar().week.astype(str).str.zfill(2))
+    return df_waffles, df_events
+
+
+def best_of(rounds, func):
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--persons", type=int, default=8)
+    parser.add_argument("--years", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    events = make_events(args.persons, args.years, seed=0)[0]
+    timeseries = pd.DataFrame({
+        "timestamp": events["timestamp"].dt.strftime(SHEET_FORMAT),
+        "person": events["person"],
+    })
+    n = len(timeseries)
+
+    old_time, (df_waffles, df_events) = best_of(
+        args.rounds, lambda: per_rerun_frames(timeseries))
+    build_time, store = best_of(args.rounds, lambda: EventStore(timeseries))
+    access_time, _ = best_of(args.rounds, lambda: store.events)
+
+    old_bytes = (df_waffles.memory_usage(deep=True).sum()
+                 + df_events.memory_usage(deep=True).sum())
+    print(f"events: {n}")
+    print(f"per rerun, old:     {old_time * 1000:8.2f} ms  "
+          f"{old_bytes / n:6.1f} bytes/event")
+    print(f"store build, once:  {build_time * 1000:8.2f} ms  "
+          f"{store.memory_usage() / n:6.1f} bytes/event")
+    print(f"per rerun, store:   {access_time * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
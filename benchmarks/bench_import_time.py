@@ -0,0 +1,81 @@
+"""Cold-start import cost of every page, measured with ``python -X importtime``.
+
+Run from the repository root:
+
+    python benchmarks/bench_import_time.py [--output import_times.json]
+
+Runs the module-level imports of each page in a fresh interpreter and
+reports the cumulative import time per page and its most expensive
+top-level modules. Imports that fail (missing packages) are listed
+separately, so compare runs from the same environment.
+"""
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES = ["main.py", "pages/app.py", "pages/editor.py", "pages/calender.py"]
+
+
+def page_imports(path):
+    # Only the imports that run when the page script starts
+    with open(os.path.join(ROOT, path), encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    return [ast.unparse(node) for node in tree.body
+            if isinstance(node, (ast.Import, ast.ImportFrom))]
+
+
+def measure(statements, rounds):
+    code = "\n".join(
+        f"try:\n    {stmt}\nexcept ImportError:\n    print({stmt!r})"
+        for stmt in statements)
+
+    best = None
+    for _ in range(rounds):
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                                cwd=ROOT, capture_output=True, text=True)
+        modules = {}
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "cumulative" in line:
+                continue
+            _, cumulative, name = line[len("import time:"):].split("|")
+            # Top-level entries are not indented
+            if not name.startswith("  "):
+                modules[name.strip()] = int(cumulative)
+        total = sum(modules.values())
+        if best is None or total < best["total_us"]:
+            best = {"total_us": total, "modules": modules,
+                    "failed": result.stdout.splitlines()}
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    report = {}
+    for page in PAGES:
+        result = measure(page_imports(page), args.rounds)
+        top = sorted(result["modules"].items(), key=lambda x: -x[1])[:5]
+        report[page] = {"total_ms": result["total_us"] / 1000,
+                        "top_modules_ms": {k: v / 1000 for k, v in top},
+                        "failed_imports": result["failed"]}
+
+        print(f"{page}: {result['total_us'] / 1000:.0f} ms")
+        for name, us in top:
+            print(f"    {name}: {us / 1000:.0f} ms")
+        for stmt in result["failed"]:
+            print(f"    failed: {stmt}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Throughput of the bulk chat parser against the line-by-line loop.
+
+Run from the repository root:
+
+    python benchmarks/bench_load_chat.py [--repeat N]
+
+The checked-in export is concatenated ``--repeat`` times to simulate larger
+groups. Both parsers must produce the same DataFrame.
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from archive import PATTERN  # noqa: E402
+from functions import load_chat, _load_chat_loop  # noqa: E402
+
+CHAT_FILE = "WhatsApp-chat met Mathematties😜/WhatsApp-chat met Mathematties😜.txt"
+
+
+def time_parser(parser, data, rounds):
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        df = parser(io.BytesIO(data), PATTERN)
+        best = min(best, time.perf_counter() - start)
+    return best, df
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    with open(CHAT_FILE, "rb") as f:
+        data = f.read() * args.repeat
+    n_lines = data.count(b"\n")
+
+    loop_time, loop_df = time_parser(_load_chat_loop, data, args.rounds)
+    bulk_time, bulk_df = time_parser(load_chat, data, args.rounds)
+
+    if not loop_df.equals(bulk_df):
+        sys.exit("Bulk parser output differs from the loop parser")
+
+    print(f"lines: {n_lines}")
+    print(f"loop: {loop_time:.3f}s ({n_lines / loop_time:,.0f} lines/sec)")
+    print(f"bulk: {bulk_time:.3f}s ({n_lines / bulk_time:,.0f} lines/sec)")
+    print(f"speed-up: {loop_time / bulk_time:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Speed-up of the process-pool chat parser per worker.
+
+Run from the repository root:
+
+    python benchmarks/bench_parallel_load_chat.py --lines 2000000 \
+        --workers 1 2 4 8
+
+A synthetic export with multi-line messages is generated, parsed serially
+and then with every worker count. Every parallel run must give the same
+DataFrame as the serial one. The pools are warmed up first, so worker
+start-up is not part of the timings.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import parallel  # noqa: E402
+from archive import PATTERN  # noqa: E402
+from functions import load_chat  # noqa: E402
+from generate_chat import generate_chat  # noqa: E402
+
+YEARS = 4
+
+
+def best_of(rounds, func):
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=2_000_000)
+    parser.add_argument("--multiline-share", type=float, default=0.05)
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "chat.txt")
+        rate = args.lines / (1 + args.multiline_share) / (YEARS * 365)
+        n_lines = generate_chat(path, years=YEARS, messages_per_day=rate,
+                                multiline_share=args.multiline_share)
+        print(f"lines: {n_lines}, cores: {os.cpu_count()}")
+
+        serial_time, serial_df = best_of(
+            args.rounds, lambda: load_chat(path, PATTERN))
+        print(f"serial     {serial_time:8.3f}s  "
+              f"({n_lines / serial_time:,.0f} lines/sec)")
+
+        for workers in sorted(set(args.workers)):
+            # Always split, also for small test files
+            def run():
+                records = parallel.parse_parallel(path, PATTERN,
+                                                  workers=workers,
+                                                  min_range_bytes=1)
+                return pd.DataFrame(records, columns=serial_df.columns)
+
+            run()
+            elapsed, df = best_of(args.rounds, run)
+            if not df.equals(serial_df):
+                sys.exit(f"Parallel output with {workers} workers differs "
+                         "from the serial parser")
+            speed_up = serial_time / elapsed
+            print(f"{workers:>2} workers {elapsed:8.3f}s  "
+                  f"speed-up {speed_up:5.2f}x  "
+                  f"per worker {speed_up / workers:5.2f}x")
+    parallel.shutdown()
+
+
+if __name__ == "__main__":
+    main()
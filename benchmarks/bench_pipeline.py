@@ -0,0 +1,161 @@
+"""End-to-end benchmark of every pipeline stage on synthetic exports.
+
+Run from the repository root:
+
+    python benchmarks/bench_pipeline.py --sizes 10000 100000 1000000 \
+        --output pipeline_results.json
+
+For every size an export is generated with generate_chat and each stage is
+timed, then run again under tracemalloc for its peak memory. The results
+are written as JSON, one record per (size, stage), so runs can be compared.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from archive import PATTERN  # noqa: E402
+from figure_cache import figure_to_svg  # noqa: E402
+from functions import (count_wednesdays, cumulative_chart,  # noqa: E402
+                       find_chat_object, load_chat, load_chat_objects,
+                       punishment_chart)
+from generate_chat import generate_chat  # noqa: E402
+from scoring import cumulative_on_time, summarize_scores  # noqa: E402
+
+TEXT_OBJ = "Video note"
+START = "2021-10-01"
+
+
+def stages(path, persons, end_date):
+    """(name, function) pairs, each stage feeds on the previous results."""
+    state = {}
+    start_date = datetime.date.fromisoformat(START)
+
+    def parse():
+        state["chat"] = load_chat(path, PATTERN)
+        return len(state["chat"])
+
+    def filter_video_notes():
+        df = find_chat_object(state["chat"].copy(), TEXT_OBJ, start_date=START)
+        state["events"] = df[["timestamp", "person"]]
+        return len(df)
+
+    def fused_ingest():
+        return len(load_chat_objects(path, PATTERN, TEXT_OBJ,
+                                     start_date=START))
+
+    def wednesdays():
+        state["wednesdays"] = count_wednesdays(start_date, end_date)
+        return state["wednesdays"]
+
+    def scoring():
+        state["scores"] = summarize_scores(state["events"], state["wednesdays"])
+        return len(state["scores"])
+
+    def timeseries():
+        state["cumulative"] = cumulative_on_time(state["events"], START,
+                                                 end_date, persons)
+        return state["cumulative"].size
+
+    def bar_chart():
+        bars = state["scores"][["missed", "late", "bonus"]]
+        return len(figure_to_svg(punishment_chart(bars)))
+
+    def timeseries_chart():
+        return len(cumulative_chart(state["cumulative"]).to_json())
+
+    return [("load_chat", parse), ("find_chat_object", filter_video_notes),
+            ("load_chat_objects", fused_ingest),
+            ("count_wednesdays", wednesdays), ("scoring", scoring),
+            ("cumulative_on_time", timeseries), ("bar_chart", bar_chart),
+            ("timeseries_chart", timeseries_chart)]
+
+
+def run_stages(path, persons, end_date, memory):
+    results = {}
+    for name, func in stages(path, persons, end_date):
+        if memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        output = func()
+        elapsed = time.perf_counter() - start
+        if memory:
+            results[name] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        else:
+            results[name] = (elapsed, output)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--persons", type=int, default=8)
+    parser.add_argument("--years", type=float, default=4)
+    parser.add_argument("--video-note-share", type=float, default=0.02)
+    parser.add_argument("--multiline-share", type=float, default=0.05)
+    parser.add_argument("--no-memory", action="store_true",
+                        help="skip the tracemalloc run")
+    parser.add_argument("--output", default="pipeline_results.json")
+    args = parser.parse_args()
+
+    persons = [f"Person {i + 1}" for i in range(args.persons)]
+    end_date = (datetime.date.fromisoformat(START)
+                + datetime.timedelta(days=int(args.years * 365)))
+    records = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            path = os.path.join(tmp, f"chat_{size}.txt")
+            rate = size / (1 + args.multiline_share) / (args.years * 365)
+            n_lines = generate_chat(path, persons=args.persons,
+                                    years=args.years, messages_per_day=rate,
+                                    video_note_share=args.video_note_share,
+                                    multiline_share=args.multiline_share,
+                                    start=START)
+            n_bytes = os.path.getsize(path)
+
+            timings = run_stages(path, persons, end_date, memory=False)
+            peaks = ({} if args.no_memory
+                     else run_stages(path, persons, end_date, memory=True))
+
+            for stage, (elapsed, output) in timings.items():
+                records.append({
+                    "lines": n_lines,
+                    "bytes": n_bytes,
+                    "stage": stage,
+                    "seconds": elapsed,
+                    "lines_per_sec": n_lines / elapsed if elapsed else None,
+                    "peak_bytes": peaks.get(stage),
+                    "output_size": int(output),
+                })
+                peak = peaks.get(stage)
+                print(f"{n_lines:>10,} lines  {stage:<20} {elapsed:8.3f}s  "
+                      + (f"peak {peak / 2**20:8.1f} MiB" if peak is not None else ""))
+
+    report = {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "config": vars(args),
+        "results": records,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4)
+    print(f"results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Highlight tiles from the week ranking against the per-tile pandas code.
+
+Run from the repository root:
+
+    python benchmarks/bench_rankings.py --persons 8 --years 4
+
+The old tiles each sorted and grouped the events on their own, on every
+rerun. WeekRanking ranks the events once per data version, after which the
+tiles are lookups. Both must give the same answers.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_scoring import make_events  # noqa: E402
+from event_store import SHEET_FORMAT, EventStore  # noqa: E402
+from rankings import WeekRanking  # noqa: E402
+
+
+def old_tiles(df_events, n_persons):
+    # The tile code of pages/app.py before the ranking index
+    df_events = df_events.copy()
+    df_events["day"] = df_events.timestamp.dt.day_name()
+    df_events["time"] = df_events.timestamp.dt.time
+    iso = df_events.timestamp.dt.isocalendar()
+    df_events["week_nr"] = (iso.year.astype(str) + "-"
+                            + iso.week.astype(str).str.zfill(2))
+    df_wednesday = df_events.loc[df_events.day == "Wednesday"]
+
+    all_sent = df_wednesday[["person", "week_nr"]].groupby("week_nr")["person"] \
+        .apply(set).reset_index()
+    all_sent = all_sent[all_sent["person"].apply(len) == n_persons]
+
+    earliest = df_wednesday.sort_values(by="time").reset_index(drop=True).loc[0]
+
+    latest = df_wednesday.sort_values(by=["timestamp"]) \
+        .drop_duplicates("week_nr", keep="last")
+    latest = latest.sort_values(by=["day_nr", "timestamp"]) \
+        .reset_index(drop=True).loc[len(latest) - 1]
+
+    first_counts = df_wednesday.sort_values("timestamp").groupby("week_nr") \
+        .first()["person"].value_counts()
+    last_counts = df_events.sort_values("timestamp").groupby("week_nr") \
+        .last()["person"].value_counts()
+    return (len(all_sent), (earliest.person, earliest.timestamp),
+            (latest.person, latest.timestamp),
+            (first_counts.idxmax(), first_counts.max()),
+            (last_counts.idxmax(), last_counts.max()))
+
+
+def new_tiles(ranking, n_persons):
+    earliest = ranking.earliest_wednesday()
+    latest = ranking.last_wednesday()
+    first_counts = ranking.first_counts()
+    last_counts = ranking.last_counts()
+    return (len(ranking.weeks_all_sent(n_persons)),
+            (earliest.person, earliest.timestamp),
+            (latest.person, latest.timestamp),
+            (first_counts.idxmax(), first_counts.max()),
+            (last_counts.idxmax(), last_counts.max()))
+
+
+def best_of(rounds, func):
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--persons", type=int, default=8)
+    parser.add_argument("--years", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    events = make_events(args.persons, args.years, seed=0)[0]
+    # Whole seconds make ties within a week unlikely, the old code sorted
+    # with an unstable sort so ties could go either way
+    events["timestamp"] += pd.to_timedelta(np.arange(len(events)) % 60,
+                                           unit="s")
+    timeseries = pd.DataFrame({
+        "timestamp": events["timestamp"].dt.strftime(SHEET_FORMAT),
+        "person": events["person"],
+    })
+    store = EventStore(timeseries)
+    df_events = store.events
+
+    # The old code read the persons as plain strings from the sheet
+    old_events = df_events.astype({"person": object})
+    old_time, old = best_of(args.rounds,
+                            lambda: old_tiles(old_events, args.persons))
+    build_time, ranking = best_of(args.rounds, lambda: WeekRanking(df_events))
+    lookup_time, new = best_of(args.rounds,
+                               lambda: new_tiles(ranking, args.persons))
+
+    if old != new:
+        sys.exit(f"Ranking tiles differ:\nold {old}\nnew {new}")
+    print(f"events: {len(df_events)}")
+    print(f"old tiles, per rerun:     {old_time * 1000:8.2f} ms")
+    print(f"ranking build, once:      {build_time * 1000:8.2f} ms")
+    print(f"ranking tiles, per rerun: {lookup_time * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
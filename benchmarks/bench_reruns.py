@@ -0,0 +1,159 @@
+"""Warm full reruns of the dashboard against reruns of the upload fragment.
+
+Run from the repository root:
+
+    python benchmarks/bench_reruns.py --persons 8 --years 4 --repeat 10
+
+Runs pages/app.py headless with streamlit's AppTest on a SQLite copy of
+generated worksheets. The full reruns give the perf sections of the page.
+Using a widget of the upload form only reruns that fragment. AppTest has no
+way to ask for that, so fragment_rerun queues the fragment like the
+browser does, and the fragment records its own run in the ``perf_fragments``
+of the session state, as listed by the performance panel (``?perf=1``).
+The wall time of a run includes the overhead of AppTest itself.
+"""
+import argparse
+import functools
+import http.server
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import perf  # noqa: E402
+from bench_scoring import make_events  # noqa: E402
+from event_store import SHEET_FORMAT  # noqa: E402
+from storage import SQLiteBackend  # noqa: E402
+
+SECTIONS = ["upload", "ranking", "statistieken", "straf atjes", "timeseries"]
+
+
+class Collect(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(json.loads(record.getMessage()))
+
+
+class QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_pictures():
+    """Serve the repository over http, the thumbnails only fetch http(s)."""
+    handler = functools.partial(QuietHandler, directory=ROOT)
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}"
+
+
+def fragment_rerun(app):
+    """app.run(), but only rerunning the fragments like a widget in them."""
+    from streamlit.testing.v1 import local_script_runner
+
+    # Not public: the fragments registered by the previous run, and the
+    # rerun request that the runner sends for every AppTest run
+    fragment_ids = list(app._fragment_storage._fragments)
+    rerun_data = local_script_runner.RerunData
+    local_script_runner.RerunData = functools.partial(
+        rerun_data, fragment_id_queue=fragment_ids)
+    try:
+        return app.run()
+    finally:
+        local_script_runner.RerunData = rerun_data
+
+
+def wall_time(repeat, run):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        run()
+    return (time.perf_counter() - start) / repeat
+
+
+def seed(path, n_persons, n_years):
+    events, drinks, _ = make_events(n_persons, n_years, seed=0)
+    backend = SQLiteBackend(path)
+    backend.update("score", pd.DataFrame({
+        "timestamp": events["timestamp"].dt.strftime(SHEET_FORMAT),
+        "person": events["person"],
+    }))
+    backend.update("adjes_gedaan", drinks.assign(datum="11-06-2025"))
+    backend.close()
+    return sorted(events["person"].unique())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--persons", type=int, default=8)
+    parser.add_argument("--years", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    from streamlit.testing.v1 import AppTest
+
+    collect = Collect()
+    perf.logger.addHandler(collect)
+    pictures = serve_pictures()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # The app keeps its caches in the working directory
+        os.chdir(tmp)
+        os.symlink(os.path.join(ROOT, "matplotlib_style.mpstyle"),
+                   "matplotlib_style.mpstyle")
+        persons = seed(os.path.join(tmp, "waffles.db"), args.persons,
+                       args.years)
+        app = AppTest.from_file(os.path.join(ROOT, "pages", "app.py"),
+                                default_timeout=120)
+        app.secrets["storage"] = "sqlite"
+        app.secrets["sqlite_path"] = os.path.join(tmp, "waffles.db")
+        app.secrets["perf_panel"] = True
+        app.secrets["credentials"] = {"usernames": {
+            name: {"name": name,
+                   "picture_url": f"{pictures}/beer.png"}
+            for name in persons}}
+
+        # The first run fills the shared caches
+        app.run()
+        if app.exception:
+            sys.exit(app.exception[0].value)
+        collect.records.clear()
+        full_wall = wall_time(args.repeat, app.run)
+        fragment_wall = wall_time(args.repeat, lambda: fragment_rerun(app))
+        if app.exception:
+            sys.exit(app.exception[0].value)
+        fragments = app.session_state["perf_fragments"][-args.repeat:]
+        os.chdir(ROOT)
+
+    totals = defaultdict(float)
+    for record in collect.records:
+        if record["run"] == "app" and record["depth"] == 0:
+            totals[record["span"]] += record["ms"] / args.repeat
+    page = sum(totals.values())
+    fragment = sum(record["ms"] for record in fragments) / len(fragments)
+
+    print(f"mean of {args.repeat} warm reruns, {args.persons} persons, "
+          f"{args.years} years")
+    print(f"{'section':<16}{'time':>12}")
+    for section in SECTIONS:
+        print(f"{section:<16}{totals[section]:>10.1f}ms")
+    print(f"{'whole page':<16}{page:>10.1f}ms")
+    print()
+    print(f"{'rerun':<16}{'sections':>12}{'wall':>12}")
+    print(f"{'full':<16}{page:>10.1f}ms{full_wall * 1000:>10.1f}ms")
+    print(f"{'upload fragment':<16}{fragment:>10.1f}ms"
+          f"{fragment_wall * 1000:>10.1f}ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Scoring engine against the per-person loop it replaced.
+
+Run from the repository root:
+
+    python benchmarks/bench_scoring.py [--persons N] [--years Y]
+
+The old loop is only timed on a small group, since it filters the weekly
+table once per person. Both must give the same scores.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scoring import summarize_scores  # noqa: E402
+
+START_DATE = pd.Timestamp("2025-06-11")
+
+
+def make_events(n_persons, n_years, seed=0):
+    # Roughly one waffle per person per week, most of them on Wednesday
+    rng = np.random.default_rng(seed)
+    n_weeks = 52 * n_years
+    week = np.repeat(np.arange(n_weeks), n_persons)
+    person = np.tile(np.arange(n_persons), n_weeks)
+    sent = rng.random(len(week)) < 0.9
+    day_offset = np.where(rng.random(len(week)) < 0.8, 0,
+                          rng.integers(1, 6, len(week)))
+    minutes = rng.integers(0, 24 * 60, len(week))
+    timestamps = (START_DATE + pd.to_timedelta(week * 7 + day_offset, unit="D")
+                  + pd.to_timedelta(minutes, unit="min"))
+    events = pd.DataFrame({"timestamp": timestamps[sent],
+                           "person": pd.Index(person[sent]).map("p{}".format)})
+    drinks = pd.DataFrame({"name": [f"p{i}" for i in range(n_persons)],
+                           "drinks_done": -rng.integers(0, 5, n_persons)})
+    return events, drinks, n_weeks
+
+
+def loop_scores(events, wednesdays, drinks_done):
+    # The inline code of pages/app.py before the scoring module
+    df_waffles = events.copy()
+    df_waffles["day"] = df_waffles.timestamp.dt.day_name()
+    df_waffles["week_nr"] = (
+        df_waffles['timestamp'].dt.isocalendar().year.astype(str) + '-' +
+        df_waffles['timestamp'].dt.isocalendar().week.astype(str).str.zfill(2))
+    df_waffles["wednesday_entries"] = (df_waffles["day"] == "Wednesday").astype(int)
+    df_waffles["not_wednesday_entries"] = (df_waffles["day"] != "Wednesday").astype(int)
+    grouped = df_waffles.groupby(["week_nr", "person"]).agg(
+        wednesday_count=("wednesday_entries", "sum"),
+        not_wednesday_count=("not_wednesday_entries", "sum")).reset_index()
+    grouped["late_waffles"] = 0
+    grouped.loc[(grouped["wednesday_count"] == 0)
+                & (grouped["not_wednesday_count"] > 0), "late_waffles"] = 1
+    grouped["double_wednesday_waffles"] = 0
+    grouped.loc[grouped["wednesday_count"] > 1, "double_wednesday_waffles"] = \
+        grouped["wednesday_count"] - 1
+
+    scores = {}
+    for name in grouped.person.unique():
+        filtered_df = grouped[grouped["person"] == name]
+        on_time = np.sum(filtered_df["wednesday_count"]
+                         - filtered_df["double_wednesday_waffles"])
+        late = np.sum(filtered_df.late_waffles)
+        missed = wednesdays - (on_time + late)
+        double = np.sum(filtered_df.double_wednesday_waffles)
+        drinks = drinks_done[drinks_done["name"] == name].drinks_done.sum()
+        scores[name] = {
+            "on_time": on_time, "late": late, "missed": missed,
+            "double": double, "punishments": late + missed + double,
+            "bonus": max(0, abs(drinks) - (late + missed)),
+            "drinks_to_go": wednesdays - on_time + drinks,
+        }
+    return pd.DataFrame.from_dict(scores, orient="index")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--persons", type=int, default=10_000)
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--loop-persons", type=int, default=200)
+    args = parser.parse_args()
+
+    # Check and time the old loop on a small group
+    events, drinks, n_weeks = make_events(args.loop_persons, args.years)
+    start = time.perf_counter()
+    expected = loop_scores(events, n_weeks, drinks)
+    loop_time = time.perf_counter() - start
+    start = time.perf_counter()
+    summary = summarize_scores(events, n_weeks, drinks)
+    engine_time = time.perf_counter() - start
+
+    got = summary.loc[expected.index, expected.columns]
+    if not np.allclose(got.to_numpy(float), expected.to_numpy(float)):
+        sys.exit("Scoring engine differs from the per-person loop")
+
+    print(f"{args.loop_persons} persons, {len(events):,} events: "
+          f"loop {loop_time:.2f}s, engine {engine_time:.2f}s")
+
+    events, drinks, n_weeks = make_events(args.persons, args.years)
+    start = time.perf_counter()
+    summarize_scores(events, n_weeks, drinks)
+    engine_time = time.perf_counter() - start
+    print(f"{args.persons} persons, {len(events):,} events: "
+          f"engine {engine_time:.2f}s ({len(events) / engine_time:,.0f} events/sec)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Write volume of full-sheet rewrites against append-only writes.
+
+Run from the repository root:
+
+    python benchmarks/bench_sheet_writes.py [--rows N] [--new M]
+
+Uses the in-memory FakeSheetBackend, so no Google account is needed.
+"""
+import argparse
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import FakeSheetBackend, SheetWriter  # noqa: E402
+
+
+def make_score(n_rows, offset=0):
+    timestamps = pd.date_range("2025-06-11 12:00", periods=n_rows, freq="h")
+    return pd.DataFrame({
+        "timestamp": timestamps[offset:].strftime("%d-%m-%Y %H:%M:%S"),
+        "person": [f"person_{i % 10}" for i in range(offset, n_rows)],
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--new", type=int, default=10)
+    args = parser.parse_args()
+
+    old = make_score(args.rows)
+    full = make_score(args.rows + args.new)
+    new = full.iloc[args.rows:]
+
+    rewrite = FakeSheetBackend({"score": old})
+    rewrite.update("score", full)
+
+    append = FakeSheetBackend({"score": old})
+    writer = SheetWriter(append)
+    # Several uploads batched into a single call
+    for _, chunk in new.groupby(new.index // 3):
+        writer.append("score", chunk)
+    writer.flush()
+
+    if not rewrite.read("score").equals(append.read("score")):
+        sys.exit("Append result differs from the full rewrite")
+
+    for label, backend in [("rewrite", rewrite), ("append", append)]:
+        # Only the writes, the reads of the check above are logged as well
+        ops = [op for op in backend.operations if op["op"] != "read"]
+        print(f"{label}: {len(ops)} call(s), "
+              f"{sum(op['rows'] for op in ops)} rows, "
+              f"{sum(op['bytes'] for op in ops):,} bytes")
+
+
+if __name__ == "__main__":
+    main()
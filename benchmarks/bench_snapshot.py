@@ -0,0 +1,122 @@
+"""Dashboard work per session against one shared snapshot per data version.
+
+Run from the repository root:
+
+    python benchmarks/bench_snapshot.py --sessions 8 --persons 8 --years 4
+
+Simulates ``--sessions`` sessions opening the dashboard right after new data
+landed. Before, every session computed the scores, tiles, drinks and both
+chart payloads itself. Now SnapshotPublisher builds them once in the
+background and serves the previous snapshot until then. Checks that the
+snapshot matches the per-session computation and that a newer version is
+served stale first.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+import matplotlib
+import pandas as pd
+
+# Reproducible SVG ids and dates, so the bar charts can be compared
+os.environ["SOURCE_DATE_EPOCH"] = "0"
+matplotlib.rcParams["svg.hashsalt"] = "bench_snapshot"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aggregates import WeeklyAggregate  # noqa: E402
+from bench_scoring import make_events  # noqa: E402
+from event_store import SHEET_FORMAT, EventStore  # noqa: E402
+from figure_cache import FigureCache  # noqa: E402
+from functions import build_snapshot  # noqa: E402
+from snapshot import SnapshotPublisher  # noqa: E402
+
+START_DATE = "2025-06-11"
+
+
+def make_sheets(n_persons, n_years):
+    events, drinks, _ = make_events(n_persons, n_years, seed=0)
+    timeseries = pd.DataFrame({
+        "timestamp": events["timestamp"].dt.strftime(SHEET_FORMAT),
+        "person": events["person"],
+    })
+    return timeseries, drinks.assign(datum="11-06-2025")
+
+
+def per_session(store, drinks, persons, figures):
+    # What every session computed on its own before the snapshot
+    return build_snapshot(None, store, drinks, persons, START_DATE,
+                          WeeklyAggregate(), figures)
+
+
+def summary(snapshot):
+    return (snapshot.wednesdays, snapshot.sort_order, snapshot.weeks_all_sent,
+            snapshot.earliest, snapshot.latest, snapshot.most_first,
+            snapshot.most_last, snapshot.drinks_to_go, snapshot.bar_chart,
+            snapshot.timeseries_chart)
+
+
+def run_sessions(n_sessions, func):
+    threads = [threading.Thread(target=func) for _ in range(n_sessions)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--persons", type=int, default=8)
+    parser.add_argument("--years", type=int, default=4)
+    args = parser.parse_args()
+
+    timeseries, drinks = make_sheets(args.persons, args.years)
+    store = EventStore(timeseries)
+    persons = {f"p{i}": {} for i in range(args.persons)}
+
+    # Every session on its own, sharing only the figure cache
+    figures = FigureCache()
+    expected = summary(per_session(store, drinks, persons, figures))
+    before = run_sessions(
+        args.sessions,
+        lambda: per_session(store, drinks, persons, FigureCache()))
+
+    # One build shared by all sessions
+    publisher = SnapshotPublisher(build_snapshot)
+    served = []
+    after = run_sessions(
+        args.sessions,
+        lambda: served.append(publisher.get(
+            "v1", store, drinks, persons, START_DATE, WeeklyAggregate(),
+            FigureCache())))
+    if publisher.builds != 1 or any(s is not served[0] for s in served):
+        sys.exit(f"expected one shared snapshot, got {publisher.builds} builds")
+    if summary(served[0]) != expected:
+        sys.exit("snapshot differs from the per-session dashboard")
+
+    # New data: the previous snapshot is served until the new one is built
+    newer = EventStore(pd.concat([timeseries, timeseries.tail(args.persons)],
+                                 ignore_index=True))
+    start = time.perf_counter()
+    stale = publisher.get("v2", newer, drinks, persons, START_DATE,
+                          WeeklyAggregate(), figures)
+    stale_time = time.perf_counter() - start
+    fresh = publisher.get("v2", newer, drinks, persons, START_DATE,
+                          WeeklyAggregate(), figures, wait=True)
+    if stale.version != "v1" or fresh.version != "v2":
+        sys.exit(f"served {stale.version} and {fresh.version}")
+
+    print(f"events: {len(store)}, {args.sessions} sessions at once")
+    print(f"per session:        {before:8.2f} s")
+    print(f"shared snapshot:    {after:8.2f} s (one build)")
+    print(f"stale while building: {stale_time * 1000:6.2f} ms, "
+          f"rebuild took {publisher.last_build_seconds:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
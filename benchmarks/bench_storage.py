@@ -0,0 +1,84 @@
+"""I/O cost per storage operation of the offline backends.
+
+Run from the repository root:
+
+    python benchmarks/bench_storage.py --rows 10000 --repeat 50
+
+Seeds a score worksheet with ``--rows`` rows in the in-memory fake and in a
+SQLite file, then times read, version and append per operation, directly
+and through SheetCache, with ttl 0 and as a pass-through. The Google Sheets
+backend needs an account and is not part of this run.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import FakeSheetBackend, SheetCache, SQLiteBackend  # noqa: E402
+
+
+def make_score(n_rows):
+    timestamps = pd.date_range("2025-06-11 12:00", periods=n_rows, freq="h")
+    return pd.DataFrame({
+        "timestamp": timestamps.strftime("%d-%m-%Y %H:%M:%S"),
+        "person": [f"Person {i % 8 + 1}" for i in range(n_rows)],
+    })
+
+
+def per_op(repeat, func):
+    start = time.perf_counter()
+    for i in range(repeat):
+        func(i)
+    return (time.perf_counter() - start) / repeat
+
+
+def measure(backend, cache_dir, repeat):
+    row = [["11-06-2025 12:00:00", "Person 1"]]
+    batch = row * 100
+    cache = SheetCache(backend, cache_dir=cache_dir, ttl=0)
+    cache.read("score")
+    passthrough = SheetCache(backend, cache_dir=cache_dir, passthrough=True)
+    # The reads come first, before the appends make the worksheet longer
+    return {
+        "read": per_op(repeat, lambda i: backend.read("score")),
+        "cached read": per_op(repeat, lambda i: cache.read("score")),
+        "passthrough": per_op(repeat, lambda i: passthrough.read("score")),
+        "version": per_op(repeat, lambda i: backend.version("score")),
+        "append 1 row": per_op(repeat,
+                               lambda i: backend.append_rows("score", row)),
+        "append 100 rows": per_op(repeat,
+                                  lambda i: backend.append_rows("score", batch)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    score = make_score(args.rows)
+    with tempfile.TemporaryDirectory() as tmp:
+        sqlite = SQLiteBackend(os.path.join(tmp, "waffles.db"))
+        sqlite.update("score", score)
+        backends = {"fake": FakeSheetBackend({"score": score}),
+                    "sqlite": sqlite}
+        results = {name: measure(backend, os.path.join(tmp, name),
+                                 args.repeat)
+                   for name, backend in backends.items()}
+        sqlite.close()
+
+    print(f"{args.rows} rows, mean of {args.repeat} operations")
+    print(f"{'operation':<16}" + "".join(f"{name:>12}" for name in results))
+    for op in results["fake"]:
+        print(f"{op:<16}" + "".join(f"{r[op] * 1000:>10.3f}ms"
+                                    for r in results.values()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Cold and warm profile picture loading with the thumbnail cache.
+
+Run from the repository root:
+
+    python benchmarks/bench_thumbnails.py --persons 8 --latency 0.3
+
+Full-size pictures are written to a temporary directory and served through
+a fetch function that sleeps ``--latency`` seconds, standing in for the
+picture host. Prints the cold fetch time, sequentially and concurrently,
+the warm lookup time and the bytes sent per rerun before and after.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from thumbnails import ThumbnailCache  # noqa: E402
+
+WIDTHS = [300, 200]
+# Pictures shown per rerun: one per person in the ranking, four tiles
+TILES = 4
+
+
+def make_pictures(directory, n, size):
+    rng = np.random.default_rng(0)
+    paths = []
+    for i in range(n):
+        pixels = rng.integers(0, 255, (size, size, 3), dtype=np.uint8)
+        path = os.path.join(directory, f"person_{i}.jpg")
+        Image.fromarray(pixels).save(path, quality=90)
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--persons", type=int, default=8)
+    parser.add_argument("--size", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.3)
+    args = parser.parse_args()
+
+    def slow_fetch(path):
+        time.sleep(args.latency)
+        with open(path, "rb") as f:
+            return f.read()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        urls = make_pictures(tmp, args.persons, args.size)
+        original_bytes = [os.path.getsize(url) for url in urls]
+
+        timings = {}
+        for name, workers in [("sequential", 1), ("concurrent", 8)]:
+            cache = ThumbnailCache(os.path.join(tmp, f"cache_{name}"),
+                                   fetch=slow_fetch, max_workers=workers)
+            start = time.perf_counter()
+            failed = cache.prefetch(urls, WIDTHS)
+            timings[name] = time.perf_counter() - start
+            if failed:
+                sys.exit(f"failed to fetch {failed}")
+
+        start = time.perf_counter()
+        ranking = [cache.get(url, WIDTHS[0]) for url in urls]
+        tiles = [cache.get(url, WIDTHS[1]) for url in urls[:TILES]]
+        warm = time.perf_counter() - start
+
+    before = sum(original_bytes) + sum(original_bytes[:TILES])
+    after = sum(map(len, ranking)) + sum(map(len, tiles))
+    print(f"cold, sequential: {timings['sequential']:.2f}s")
+    print(f"cold, concurrent: {timings['concurrent']:.2f}s")
+    print(f"warm, per rerun:  {warm * 1000:.1f} ms")
+    print(f"bytes per rerun:  {before / 2**20:.1f} MiB -> {after / 2**20:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Cumulative "Waffles Optijd Verstuurd" matrix against the per-person loop.
+
+Run from the repository root:
+
+    python benchmarks/bench_timeseries.py [--persons N] [--years Y]
+
+Both must give the same cumulative series for every person.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_scoring import START_DATE, make_events  # noqa: E402
+from scoring import cumulative_on_time  # noqa: E402
+
+
+def loop_cumulative(events, start_date, end_date, persons):
+    # The per-person loop of pages/app.py before cumulative_on_time
+    data = events.copy()
+    data["day"] = data.timestamp.dt.day_name()
+    data["week_nr"] = (
+        data['timestamp'].dt.isocalendar().year.astype(str) + '-' +
+        data['timestamp'].dt.isocalendar().week.astype(str).str.zfill(2))
+
+    date_range = pd.date_range(start=start_date, end=end_date, freq="W-WED")
+    df_xaxis = pd.DataFrame(data={"dates": date_range})
+    df_xaxis["week_nr"] = (
+        df_xaxis['dates'].dt.isocalendar().year.astype(str) + '-' +
+        df_xaxis['dates'].dt.isocalendar().week.astype(str).str.zfill(2))
+    df_xaxis["value"] = 0
+
+    series = {}
+    for name in persons:
+        df_person = data[data["person"] == name].drop(columns=["person"])
+        df_person = df_person[df_person["day"] == "Wednesday"]
+        df_person = df_person.drop_duplicates(subset=["week_nr"], keep="first")
+        df_person["value"] = 1
+        df_person_full = pd.merge(left=df_xaxis[["week_nr", "value"]],
+                                  right=df_person[["week_nr", "value"]],
+                                  on="week_nr", how="left")
+        df_person_full.fillna(0, inplace=True)
+        df_person_full["value"] = df_person_full.value_x + df_person_full.value_y
+        df_person_full["week_date"] = pd.to_datetime(
+            df_person_full["week_nr"] + "-1", format="%G-%V-%u")
+        series[name] = df_person_full.set_index("week_date")["value"].cumsum()
+    return pd.DataFrame(series)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--persons", type=int, default=500)
+    parser.add_argument("--years", type=int, default=10)
+    args = parser.parse_args()
+
+    events, _, n_weeks = make_events(args.persons, args.years)
+    end_date = START_DATE + pd.Timedelta(weeks=n_weeks)
+    persons = sorted(events["person"].unique())
+
+    start = time.perf_counter()
+    expected = loop_cumulative(events, START_DATE, end_date, persons)
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    matrix = cumulative_on_time(events, START_DATE, end_date, persons)
+    pivot_time = time.perf_counter() - start
+
+    if not (matrix.index.equals(expected.index)
+            and np.array_equal(matrix.to_numpy(), expected.to_numpy())):
+        sys.exit("Pivot result differs from the per-person loop")
+
+    print(f"{args.persons} persons, {n_weeks} weeks, {len(events):,} events")
+    print(f"loop:  {loop_time:.3f}s")
+    print(f"pivot: {pivot_time:.3f}s ({loop_time / pivot_time:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Wall time and peak memory of the fused video note ingest.
+
+Run from the repository root:
+
+    python benchmarks/bench_video_notes.py [--repeat N]
+
+Compares load_chat + find_chat_object with load_chat_objects on the
+checked-in export, concatenated ``--repeat`` times. Both must keep the same
+messages.
+"""
+import argparse
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from archive import PATTERN  # noqa: E402
+from functions import load_chat, find_chat_object, load_chat_objects  # noqa: E402
+
+CHAT_FILE = "WhatsApp-chat met Mathematties😜/WhatsApp-chat met Mathematties😜.txt"
+TEXT_OBJ = "Video note"
+START_DATE = "2025-06-11"
+
+
+def two_pass(data):
+    df = load_chat(io.BytesIO(data), PATTERN)
+    return find_chat_object(df, TEXT_OBJ, start_date=START_DATE)
+
+
+def fused(data):
+    return load_chat_objects(io.BytesIO(data), PATTERN, TEXT_OBJ,
+                             start_date=START_DATE)
+
+
+def measure(func, data):
+    tracemalloc.start()
+    start = time.perf_counter()
+    df = func(data)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak, df
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    with open(CHAT_FILE, "rb") as f:
+        data = f.read() * args.repeat
+
+    old_time, old_peak, old_df = measure(two_pass, data)
+    new_time, new_peak, new_df = measure(fused, data)
+
+    if not old_df.equals(new_df):
+        sys.exit("Fused ingest output differs from load_chat + find_chat_object")
+
+    n_lines = data.count(b"\n")
+    print(f"lines: {n_lines}, video notes: {len(new_df)}")
+    print(f"two pass: {old_time:.3f}s, peak {old_peak / 2**20:.1f} MiB")
+    print(f"fused:    {new_time:.3f}s, peak {new_peak / 2**20:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
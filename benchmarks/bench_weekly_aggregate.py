@@ -0,0 +1,68 @@
+"""Cost of syncing the weekly aggregate after one new week of waffles.
+
+Run from the repository root:
+
+    python benchmarks/bench_weekly_aggregate.py [--persons N] [--rounds R]
+
+For a growing history, compares a full regroup of all events with folding
+only the last week into an already synced WeeklyAggregate, and with a rerun
+that has no new rows. Every time is the best of ``--rounds`` runs.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aggregates import WeeklyAggregate  # noqa: E402
+from bench_scoring import make_events  # noqa: E402
+from scoring import summarize_scores  # noqa: E402
+
+
+def best_of(rounds, func, setup=lambda: None):
+    best = float("inf")
+    for _ in range(rounds):
+        state = setup()
+        start = time.perf_counter()
+        func(state)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--persons", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    for years in [1, 2, 5, 10]:
+        events, drinks, n_weeks = make_events(args.persons, years)
+        drinks = drinks.assign(datum="11-06-2025")
+        # The sheet is append-only, the last week is the tail
+        history = events.iloc[:len(events) - args.persons]
+
+        def synced(events):
+            aggregate = WeeklyAggregate()
+            aggregate.sync(events, drinks)
+            return aggregate
+
+        full_time = best_of(
+            args.rounds, lambda _: summarize_scores(events, n_weeks, drinks))
+        incremental_time = best_of(
+            args.rounds,
+            lambda aggregate: aggregate.summary_for(events, drinks, n_weeks),
+            lambda: synced(history))
+        # A rerun without new rows
+        render_time = best_of(
+            args.rounds,
+            lambda aggregate: aggregate.summary_for(events, drinks, n_weeks),
+            lambda: synced(events))
+
+        print(f"{years:>2} years, {len(events):>9,} events: "
+              f"full {full_time * 1000:7.1f} ms, "
+              f"incremental {incremental_time * 1000:7.1f} ms, "
+              f"no new rows {render_time * 1000:5.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Generate synthetic WhatsApp chat exports for benchmarks.
+
+Run from the repository root:
+
+    python benchmarks/generate_chat.py out.txt --lines 1000000
+
+Messages use the ``dd-mm-YYYY HH:MM - Person: message`` format of the real
+export. A share of them are ``<Video note omitted>`` messages, mostly sent
+on Wednesdays, and a share span several lines.
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+WORDS = np.array(["waffle", "woensdag", "haha", "ja", "nee", "morgen",
+                  "vanavond", "atje", "top", "echt", "wie", "komt",
+                  "ik", "jij", "we", "gezellig", "te", "laat", "sorry"])
+VIDEO_NOTE = "<Video note omitted>"
+
+
+def _sentence_pool(rng, size=2000):
+    # Short random sentences, messages are drawn from this pool
+    lengths = rng.integers(1, 8, size)
+    return np.array([" ".join(WORDS[rng.integers(0, len(WORDS), length)])
+                     for length in lengths], dtype=object)
+
+
+def generate_chat(file, persons=8, years=4, messages_per_day=30,
+                  video_note_share=0.02, multiline_share=0.05,
+                  start="2021-10-01", seed=0, chunk_size=200_000):
+    """Write a synthetic export to a path or text file object.
+
+    Returns the number of lines written.
+    """
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp(start)
+    n_minutes = int(years * 365 * 24 * 60)
+    n_messages = max(1, int(years * 365 * messages_per_day))
+    names = np.array([f"Person {i + 1}" for i in range(persons)])
+
+    # Sorted message times, video notes snapped to a week's Wednesday
+    minutes = np.sort(rng.integers(0, n_minutes, n_messages))
+    is_video = rng.random(n_messages) < video_note_share
+    first_wednesday = (2 - start.dayofweek) % 7
+    week = (minutes // (24 * 60) - first_wednesday) // 7
+    on_wednesday = rng.random(n_messages) < 0.8
+    day = np.where(on_wednesday, first_wednesday + week * 7,
+                   minutes // (24 * 60))
+    minutes = np.where(is_video & (day >= 0),
+                       day * 24 * 60 + minutes % (24 * 60), minutes)
+    order = np.argsort(minutes, kind="stable")
+    minutes, is_video = minutes[order], is_video[order]
+
+    is_multiline = ~is_video & (rng.random(n_messages) < multiline_share)
+    pool = _sentence_pool(rng)
+
+    own_file = isinstance(file, str)
+    f = open(file, "w", encoding="utf-8") if own_file else file
+    n_lines = 0
+    try:
+        for offset in range(0, n_messages, chunk_size):
+            chunk = slice(offset, offset + chunk_size)
+            n = len(minutes[chunk])
+            # Format every distinct minute once
+            unique, inverse = np.unique(minutes[chunk], return_inverse=True)
+            formatted = (start + pd.to_timedelta(unique, unit="min")
+                         ).strftime("%d-%m-%Y %H:%M").to_numpy(dtype=object)
+            timestamps = formatted[inverse]
+
+            text = pool[rng.integers(0, len(pool), n)]
+            text = np.where(is_video[chunk], VIDEO_NOTE, text)
+            second = pool[rng.integers(0, len(pool), n)]
+            text = np.where(is_multiline[chunk], text + "\n" + second, text)
+            person = names.astype(object)[rng.integers(0, persons, n)]
+
+            lines = timestamps + " - " + person + ": " + text
+            block = "\n".join(lines) + "\n"
+            f.write(block)
+            n_lines += block.count("\n")
+    finally:
+        if own_file:
+            f.close()
+    return n_lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("output")
+    parser.add_argument("--persons", type=int, default=8)
+    parser.add_argument("--years", type=float, default=4)
+    parser.add_argument("--messages-per-day", type=float, default=30)
+    parser.add_argument("--lines", type=int, default=None,
+                        help="approximate number of lines, overrides the rate")
+    parser.add_argument("--video-note-share", type=float, default=0.02)
+    parser.add_argument("--multiline-share", type=float, default=0.05)
+    parser.add_argument("--start", default="2021-10-01")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rate = args.messages_per_day
+    if args.lines:
+        rate = args.lines / (1 + args.multiline_share) / (args.years * 365)
+
+    n_lines = generate_chat(args.output, persons=args.persons,
+                            years=args.years, messages_per_day=rate,
+                            video_note_share=args.video_note_share,
+                            multiline_share=args.multiline_share,
+                            start=args.start, seed=args.seed)
+    print(f"{n_lines} lines written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
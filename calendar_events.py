@@ -0,0 +1,124 @@
+import datetime
+import threading
+
+import pandas as pd
+
+from weeks import week_calendar
+
+
+DEFAULT_COLOR = "#9E9E9E"
+
+
+def _month_key(dates):
+    # Integer month number of datetime values, year * 12 + month - 1
+    return (dates.dt.year * 12 + dates.dt.month - 1).to_numpy()
+
+
+def view_range(month, first_day=1):
+    """First and last day shown by the month grid, ``first_day`` 1 is Monday.
+
+    ``month`` is any date in the month. The grid always shows six weeks, and
+    the week and day views show a part of it, so this range covers every
+    view of the month.
+    """
+    first = datetime.date(month.year, month.month, 1)
+    # FullCalendar counts days from Sunday, isoweekday from Monday
+    start = first - datetime.timedelta(days=(first.isoweekday() - first_day) % 7)
+    return start, start + datetime.timedelta(days=6 * 7 - 1)
+
+
+class CalendarEvents:
+    """FullCalendar events for the waffles, missed weeks and adjes.
+
+    Events are built per month on first request and kept, so a page only
+    ships the months it shows. One instance belongs to one version of the
+    data, it is safe to share between sessions.
+    """
+
+    def __init__(self, events, drinks_done, colors, start_date, end_date=None):
+        if end_date is None:
+            end_date = datetime.date.today()
+        self.colors = colors
+        self._months = {}
+        self._lock = threading.Lock()
+
+        # A week is late when the person sent nothing on Wednesday
+        events = events[["timestamp", "person", "day_nr", "week"]]
+        events = events[events["timestamp"] >= pd.Timestamp(start_date)]
+        on_wednesday = events["day_nr"] == 2
+        sent_wednesday = pd.MultiIndex.from_arrays(
+            [events.loc[on_wednesday, "week"],
+             events.loc[on_wednesday, "person"].astype(object)])
+        keys = pd.MultiIndex.from_arrays([events["week"],
+                                          events["person"].astype(object)])
+        kind = pd.Series("extra", index=events.index)
+        kind[on_wednesday.to_numpy()] = "on_time"
+        kind[(~on_wednesday & ~keys.isin(sent_wednesday)).to_numpy()] = "late"
+        self._waffles = events.assign(kind=kind,
+                                      month=_month_key(events["timestamp"]))
+
+        # Wednesdays without any video of a person that week
+        weeks = week_calendar(start_date, end_date).weeks(start_date, end_date)
+        grid = pd.MultiIndex.from_product([weeks["week"], list(colors)],
+                                          names=["week", "person"])
+        sent = pd.MultiIndex.from_arrays([events["week"].astype("int64"),
+                                          events["person"].astype(object)])
+        missed = grid[~grid.isin(sent)].to_frame(index=False)
+        missed["date"] = missed["week"].map(
+            weeks.set_index("week")["wednesday"])
+        self._missed = missed.assign(month=_month_key(missed["date"]))
+
+        dates = pd.to_datetime(drinks_done["datum"], format="%d-%m-%Y",
+                               errors="coerce")
+        drinks = pd.DataFrame({"date": dates,
+                               "person": drinks_done["name"].to_numpy(),
+                               "drinks": drinks_done["drinks_done"].to_numpy()})
+        drinks = drinks[drinks["date"].notna() & (drinks["drinks"] != 0)]
+        self._drinks = drinks.assign(month=_month_key(drinks["date"]))
+
+    def _color(self, person):
+        return self.colors.get(person) or DEFAULT_COLOR
+
+    def _build_month(self, key):
+        result = []
+        for row in self._waffles[self._waffles["month"] == key].itertuples():
+            title = {"on_time": "🧇", "late": "🧇 te laat",
+                     "extra": "🧇 extra"}[row.kind]
+            result.append({"title": f"{row.person} {title}",
+                           "start": row.timestamp.isoformat(),
+                           "color": self._color(row.person)})
+        for row in self._missed[self._missed["month"] == key].itertuples():
+            result.append({"title": f"{row.person} gemist",
+                           "start": row.date.date().isoformat(),
+                           "allDay": True,
+                           "color": self._color(row.person),
+                           "display": "list-item"})
+        for row in self._drinks[self._drinks["month"] == key].itertuples():
+            # Negative entries are adjes done, positive ones extra straf
+            label = "gedaan" if row.drinks < 0 else "straf"
+            result.append({"title": f"{row.person} {abs(row.drinks):.0f} "
+                                    f"atjes {label}",
+                           "start": row.date.date().isoformat(),
+                           "allDay": True,
+                           "color": self._color(row.person)})
+        return result
+
+    def month(self, year, month):
+        """Events of one calendar month, built once."""
+        key = year * 12 + month - 1
+        with self._lock:
+            if key not in self._months:
+                self._months[key] = self._build_month(key)
+            return self._months[key]
+
+    def between(self, start, end):
+        """Events on the days from start up to and including end."""
+        result = []
+        month = datetime.date(start.year, start.month, 1)
+        while month <= end:
+            for event in self.month(month.year, month.month):
+                day = datetime.date.fromisoformat(event["start"][:10])
+                if start <= day <= end:
+                    result.append(event)
+            month = (pd.Timestamp(month) + pd.offsets.MonthBegin(1)).date()
+        return result
@@ -0,0 +1,160 @@
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from event_store import SHEET_FORMAT
+from figure_cache import prefix_fingerprint, row_hashes
+
+
+# Timestamp formats seen in the score worksheet, the first one is canonical
+FORMATS = [SHEET_FORMAT, "%d-%m-%Y %H:%M", "%d/%m/%Y %H:%M:%S",
+           "%d/%m/%Y %H:%M", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M"]
+
+
+def canonical_minutes(timestamps):
+    """Timestamps as int64 minutes since the epoch, -1 when unparseable.
+
+    Accepts datetimes as well as strings in any of FORMATS, so a freshly
+    parsed chat and the stored sheet give the same key for the same minute.
+    """
+    timestamps = pd.Series(timestamps).reset_index(drop=True)
+    if pd.api.types.is_datetime64_any_dtype(timestamps):
+        parsed = timestamps
+    else:
+        text = timestamps.astype(str).str.strip()
+        parsed = pd.Series(pd.NaT, index=text.index, dtype="datetime64[ns]")
+        for fmt in FORMATS:
+            missing = parsed.isna()
+            if not missing.any():
+                break
+            parsed[missing] = pd.to_datetime(text[missing], format=fmt,
+                                             errors="coerce")
+    minutes = parsed.to_numpy(dtype="datetime64[m]")
+    return np.where(np.isnat(minutes), -1, minutes.astype("int64"))
+
+
+class DedupIndex:
+    """Hash index of the (timestamp, person) keys in the score worksheet.
+
+    Keys are the timestamp in whole minutes and the stripped person name.
+    The index remembers how each key is written in the sheet, so an upload
+    can be split into new events, events already in the sheet and events
+    that are in the sheet but written differently (conflicting). ``sync``
+    only adds the rows appended to the sheet since the last call and starts
+    over when any processed row changed, like aggregates.WeeklyAggregate.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._reset()
+        if path is not None:
+            self._load()
+
+    def _reset(self):
+        self._keys = {}
+        self._synced = [0, None]
+
+    def _load(self):
+        meta_path = self.path + ".json"
+        if not (os.path.exists(self.path) and os.path.exists(meta_path)):
+            return
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                synced = json.load(f)
+            stored = pd.read_parquet(self.path)
+        except (OSError, ValueError):
+            return
+        self._keys = dict(zip(zip(stored["minute"].tolist(),
+                                  stored["person"].tolist()),
+                              stored["timestamp"].tolist()))
+        self._synced = synced
+
+    def _save(self):
+        if self.path is None:
+            return
+        keys = list(self._keys)
+        stored = pd.DataFrame({
+            "minute": np.array([k[0] for k in keys], dtype="int64"),
+            "person": [k[1] for k in keys],
+            "timestamp": list(self._keys.values()),
+        })
+        stored.to_parquet(self.path + ".tmp", index=False)
+        os.replace(self.path + ".tmp", self.path)
+        with open(self.path + ".json.tmp", "w", encoding="utf-8") as f:
+            json.dump(self._synced, f)
+        os.replace(self.path + ".json.tmp", self.path + ".json")
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _add(self, df):
+        minutes = canonical_minutes(df["timestamp"])
+        persons = df["person"].astype(str).str.strip().tolist()
+        for key, raw in zip(zip(minutes.tolist(), persons),
+                            df["timestamp"].astype(str).tolist()):
+            self._keys.setdefault(key, raw)
+
+    def reset(self):
+        """Forget all keys, the next sync rebuilds from the worksheet."""
+        with self._lock:
+            self._reset()
+            self._save()
+
+    def sync(self, stored):
+        """Add the rows appended to the worksheet since the last sync."""
+        with self._lock:
+            n_rows, digest = self._synced
+            hashes = row_hashes(stored)
+            if n_rows > len(stored) or (
+                    n_rows and prefix_fingerprint(hashes, n_rows) != digest):
+                # Rows were removed or changed, start over
+                self._reset()
+                n_rows = 0
+            new = stored.iloc[n_rows:]
+            if new.empty:
+                return
+            self._add(new)
+            self._synced = [len(stored), prefix_fingerprint(hashes, len(hashes))]
+            self._save()
+
+    def split(self, df):
+        """New rows of df and the number of rows per outcome.
+
+        ``df`` has a ``timestamp`` (datetime or string) and ``person``
+        column. The outcomes are "new", "known", "conflicting" (in the sheet
+        with another timestamp format) and "invalid" (unparseable
+        timestamp). Rows that repeat within df count as known. Costs a
+        lookup per row of df, whatever the size of the sheet.
+        """
+        minutes = canonical_minutes(df["timestamp"])
+        persons = df["person"].astype(str).str.strip().tolist()
+        canonical = pd.to_datetime(minutes, unit="m") \
+            .strftime(SHEET_FORMAT).tolist()
+
+        is_new = []
+        report = {"new": 0, "known": 0, "conflicting": 0, "invalid": 0}
+        seen = set()
+        with self._lock:
+            for key, text in zip(zip(minutes.tolist(), persons), canonical):
+                stored = self._keys.get(key)
+                if key[0] == -1:
+                    outcome = "invalid"
+                elif key in seen:
+                    outcome = "known"
+                elif stored is None:
+                    outcome = "new"
+                elif stored == text:
+                    outcome = "known"
+                else:
+                    # Same event, written differently in the sheet
+                    outcome = "conflicting"
+                seen.add(key)
+                report[outcome] += 1
+                is_new.append(outcome == "new")
+
+        new = df[np.array(is_new, dtype=bool)]
+        return new, report
@@ -0,0 +1,80 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from rankings import WeekRanking
+from weeks import week_key
+
+
+# Timestamp format of the score worksheet
+SHEET_FORMAT = "%d-%m-%Y %H:%M:%S"
+
+
+def _read_only(values):
+    values = np.asarray(values)
+    values.flags.writeable = False
+    return values
+
+
+class EventStore:
+    """Typed copy of the score worksheet, built once per data version.
+
+    ``events`` has one row per video note in sheet order with
+
+    - ``timestamp``: datetime64
+    - ``person``: categorical
+    - ``day_nr``: day of the week, Monday is 0
+    - ``week``: integer ISO week key ``iso_year * 100 + iso_week``
+    - ``date``: the timestamp at midnight
+    - ``seconds``: time of day in seconds
+
+    The frame is shared by all sessions and returned as is. Its arrays are
+    not writeable, so changing a value raises instead of changing the data
+    of every session. A caller that adds columns takes a copy first.
+    """
+
+    def __init__(self, timeseries):
+        timestamps = pd.to_datetime(timeseries["timestamp"], format=SHEET_FORMAT)
+        date = timestamps.dt.normalize()
+        person = pd.Categorical(timeseries["person"])
+
+        # copy=False keeps one block per column, on the read-only arrays
+        self._events = pd.DataFrame({
+            "timestamp": _read_only(timestamps.to_numpy()),
+            "person": pd.Categorical.from_codes(_read_only(person.codes),
+                                                person.categories),
+            "day_nr": _read_only(timestamps.dt.dayofweek.to_numpy(dtype="int8")),
+            "week": _read_only(week_key(timestamps).astype("int32")),
+            "date": _read_only(date.to_numpy()),
+            "seconds": _read_only((timestamps - date).dt.total_seconds()
+                                  .to_numpy(dtype="int32")),
+        }, copy=False)
+        self._ranking = None
+        self._lock = threading.Lock()
+
+    @property
+    def events(self):
+        return self._events
+
+    @property
+    def ranking(self):
+        """WeekRanking of the events, built on first use."""
+        with self._lock:
+            if self._ranking is None:
+                self._ranking = WeekRanking(self._events)
+            return self._ranking
+
+    @property
+    def persons(self):
+        return self._events["person"].cat.categories
+
+    def __len__(self):
+        return len(self._events)
+
+    def max_timestamp(self):
+        return self._events["timestamp"].max()
+
+    def memory_usage(self):
+        """Bytes used by the events frame."""
+        return int(self._events.memory_usage(deep=True).sum())
@@ -0,0 +1,106 @@
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+
+def fingerprint(*objs):
+    """Content hash of frames, series and plain values."""
+    digest = hashlib.sha256()
+    for obj in objs:
+        if isinstance(obj, (pd.DataFrame, pd.Series)):
+            digest.update(pd.util.hash_pandas_object(obj, index=True)
+                          .to_numpy().tobytes())
+            names = obj.columns if isinstance(obj, pd.DataFrame) else [obj.name]
+            digest.update(repr((list(names), repr(obj.dtypes))).encode())
+        else:
+            digest.update(repr(obj).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def row_hashes(df):
+    """One uint64 content hash per row of a worksheet frame.
+
+    Numbers are hashed as floats, datetimes as they are and everything else
+    as text, so the same sheet read as int or float, or back from parquet,
+    gives the same hashes.
+    """
+    columns = {}
+    for name, column in df.items():
+        if pd.api.types.is_datetime64_any_dtype(column):
+            columns[name] = column
+        elif (pd.api.types.is_numeric_dtype(column)
+                and not pd.api.types.is_bool_dtype(column)):
+            columns[name] = column.astype("float64")
+        else:
+            columns[name] = column.astype(str)
+    # Sheet values are mostly unique, hashing them directly beats
+    # factorizing them first
+    return pd.util.hash_pandas_object(pd.DataFrame(columns, index=df.index),
+                                      index=False, categorize=False).to_numpy()
+
+
+def prefix_fingerprint(hashes, n_rows):
+    """Hash of the first n_rows row hashes, see row_hashes."""
+    return hashlib.sha256(hashes[:n_rows].tobytes()).hexdigest()
+
+
+def row_fingerprint(df, position):
+    """Hash of one row of a worksheet frame, hashed like row_hashes."""
+    return prefix_fingerprint(row_hashes(df.iloc[position:position + 1]), 1)
+
+
+def figure_to_svg(fig):
+    """Serialize a matplotlib Figure to an SVG string.
+
+    The figure is made with matplotlib.figure.Figure, not through pyplot,
+    so there is nothing to close and it can be drawn on any thread.
+    """
+    buffer = io.StringIO()
+    fig.savefig(buffer, format="svg", bbox_inches="tight",
+                facecolor=fig.get_facecolor())
+    return buffer.getvalue()
+
+
+def figure_to_png(fig, dpi=150):
+    """Serialize a matplotlib Figure to PNG bytes, see figure_to_svg."""
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=dpi, bbox_inches="tight",
+                facecolor=fig.get_facecolor())
+    return buffer.getvalue()
+
+
+class FigureCache:
+    """Rendered charts keyed on a fingerprint of their input, LRU bounded."""
+
+    def __init__(self, max_entries=32):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_create(self, key, build):
+        """Return the cached value for key, or build and store it."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        # Build outside the lock, matplotlib rendering is slow
+        value = build()
+
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
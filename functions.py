@@ -1,25 +1,75 @@
 import pandas as pd
-import numpy as np
 import re
-import datetime
-import json
 import io
-import requests
-from bs4 import BeautifulSoup
+import os
 import base64
+import functools
 import streamlit as st
 
+import perf
+from archive import is_archive, open_chat_bytes
+from perf import timed
+from parallel import compile_pattern, match_lines, parse_parallel
+from storage import (WORKSHEETS, GSheetsBackend, SQLiteBackend, SheetCache,
+                     WriteBehindQueue)
+from aggregates import WeeklyAggregate
+from dedup import DedupIndex
+from event_store import EventStore
+from calendar_events import CalendarEvents
+from figure_cache import FigureCache, figure_to_svg, fingerprint
+from snapshot import DashboardSnapshot, SnapshotPublisher
+import weeks
+from thumbnails import ThumbnailCache
+
+
+def _open_chat(file):
+    # Open a path or an uploaded binary buffer as utf-8 text, for a zip
+    # export only the chat text member is decompressed
+    return io.TextIOWrapper(open_chat_bytes(file), encoding="utf-8")
+
+
+def _read_chat_text(file):
+    # Read the whole export at once, with the same newline handling as
+    # iterating over a text-mode file
+    with _open_chat(file) as f:
+        return f.read()
 
-def load_chat(file, pattern):
-    # Store records temporarily in a list
-    records = []
 
-    if isinstance(file, str):
-        f = open(file, encoding="utf-8")
+@timed
+def load_chat(file, pattern, workers=1):
+    """Parse a WhatsApp export into a timestamp/person/message DataFrame.
+
+    The whole buffer is matched in one multiline regex pass instead of line by
+    line. Lines that don't match the pattern (continuations of multi-line
+    messages) are dropped, so the pattern must not match across newlines.
+    With more than one worker, large exports are split at line starts and
+    parsed in a process pool, see parallel.parse_parallel.
+    """
+    regex = compile_pattern(pattern)
+    if workers == 1:
+        records = match_lines(_read_chat_text(file), regex)
     else:
-        f = io.TextIOWrapper(file, encoding="utf-8")
+        if is_archive(file):
+            # The workers need the plain text to split it
+            with open_chat_bytes(file) as f:
+                file = io.BytesIO(f.read())
+        records = parse_parallel(file, pattern, workers=workers)
+
+    # Handle cases with or without person
+    if regex.groups == 3:
+        df = pd.DataFrame(records, columns=["timestamp", "person", "message"])
+    else:  # if person is missing (system messages)
+        df = pd.DataFrame(records, columns=["timestamp", "message"])
+        df.insert(1, "person", None)
+
+    return df
 
-    with f:
+
+def _load_chat_loop(file, pattern):
+    # Reference line-by-line parser, kept for benchmarks and parity checks
+    records = []
+
+    with _open_chat(file) as f:
         for line in f:
             line = line.strip()
             matched = re.match(pattern, line)
@@ -34,12 +84,12 @@ def load_chat(file, pattern):
 
                 records.append([timestamp, person, message])
 
-    # Create DataFrame
     df = pd.DataFrame(records, columns=["timestamp", "person", "message"])
 
     return df
 
 
+@timed
 def find_chat_object(df, text_obj, start_date=None):
     df["timestamp"] = pd.to_datetime(df["timestamp"], format="%d-%m-%Y %H:%M")
     if start_date:
@@ -50,46 +100,381 @@ def find_chat_object(df, text_obj, start_date=None):
     else:
         return filterd_df.reset_index(drop=True)
 
-def count_wednesdays(start_date, end_date=None):
-    if end_date is None:
-        end_date = datetime.date.today()
+@timed
+def load_chat_objects(file, pattern, text_obj, start_date=None,
+                      chunk_size=1 << 20):
+    """Fused version of load_chat + find_chat_object.
+
+    The export is streamed in chunks and only lines containing text_obj are
+    parsed, so memory scales with the number of matching messages instead of
+    the length of the chat. Returns an empty frame when nothing matches.
+    """
+    regex = re.compile(pattern)
+    # Cheap prefilter on whole lines, the exact check is done on the message
+    marker = re.compile(r"^.*(?:%s).*$" % text_obj,
+                        re.MULTILINE | re.IGNORECASE)
+
+    records = []
+    carry = ""
+    with _open_chat(file) as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+
+            # Only scan complete lines, keep the rest for the next chunk
+            block, sep, carry_next = (carry + chunk).rpartition("\n")
+            if not sep:
+                carry = carry_next
+                continue
+            carry = carry_next
+
+            for line in marker.findall(block):
+                matched = regex.match(line.strip())
+                if matched:
+                    records.append(matched.groups())
 
-    # Ensure start_date <= end_date
-    if start_date > end_date:
-        return 0
+        for line in marker.findall(carry):
+            matched = regex.match(line.strip())
+            if matched:
+                records.append(matched.groups())
 
-    # Find the weekday of the start date (Monday=0, ..., Sunday=6)
-    start_weekday = start_date.weekday()
+    # Parse and cut only the surviving messages
+    df = pd.DataFrame(records, columns=["timestamp", "person", "message"])
+    df["timestamp"] = pd.to_datetime(df["timestamp"], format="%d-%m-%Y %H:%M")
+    df = df[df["message"].str.contains(text_obj, case=False, na=False)]
+    if start_date:
+        df = df[df["timestamp"] >= pd.to_datetime(start_date)]
 
-    # Days until next Wednesday from start_date
-    days_to_next_wed = (2 - start_weekday) % 7
+    return df.reset_index(drop=True)
 
-    # First Wednesday on or after start_date
-    first_wed = start_date + datetime.timedelta(days=days_to_next_wed)
 
-    # Total days between first Wednesday and end_date
-    total_days = (end_date - first_wed).days
+count_wednesdays = timed(weeks.count_wednesdays)
 
-    if total_days < 0:
-        # start_date itself is after end_date
-        return 0
+@functools.lru_cache(maxsize=1)
+def chart_style(path="matplotlib_style.mpstyle"):
+    """The values of the matplotlib style file, read once."""
+    import matplotlib
 
-    # Number of Wednesdays = 1 (first_wed) + every 7 days
-    num_wednesdays = 1 + total_days // 7
-    return num_wednesdays
+    return dict(matplotlib.rc_params_from_file(path,
+                                               use_default_template=False))
 
-def add_hbar(ax, y_label, value, color, label, left=0, alpha=1.0):
+def add_hbar(ax, y_label, value, color, label, left=0, alpha=1.0,
+             text_color=None):
     bar = ax.barh(y_label, value, color=color, label=label, left=left, alpha=alpha)
     if value > 0:
-        ax.bar_label(bar, label_type='center')
+        ax.bar_label(bar, label_type='center', color=text_color)
     return bar
 
+@timed
+def punishment_chart(df_scores):
+    """Horizontal "Straf Atjes" bars for every person in df_scores.
+
+    Drawn on a bare Figure with the values of the style file passed to the
+    artists: snapshots are built on background threads, and pyplot and
+    plt.style.context keep global state.
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.ticker import MaxNLocator
+
+    # --- Load matplotlib stile ---
+    style = chart_style()
+    text_color = style["text.color"]
+
+    fig_bar = Figure(figsize=(6, 3), dpi=style["figure.dpi"],
+                     facecolor=style["figure.facecolor"])
+    axs_bar = fig_bar.add_subplot(1, 1, 1)
+    axs_bar.set_facecolor(style["axes.facecolor"])
+    for spine in axs_bar.spines.values():
+        spine.set_edgecolor(style["axes.edgecolor"])
+        spine.set_linewidth(style["axes.linewidth"])
+    axs_bar.tick_params(axis="x", colors=style["xtick.color"])
+    axs_bar.tick_params(axis="y", colors=style["ytick.color"])
+
+    for row in df_scores.itertuples():
+        add_hbar(axs_bar, row.Index, row.missed, "#FF4B4B", "Gemist",
+                 text_color=text_color)
+        add_hbar(axs_bar, row.Index, row.late, "#FF904B", "Te laat",
+                 left=row.missed, text_color=text_color)
+        add_hbar(axs_bar, row.Index, -row.bonus, "green", "Bonus",
+                 text_color=text_color)
+
+    axs_bar.set_xlabel("Straf Atjes", color=style["axes.labelcolor"])
+    axs_bar.xaxis.set_major_locator(MaxNLocator(integer=True))
+    xmax = axs_bar.get_xlim()[1]
+    xmin = axs_bar.get_xlim()[0]
+    axs_bar.set_xlim(left=xmin,
+                     right=xmax * 1.1)
+
+    handles, labels = axs_bar.get_legend_handles_labels()
+    unique_labels = dict(zip(labels, handles))
+    axs_bar.legend(
+        unique_labels.values(),
+        unique_labels.keys(),
+        loc="upper center",
+        bbox_to_anchor=(0.5, -0.2),
+        ncol=len(unique_labels),
+        facecolor=style["axes.facecolor"],
+        labelcolor=text_color,
+        )
+
+    for container in axs_bar.containers:
+        value = int(container.datavalues[0])
+
+        for bar, label in zip(container, labels):
+            # Put label inside if bar is large enough
+            if (value) < 0:
+                axs_bar.text(
+                    bar.get_x() + value / 2,
+                    bar.get_y() + bar.get_height() / 2,
+                    abs(value),
+                    ha='center',
+                    va='center',
+                    color='white'
+                )
+
+    axs_bar.vlines(x=0, ymin=-1, ymax=8, color="#CECCCC", linewidth=2, linestyles="--")
+    return fig_bar
+
+@timed
+def cumulative_chart(df_cumulative):
+    """Plotly lines of the cumulative on time waffles per person."""
+    import plotly.graph_objects as go
+
+    fig_ts = go.Figure()
+    for name in df_cumulative.columns:
+        fig_ts.add_trace(
+            go.Scatter(
+                x=df_cumulative.index,
+                y=df_cumulative[name],
+                mode="lines+markers",
+                name=name
+            )
+        )
+
+    fig_ts.update_layout(
+        width=700,
+        dragmode="pan",
+        xaxis=dict(
+            rangeslider=dict(visible=True)
+        ),
+        legend=dict(
+            x=1,
+            y=1,
+            xanchor="left",
+            yanchor="top"
+        )
+    )
+
+    fig_ts.update_xaxes(tickformat="%Y-%V")
+    fig_ts.update_yaxes(fixedrange=False)
+    return fig_ts
+
 def render_svg(svg):
-    """Renders the given svg string."""
+    """Renders the given svg string at the width of its column."""
     b64 = base64.b64encode(svg.encode('utf-8')).decode("utf-8")
-    html = r'<img src="data:image/svg+xml;base64,%s"/>' % b64
+    # The viewBox of the svg keeps the aspect ratio when it's scaled
+    html = (r'<img src="data:image/svg+xml;base64,%s" '
+            r'style="width:100%%; height:auto;"/>' % b64)
     st.write(html, unsafe_allow_html=True)
 
+def open_backend(connection="gsheets", worksheets=WORKSHEETS):
+    """Storage backend picked by the ``storage`` secret.
+
+    "gsheets" (default) uses the Streamlit GSheets connection named
+    ``connection``, "sqlite" a local file at ``sqlite_path`` that needs no
+    Google account, with tables for ``worksheets``.
+    """
+    if st.secrets.get("storage", "gsheets") == "sqlite":
+        return SQLiteBackend(st.secrets.get("sqlite_path", "waffles.db"),
+                             worksheets=worksheets)
+
+    from streamlit_gsheets import GSheetsConnection
+
+    return GSheetsBackend(st.connection(connection, type=GSheetsConnection),
+                          name=f"gsheets:{connection}")
+
+@st.cache_resource
+def get_sheet_cache():
+    """Worksheet cache shared by all sessions, see storage.SheetCache."""
+    backend = open_backend()
+    if isinstance(backend, SQLiteBackend):
+        # At the size of the score sheet reading the table is faster than
+        # the version query plus the parquet copy (bench_storage)
+        return SheetCache(backend, passthrough=True)
+    return SheetCache(backend, ttl=st.secrets.get("sheet_cache_ttl", 300))
+
+@st.cache_resource
+def get_write_queue():
+    """Background writer for the worksheets, see storage.WriteBehindQueue."""
+    return WriteBehindQueue(get_sheet_cache(),
+                            debounce=st.secrets.get("write_debounce", 2.0))
+
+@st.cache_resource
+def get_weekly_aggregate():
+    """Weekly totals shared by all sessions, see aggregates.WeeklyAggregate."""
+    return WeeklyAggregate(os.path.join(get_sheet_cache().cache_dir,
+                                        "weekly_aggregate.parquet"))
+
+@st.cache_resource
+def get_dedup_index():
+    """Stored video note keys shared by all sessions, see dedup.DedupIndex."""
+    return DedupIndex(os.path.join(get_sheet_cache().cache_dir,
+                                   "dedup_index.parquet"))
+
+@st.cache_resource(max_entries=4)
+def get_event_store(version, _timeseries):
+    """Typed events shared by all sessions, one per version of the sheet."""
+    return EventStore(_timeseries)
+
+@st.cache_resource(max_entries=4)
+def get_calendar_events(version, _store, _drinks_done, _colors, start_date):
+    """Calendar events shared by all sessions, built per month on demand."""
+    return CalendarEvents(_store.events, _drinks_done, _colors, start_date)
+
+@st.cache_resource
+def get_figure_cache():
+    """Rendered charts shared by all sessions, see figure_cache.FigureCache."""
+    return FigureCache(max_entries=st.secrets.get("figure_cache_size", 32))
+
+def build_snapshot(version, store, drinks_done, persons, start_date,
+                   aggregate, figures):
+    """DashboardSnapshot with both charts rendered through the figure cache."""
+    def render_bars(df_bars):
+        return figures.get_or_create(
+            ("straf_atjes", fingerprint(df_bars)),
+            lambda: figure_to_svg(punishment_chart(df_bars)))
+
+    def render_timeseries(df_cumulative):
+        return figures.get_or_create(
+            ("timeseries", fingerprint(df_cumulative)),
+            lambda: cumulative_chart(df_cumulative).to_json())
+
+    return DashboardSnapshot(version, store, drinks_done, aggregate, persons,
+                             start_date, render_bars, render_timeseries)
+
+@st.cache_resource(max_entries=4)
+def get_timeseries_figure(version, _payload):
+    """Plotly figure of a snapshot's timeseries chart, parsed once per version.
+
+    Only read by st.plotly_chart, so all sessions can share it.
+    """
+    import plotly.io as pio
+
+    return pio.from_json(_payload)
+
+@st.cache_resource
+def get_snapshots():
+    """Dashboard snapshots shared by all sessions, see snapshot.SnapshotPublisher."""
+    return SnapshotPublisher(build_snapshot)
+
+def dashboard_snapshot(version, store, drinks_done, persons, start_date,
+                       wait=False):
+    """Snapshot of this data version, the previous one while it is built."""
+    # The shared resources are looked up here, the build runs without a
+    # script context
+    return get_snapshots().get(version, store, drinks_done, persons,
+                               start_date, get_weekly_aggregate(),
+                               get_figure_cache(), wait=wait)
+
+def perf_panel_enabled():
+    """Performance panel switch, the perf_panel secret or ?perf=1."""
+    return (bool(st.secrets.get("perf_panel", False))
+            or st.query_params.get("perf") == "1")
+
+def start_perf(run):
+    """Time this rerun when the panel is on, profile it when asked for."""
+    if not perf_panel_enabled():
+        return
+    perf.enable_logging()
+    perf.start_run(run)
+
+    # A profiler left running by an interrupted rerun
+    stale = st.session_state.pop("perf_profiler", None)
+    if stale is not None:
+        stale.stop()
+    if st.session_state.pop("perf_profile_next", False):
+        st.session_state.perf_profiler = perf.Profile().start()
+
+def timed_fragment(section, **kwargs):
+    """st.fragment that is timed as the perf section ``section``.
+
+    In a full rerun it is a section of the page like any other. When only
+    the fragment reruns, that rerun is recorded on its own and listed in
+    the performance panel under "Fragment reruns".
+    """
+    def decorate(func):
+        @functools.wraps(func)
+        def run(*args, **kw):
+            if perf.recording() or not perf_panel_enabled():
+                perf.section(section)
+                return func(*args, **kw)
+
+            recorder = perf.start_run(f"fragment {section}")
+            perf.section(section)
+            try:
+                return func(*args, **kw)
+            finally:
+                perf.stop_run()
+                history = st.session_state.setdefault("perf_fragments", [])
+                history.extend(record for record in recorder.spans
+                               if record["depth"] == 0)
+                del history[:-50]
+        return st.fragment(run, **kwargs)
+    return decorate
+
+def render_perf_panel():
+    """Sidebar panel with the spans of this rerun and the last profile."""
+    recorder = perf.stop_run()
+    if recorder is None:
+        return
+    profiler = st.session_state.pop("perf_profiler", None)
+    if profiler is not None:
+        profiler.stop()
+        st.session_state.perf_profile = {"run": recorder.run,
+                                         "dump": profiler.dump(),
+                                         "summary": profiler.summary()}
+
+    with st.sidebar:
+        st.header("Performance")
+        spans = pd.DataFrame(recorder.spans, columns=["span", "depth", "ms"])
+        spans["span"] = ["· " * d + name for name, d
+                         in zip(spans["span"], spans["depth"])]
+        st.dataframe(spans[["span", "ms"]], hide_index=True)
+        st.caption(f"Totaal: {spans.loc[spans.depth == 0, 'ms'].sum():.0f} ms")
+
+        fragments = st.session_state.get("perf_fragments")
+        if fragments:
+            st.subheader("Fragment reruns")
+            st.dataframe(pd.DataFrame(fragments)[["span", "ms"]].iloc[::-1],
+                         hide_index=True)
+
+        if st.button("Profiel volgende rerun"):
+            st.session_state.perf_profile_next = True
+            st.rerun()
+
+        profile = st.session_state.get("perf_profile")
+        if profile is not None:
+            st.download_button("Download profiel", data=profile["dump"],
+                               file_name=f"{profile['run']}.prof",
+                               mime="application/octet-stream")
+            with st.expander("Profiel"):
+                st.code(profile["summary"])
+
+@st.cache_resource
+def get_thumbnails():
+    """Profile picture thumbnails shared by all sessions."""
+    return ThumbnailCache(
+        max_bytes=st.secrets.get("thumbnail_cache_mb", 50) << 20,
+        retry_after=st.secrets.get("thumbnail_retry_minutes", 10) * 60)
+
+def thumbnail(url, width):
+    """Cached thumbnail bytes of a picture, the URL when it can't be fetched."""
+    try:
+        return get_thumbnails().get(url, width)
+    except (OSError, ValueError):
+        return url
+
 def link_to_google_sheets():
     pass
 
@@ -0,0 +1,156 @@
+import hashlib
+import io
+import json
+import os
+
+import pandas as pd
+
+from archive import open_chat_bytes
+from functions import load_chat_objects
+from perf import timed
+
+
+CHECKPOINT_FILE = "ingest_checkpoint.json"
+# Number of bytes at the start of the export used to detect re-exports
+HEAD_BYTES = 4096
+# Timestamp format of the chat export
+CHAT_FORMAT = "%d-%m-%Y %H:%M"
+
+
+def _read_bytes(file):
+    # The chat text, also when the export is a zip
+    with open_chat_bytes(file) as f:
+        return f.read()
+
+
+def _hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def make_checkpoint(data, text_obj, start_date=None, target=None,
+                    last_timestamp=None):
+    """Describe how far an export has been processed.
+
+    The checkpoint points at the end of the last line, together with hashes of
+    that line and of the start of the file so a later export can be checked
+    against it before seeking. ``target`` names the worksheet the messages
+    went to, ``last_timestamp`` is the newest message found so far.
+    """
+    body = data.rstrip(b"\r\n")
+    line_start = body.rfind(b"\n") + 1
+    if last_timestamp is not None and pd.notna(last_timestamp):
+        last_timestamp = last_timestamp.strftime(CHAT_FORMAT)
+    else:
+        last_timestamp = None
+
+    return {
+        "offset": len(body),
+        "anchor_hash": _hash(body[line_start:]),
+        "anchor_length": len(body) - line_start,
+        "head_hash": _hash(body[:HEAD_BYTES]),
+        "head_length": min(len(body), HEAD_BYTES),
+        "last_timestamp": last_timestamp,
+        "text_obj": text_obj,
+        "start_date": start_date,
+        "target": target,
+    }
+
+
+def _last_timestamp(checkpoint):
+    if checkpoint.get("last_timestamp") is None:
+        return None
+    return pd.to_datetime(checkpoint["last_timestamp"], format=CHAT_FORMAT)
+
+
+def resume_offset(data, checkpoint, text_obj, start_date=None, target=None,
+                  max_timestamp=None):
+    """Byte offset to resume parsing from, 0 when a full parse is needed.
+
+    ``max_timestamp`` is the newest message in the target worksheet. When
+    the checkpoint found newer messages, the worksheet lost rows since, or
+    is another one, and the skipped part has to be parsed again.
+    """
+    if not checkpoint:
+        return 0
+
+    # Different filter settings means the old result can't be reused
+    if (checkpoint.get("text_obj") != text_obj
+            or checkpoint.get("start_date") != start_date):
+        return 0
+
+    # The messages of the checkpoint went to another worksheet, or aren't
+    # all in this one anymore
+    if checkpoint.get("target") != target:
+        return 0
+    last_timestamp = _last_timestamp(checkpoint)
+    if last_timestamp is not None and not (
+            pd.notna(max_timestamp) and last_timestamp <= max_timestamp):
+        return 0
+
+    offset = checkpoint["offset"]
+    anchor_start = offset - checkpoint["anchor_length"]
+
+    # Truncated export
+    if offset > len(data) or anchor_start < 0:
+        return 0
+
+    # Re-exported with different history
+    if _hash(data[:checkpoint["head_length"]]) != checkpoint["head_hash"]:
+        return 0
+    if _hash(data[anchor_start:offset]) != checkpoint["anchor_hash"]:
+        return 0
+
+    # The anchor has to end on a line boundary
+    if data[offset:offset + 1] not in (b"", b"\n", b"\r"):
+        return 0
+
+    return offset
+
+
+@timed
+def load_chat_objects_incremental(file, pattern, text_obj, start_date=None,
+                                  checkpoint=None, target=None,
+                                  max_timestamp=None):
+    """Only parse the part of the export after a previous checkpoint.
+
+    Falls back to a full parse when the checkpoint doesn't match the export
+    or the target worksheet, see resume_offset. Returns the parsed messages
+    and the checkpoint for the next upload.
+    """
+    data = _read_bytes(file)
+    offset = resume_offset(data, checkpoint, text_obj, start_date, target,
+                           max_timestamp)
+
+    df = load_chat_objects(io.BytesIO(data[offset:]), pattern, text_obj,
+                           start_date=start_date)
+
+    # The newest message of this and, when resumed, the earlier uploads
+    newest = [] if df.empty else [df["timestamp"].max()]
+    if offset and _last_timestamp(checkpoint) is not None:
+        newest.append(_last_timestamp(checkpoint))
+    return df, make_checkpoint(data, text_obj, start_date, target,
+                               max(newest, default=None))
+
+
+def load_checkpoint(path=CHECKPOINT_FILE):
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        # A broken checkpoint only costs a full parse
+        return None
+
+
+def save_checkpoint(checkpoint, path=CHECKPOINT_FILE):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f, indent=4)
+    os.replace(tmp_path, path)
+
+
+def clear_checkpoint(path=CHECKPOINT_FILE):
+    """Forget the checkpoint, the next upload parses the whole export."""
+    if os.path.exists(path):
+        os.remove(path)
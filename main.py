@@ -1,15 +1,6 @@
 import streamlit as st
 import streamlit_authenticator as stauth
-import yaml
-from yaml import SafeLoader
-import copy
-from streamlit_authenticator.utilities import (CredentialsError,
-                                               ForgotError,
-                                               Hasher,
-                                               LoginError,
-                                               RegisterError,
-                                               ResetError,
-                                               UpdateError)
+from streamlit_authenticator.utilities import LoginError
 
 # --- Streamlit page config ---
 def main():
@@ -1,69 +1,52 @@
 import streamlit as st
-from streamlit_calendar import calendar
-import json
-import os
-import requests
-from PIL import Image
-from io import BytesIO
 import time
 import pandas as pd
-import matplotlib.pyplot as plt
-import matplotlib as mpl
-from matplotlib.ticker import MaxNLocator
-from svgpathtools import svg2paths
-from svgpath2mpl import parse_path
-import datetime
-import numpy as np
-import yaml
-from yaml.loader import SafeLoader
-import streamlit_authenticator as stauth
-from streamlit_gsheets import GSheetsConnection
-import copy
-import plotly.express as px
-import plotly.graph_objects as go
-
-
-from functions import load_chat, find_chat_object, count_wednesdays, add_hbar, render_svg
+
+
+import perf
+from functions import (render_svg, get_sheet_cache, get_event_store,
+                       get_weekly_aggregate,
+                       get_thumbnails, thumbnail, get_write_queue,
+                       get_dedup_index, get_snapshots, dashboard_snapshot,
+                       get_timeseries_figure, start_perf, render_perf_panel,
+                       timed_fragment)
+from archive import PATTERN, VIDEO_NOTE
+from ingest import (load_chat_objects_incremental, load_checkpoint,
+                    save_checkpoint, clear_checkpoint)
+from storage import SheetWriter
+from figure_cache import fingerprint
+from event_store import SHEET_FORMAT
 
 # --- Streamlit page config ---
 st.set_page_config(page_title="Wednesday Waffle Tracker",
                    layout="wide", page_icon=":waffle:")
 st.title("Wednesday Waffle Tracker")
-
-
-# --- Load matplotlib stile ---
-plt.style.use('matplotlib_style.mpstyle')
+start_perf("app")
 
 
 
 # --- Session state initialization ---
-conn = st.connection("gsheets", type=GSheetsConnection)
+perf.section("sheets")
+sheets = get_sheet_cache()
 if "start_date_waffles" not in st.session_state:
     st.session_state.start_date_waffles = "2025-06-11"
 
 # Update drinks_done in session state
-if "drinks_done" not in st.session_state:
-    df_adjes = conn.read(worksheet="adjes_gedaan")
-    st.session_state.drinks_done = df_adjes
+with perf.span("read adjes_gedaan"):
+    # Adjes entered in the editor count before they reach the sheet
+    df_adjes = get_write_queue().with_pending("adjes_gedaan",
+                                              sheets.read("adjes_gedaan"))
+st.session_state.drinks_done = df_adjes
 
 # Update timeseries in session state
-df_ts = conn.read(worksheet="score")
+with perf.span("read score"):
+    df_ts = sheets.read("score")
 st.session_state.timeseries = df_ts
 
-# Add total number of wednesdays to session state
-if "wednesdays" not in st.session_state:
-    # Convert string to date if needed
-    start_date_str = st.session_state.start_date_waffles
-    start_date = datetime.datetime.strptime(start_date_str, "%Y-%m-%d").date()
-    
-    if st.session_state.timeseries is not None and not st.session_state.timeseries.empty:
-        series = pd.to_datetime(st.session_state.timeseries.timestamp, format="%d-%m-%Y %H:%M:%S")
-        end_date = series.max().date()
-    else:
-        end_date = None
-        
-    st.session_state.wednesdays = count_wednesdays(start_date, 
-                                                   end_date=end_date)
+# Typed events, parsed once per version of the sheet
+with perf.span("event store"):
+    ts_version = fingerprint(df_ts)
+    store = get_event_store(ts_version, df_ts)
 
 # Add persons to session state
 if "persons" not in st.session_state:
@@ -80,6 +63,16 @@ if "persons" not in st.session_state:
     }
     st.session_state.persons = persons
 
+# Widths the profile pictures are shown at, in pixels
+RANKING_WIDTH = 300
+TILE_WIDTH = 200
+
+# Resize every picture once, fetched concurrently on a cold cache
+with perf.span("thumbnails"):
+    get_thumbnails().prefetch(
+        [person["picture_url"] for person in st.session_state.persons.values()],
+        [RANKING_WIDTH, TILE_WIDTH])
+
 
 
 # --- Sidebar for navigation ---
@@ -97,150 +90,104 @@ with st.sidebar:
     
     refresh = st.button("Refresh", type="primary")
     if refresh:
-        st.cache_data.clear()
+        # Drop the cached worksheets and rebuild the totals, the dedup
+        # index and the next upload from them
+        sheets.invalidate("score")
+        sheets.invalidate("adjes_gedaan")
+        get_weekly_aggregate().reset()
+        get_dedup_index().reset()
+        clear_checkpoint()
+        get_snapshots().retry()
         st.rerun()  
 
 
-# --- File upload and processing inside a form to avoid reruns ---
-max_timestamp = pd.to_datetime(
-    st.session_state.timeseries.timestamp,
-    format="%d-%m-%Y %H:%M:%S"
-).max()
+# --- Sections of the page ---
+# The upload form is a fragment, using it only reruns the form. The other
+# sections have no widgets and show the data they get as arguments.
 
-st.subheader(f"Laatste datum: {max_timestamp.strftime('%d-%m-%Y')}")
+
+@timed_fragment("upload")
+def upload_form(store):
+    """Chat upload, a new upload reruns the whole page."""
+    max_timestamp = store.max_timestamp()
+
+    # A new database has no waffles yet
+    if pd.isna(max_timestamp):
+        st.subheader("Nog geen waffles, upload de eerste chat")
+    else:
+        st.subheader(f"Laatste datum: {max_timestamp.strftime('%d-%m-%Y')}")
 
 
-with st.form("chat_form"):
-    # Create file uploader and add to sesion state
-    chat_file = st.file_uploader("Upload WhatsApp chat export", type=["txt"])
-    submit = st.form_submit_button("Chat verwerken")
-    st.session_state.chat_file = chat_file
+    with st.form("chat_form"):
+        # Create file uploader and add to sesion state
+        chat_file = st.file_uploader("Upload WhatsApp chat export",
+                                     type=["txt", "zip"])
+        submit = st.form_submit_button("Chat verwerken")
+        st.session_state.chat_file = chat_file
 
-    # Submit button pressed
-    if submit:
+        # Submit button pressed
+        if not submit:
+            return
         # Check if file is uploaded
         if chat_file is None:
             # No file uploaded, show message
             msg = st.warning("Upload een bestand")
             time.sleep(3)
             msg.empty()
-        else:
-            # File uploaded, so create message pattern
-            pattern = r"^(\d{2}-\d{2}-\d{4} \d{2}:\d{2}) - (.*?): (.*)$"
-            # Split txt into messages and create df
-            df = load_chat(chat_file, pattern)
-            # Filter video notes
-            df = find_chat_object(
-                df, "Video note", start_date=st.session_state.start_date_waffles)
-            
-            # Only keep timestamp and person
-            df = df[["timestamp", "person"]]
-            df.timestamp.astype(str)
-            
-            
-            # Update timeseries 
-            old_ts = st.session_state.timeseries
-            updated_ts = pd.concat([old_ts, df])
-            updated_ts = updated_ts.drop_duplicates(subset=["timestamp", "person"]).reset_index(drop=True)
-            
-            # Update session state and Gsheets
-            st.session_state.timeseries = updated_ts
-            conn.update(data=updated_ts, worksheet="score")
-            
-            
-            msg = st.success("Chat verwerkt en toegevoegd")
-            time.sleep(3)
-            msg.empty()
-
-
-# --- Display mathematties ---
-st.header("Mathematties Ranking")
-n = len(st.session_state.persons)
-if n > 0:
-    cols = st.columns(n)
-
-    fig_bar, axs_bar = plt.subplots(1, 1, figsize=(6, 3))
-    # st.pyplot(fig)
-
-    # Check for loaded events
-    events_loaded = False
-    if st.session_state.timeseries is not None and not st.session_state.timeseries.empty:
-        events_loaded = True
-
-        
-        # Create dataframe
-        df_waffles = copy.deepcopy(st.session_state.timeseries)
-        df_waffles.timestamp = pd.to_datetime(df_waffles.timestamp, format="%d-%m-%Y %H:%M:%S")
-        
-        
-        # Determine which day of the week the video was sent
-        df_waffles["day"] = df_waffles.timestamp.dt.day_name()
-        df_waffles["date"] = df_waffles.timestamp.dt.date
-        
-        
-        
-        # Group waffles by calendar week
-        df_waffles["week_nr"] = (
-            df_waffles['timestamp'].dt.isocalendar().year.astype(str) + '-' +
-            df_waffles['timestamp'].dt.isocalendar().week.astype(str).str.zfill(2))
-        
-
-
-        # Flag waffles that were sent on Wednesday as on time
-        df_waffles["wednesday_entries"] = (df_waffles["day"] == "Wednesday").astype(int)
-
-        df_waffles["not_wednesday_entries"] = (df_waffles["day"] != "Wednesday").astype(int)
-        
-        # Check if multiple waffels are sent in one week
-        df_waffles_grouped = df_waffles.groupby(["week_nr", "person"]).agg(
-            wednesday_count=("wednesday_entries", "sum"),
-            not_wednesday_count=("not_wednesday_entries", "sum")).reset_index()
+            return
+
+        # Only parse the video notes sent after the start date, and only
+        # the part of the export after the previous upload when all its
+        # video notes are still in this sheet
+        df, checkpoint = load_chat_objects_incremental(
+            chat_file, PATTERN, VIDEO_NOTE,
+            start_date=st.session_state.start_date_waffles,
+            checkpoint=load_checkpoint(),
+            target=f"{sheets.backend.name}/score",
+            max_timestamp=max_timestamp)
         
-
-        # Late waffles: no Wednesday video, but there are non-Wednesday videos
-        df_waffles_grouped["late_waffles"] = 0
-        df_waffles_grouped.loc[
-            (df_waffles_grouped["wednesday_count"] == 0) & (
-                df_waffles_grouped["not_wednesday_count"] > 0),
-            "late_waffles"
-        ] = 1
-
-        # Double Wednesday waffles: count how many extra Wednesday videos there are beyond the first one
-        df_waffles_grouped["double_wednesday_waffles"] = 0
-        df_waffles_grouped.loc[
-            df_waffles_grouped["wednesday_count"] > 1,
-            "double_wednesday_waffles"
-        ] = df_waffles_grouped["wednesday_count"] - 1
-
-        # Other waffles: at least one Wednesday video AND at least one non-Wednesday video in the same week
-        df_waffles_grouped["other_waffles"] = 0
-        df_waffles_grouped.loc[
-            (df_waffles_grouped["wednesday_count"] > 0) & (
-                df_waffles_grouped["not_wednesday_count"] > 0),
-            "other_waffles"
-        ] = 1
+        # Only append the video notes that aren't in the sheet yet, the
+        # index compares both on the minute instead of the text
+        old_ts = st.session_state.timeseries
+        index = get_dedup_index()
+        with perf.span("dedup"):
+            index.sync(old_ts)
+            new_ts, counts = index.split(df[["timestamp", "person"]])
+        new_ts = new_ts.assign(
+            timestamp=new_ts.timestamp.dt.strftime(SHEET_FORMAT)) \
+            .reindex(columns=old_ts.columns)
         
-        # Calcualte the number of on time waffles
-        df_waffles_grouped["on_time_waffles"]  = df_waffles_grouped["wednesday_count"] \
-            - df_waffles_grouped["double_wednesday_waffles"]
+        # Update Gsheets, the full rerun below reads it back
+        writer = SheetWriter(sheets)
+        writer.append("score", new_ts)
+        with perf.span("flush score"):
+            writer.flush()
+        save_checkpoint(checkpoint)
         
-        # Determine sort order by on time waffles
-        sort_order = df_waffles_grouped.groupby("person")["on_time_waffles"].sum().reset_index()
-        sort_order.on_time_waffles =  sort_order.on_time_waffles * -1
-        sort_order = sort_order.sort_values(
-            by=["on_time_waffles", "person"], ascending=True)["person"].reset_index(drop=True).tolist()
         
-        # Create reverse sort order
-        sort_order_reverse = {i : -i for i in range(n)}
-
-        # Initiate dictionary for punishment score
-        punishments = {}
-    else:
-        sort_order = st.session_state.persons
+        msg = st.success(f"Chat verwerkt: {counts['new']} nieuw, "
+                         f"{counts['known']} al bekend, "
+                         f"{counts['conflicting']} conflicterend")
+        time.sleep(3)
+        msg.empty()
+
+    # Every other section shows the new data, wait for its snapshot
+    st.session_state.uploaded = True
+    st.rerun()
+
+
+def ranking(snapshot):
+    st.header("Mathematties Ranking")
+    n = len(st.session_state.persons)
+    if n == 0:
+        return
+    cols = st.columns(n)
+    df_scores = snapshot.scores
     
-    # Show mathematties
-    for  i, name  in enumerate(sort_order):
-        cols[i].image(st.session_state.persons[name]["picture_url"],
+    # Show mathematties, sorted by on time waffles
+    for  i, name  in enumerate(snapshot.sort_order):
+        cols[i].image(thumbnail(st.session_state.persons[name]["picture_url"],
+                                RANKING_WIDTH),
                  use_container_width=True,
         )
         
@@ -255,272 +202,140 @@ if n > 0:
         )
 
         # Check for loaded events
-        if events_loaded:
-            # Filter on name
-            filtered_df = df_waffles_grouped[df_waffles_grouped["person"]
-                                            == name]
-
-            # Count valid Wednesday waffles
-            on_time_waffles = np.sum(
-                filtered_df["wednesday_count"] - filtered_df["double_wednesday_waffles"])
-
-            delta_waffles = int(on_time_waffles) - st.session_state.wednesdays
-
-            late_waffles = np.sum(filtered_df.late_waffles)
-            missed_waffles = st.session_state.wednesdays - (on_time_waffles + late_waffles)
-            double_waffles = np.sum(filtered_df.double_wednesday_waffles)
+        if snapshot.events_loaded:
+            # Look up the scores of this person
+            on_time_waffles = df_scores.at[name, "on_time"]
             
-            # Add punishment score
-            punishments[name] = late_waffles + missed_waffles + double_waffles
-
             # Create metric
             cols[i].metric(
                 label="Optijd verstuurt",
                 value=on_time_waffles,
-                delta=int(on_time_waffles) - st.session_state.wednesdays,
+                delta=int(on_time_waffles) - snapshot.wednesdays,
                 delta_color="normal",
                 border=True
             )
 
-            # Populate bar chart
-            add_hbar(axs_bar, 
-                     name, 
-                     missed_waffles, 
-                     "#FF4B4B", 
-                     "Gemist")
-            
-            add_hbar(axs_bar, 
-                     name, 
-                     late_waffles,
-                     "#FF904B", 
-                     "Te laat", 
-                     left=missed_waffles)
-            
-            # Calculate bonus points
-            drinks = st.session_state.drinks_done
-            drinks = abs(drinks[drinks["name"] == name].drinks_done.sum())
-            bonuspoints = max(0, drinks - (late_waffles + missed_waffles))
-
-            add_hbar(axs_bar, 
-                     name, 
-                     -bonuspoints, 
-                     "green", 
-                     "Bonus")
 
-    st.markdown("---")
-    if events_loaded:
-        # --- Show statistics
-        st.header("Statistieken")
-        # Load from json
-        df_events = copy.deepcopy(st.session_state.timeseries)
-        df_events.timestamp = pd.to_datetime(df_events.timestamp, format="%d-%m-%Y %H:%M:%S")
-        
-    # Determine which day of the week the video was sent
-        df_events["day"] = df_events.timestamp.dt.day_name()
-        df_events["day_nr"] = df_events.timestamp.dt.dayofweek
-        df_events["date"] = df_events.timestamp.dt.date
-        df_events["time"] = df_events.timestamp.dt.time
-        
-        # Group waffles by calendar week
-        df_events["week_nr"] = (
-            df_waffles['timestamp'].dt.isocalendar().year.astype(str) + '-' +
-            df_waffles['timestamp'].dt.isocalendar().week.astype(str).str.zfill(2))
-        
-        df_wednesday = df_events.loc[df_events.day == "Wednesday"]
+def statistics(snapshot):
+    st.header("Statistieken")
 
-        
-        # --- Everybody sent waffle on time
-        st.subheader("Iedereen Optijd")
-        # Put to group
-        df_all_sent = df_wednesday[["person", "week_nr"]].groupby("week_nr")["person"].apply(set).reset_index()
-        # Filter on all persons sent
-        df_all_sent = df_all_sent[df_all_sent['person'].apply(len) == len(st.session_state.persons)]
-        st.metric(
-            label="Aantal weken",
-                value=len(df_all_sent),
-                delta=len(df_all_sent) - st.session_state.wednesdays,
-                delta_color="normal",
-            )
-        
-        col1, col2, col3, col4 = st.columns(4)
-        # --- Earliest Waffle
-        col1.subheader("Vroegste Waffle")
-        earliest_waffle = df_wednesday.sort_values(by="time").reset_index(drop=True).loc[0]
-        col1.image(st.session_state.persons[earliest_waffle.person]["picture_url"],
-                 width=200,
-                 caption =f"Verstuurd om { earliest_waffle.time}")
-        
-        # --- Latest Waffle
-        col2.subheader("Laatste Waffle")
-        # Get the latest timestemp per week
-        df_latest_waffle = df_events[df_events.day == "Wednesday"]
-        df_latest_waffle = df_latest_waffle.sort_values(by=["timestamp"]).drop_duplicates("week_nr", keep="last")
-        
-        
-        latest_waffle = df_latest_waffle.sort_values(by=["day_nr", "timestamp"]).reset_index(drop=True).loc[len(df_latest_waffle) - 1]
-        
-        col2.image(st.session_state.persons[latest_waffle.person]["picture_url"],
-                   width=200,
-                 caption =f"Verstuurd op {latest_waffle.day}, om {latest_waffle.time}")
-        
-         # --- Most often First (Vaakst als Eerst)
-        col3.subheader("Vaakst als Eerste")
-        # Count how many times each person was the earliest per day
-        first_counts = df_wednesday.sort_values("timestamp").groupby("week_nr").first()["person"].value_counts()
-        most_first_person = first_counts.idxmax()
-        col3.image(
-            st.session_state.persons[most_first_person]["picture_url"],
-            width=200,
-            caption=f"{first_counts.max()} keer"
-        )
-        
-         # --- Last person 
-        col4.subheader("Vaakst als Laatste")
-        # Count how many times each person was the latest per week (only Wednesday)
-        last_counts = df_events.sort_values("timestamp").groupby("week_nr").last()["person"].value_counts()
-        most_last_person = last_counts.idxmax()
-
-        col4.image(
-            st.session_state.persons[most_last_person]["picture_url"],
-            width=200,
-            caption=f"{last_counts.max()} keer"
+    
+    # --- Everybody sent waffle on time
+    st.subheader("Iedereen Optijd")
+    st.metric(
+        label="Aantal weken",
+            value=snapshot.weeks_all_sent,
+            delta=snapshot.weeks_all_sent - snapshot.wednesdays,
+            delta_color="normal",
         )
-        st.markdown("---")
-        # --- Show how many drinks must be done
-        st.header("Straf Atjes")
-        col1, col2 = st.columns(2)
-
-        # --- Display bar cahart for punishment score ---
-        axs_bar.set_xlabel("Straf Atjes")
-        axs_bar.xaxis.set_major_locator(MaxNLocator(integer=True))
-        xmax = axs_bar.get_xlim()[1]
-        xmin = axs_bar.get_xlim()[0]
-        axs_bar.set_xlim(left=xmin,
-                         right=xmax * 1.1)
-        
-        handles, labels = axs_bar.get_legend_handles_labels()
-        unique_labels = dict(zip(labels, handles))
-        axs_bar.legend(
-            unique_labels.values(),
-            unique_labels.keys(),
-            loc="upper center",
-            bbox_to_anchor=(0.5, -0.2),
-            ncol=len(unique_labels)
-            )
-        
-        for container in axs_bar.containers:
-            value = int(container.datavalues[0])
-
-            for bar, label in zip(container, labels):               
-                # Put label inside if bar is large enough
-                if (value) < 0:
-                    axs_bar.text(
-                        bar.get_x() + value / 2,
-                        bar.get_y() + bar.get_height() / 2,
-                        abs(value),
-                        ha='center',
-                        va='center',
-                        color='white'
-                    )
-                    
-        axs_bar.vlines(x=0, ymin=-1, ymax=8, color="#CECCCC", linewidth=2, linestyles="--")
-            
-        col1.subheader("Verdeling")
-        col1.pyplot(fig_bar)
     
-        # --- Display "Waffle" chart ---
-        drinks_to_go = {}
-        df_adjes = st.session_state.drinks_done
-        for name in st.session_state.drinks_done.name.unique():
-            filtered_df = df_waffles_grouped[df_waffles_grouped["person"]== name]
-
-            # Count valid Wednesday waffles
-            on_time_waffles = np.sum(
-                filtered_df["wednesday_count"] - filtered_df["double_wednesday_waffles"])
-
-            df_person_grouped = df_adjes[df_adjes["name"] == name].groupby("name").sum().reset_index() 
-            drinks_to_go[df_person_grouped.name.values[0]] = st.session_state.wednesdays - \
-                                                             on_time_waffles + \
-                                                             df_person_grouped.drinks_done.values[0] 
-
-        # Sort
-        drinks_to_go = sorted(drinks_to_go.items(), key=lambda x: x[1], reverse=True)
-        
-        # Show number of drinks
-        col2.subheader("Atjes te gaan")
-        with col2:
-            for item in drinks_to_go:
-                if item[1] > 0:
-                    string = "🍾" * int(item[1])
-                    st.write(f"**{item[0]}**: {string} ({item[1]:.0f})")
-
-st.markdown("---")
-# Timeseries
-st.title("Waffles Optijd Verstuurd")
-
-# Radar for adjes waffles
-
-date_range = pd.date_range(start=st.session_state.start_date_waffles, end=datetime.date.today(), freq="W-WED")
-df_xaxis = pd.DataFrame(data={"dates" : date_range})
-
-df_xaxis["week_nr"] = (
-            df_xaxis['dates'].dt.isocalendar().year.astype(str) + '-' +
-            df_xaxis['dates'].dt.isocalendar().week.astype(str).str.zfill(2))
-df_xaxis["value"] = 0
-df_xaxis = df_xaxis.drop(columns=["dates"])
-
-# st.write(df_xaxis)
-data = df_events
-fig_ts = go.Figure()
-
-for name in st.session_state.persons.keys():
-    df_person = data[data["person"] == name].drop(columns=["person"])
-    df_person = df_person[df_person["day"] == "Wednesday"]
-    df_person = df_person.drop_duplicates(subset=["week_nr"], keep="first")
-    df_person = df_person.sort_values(by="week_nr").reset_index(drop=True)
-    df_person["value"] = 1
-
-    df_person_full = pd.merge(
-        left=df_xaxis[["week_nr", "value"]],
-        right=df_person[["week_nr", "value"]],
-        on="week_nr",
-        how="left"
+    col1, col2, col3, col4 = st.columns(4)
+    # --- Earliest Waffle
+    col1.subheader("Vroegste Waffle")
+    person, timestamp = snapshot.earliest
+    col1.image(thumbnail(st.session_state.persons[person]["picture_url"], TILE_WIDTH),
+             width=TILE_WIDTH,
+             caption =f"Verstuurd om { timestamp.time()}")
+    
+    # --- Latest Waffle
+    col2.subheader("Laatste Waffle")
+    person, timestamp = snapshot.latest
+    
+    col2.image(thumbnail(st.session_state.persons[person]["picture_url"], TILE_WIDTH),
+               width=TILE_WIDTH,
+             caption =f"Verstuurd op {timestamp.day_name()}, om {timestamp.time()}")
+    
+     # --- Most often First (Vaakst als Eerst)
+    col3.subheader("Vaakst als Eerste")
+    # The person that was the earliest of the week most often
+    most_first_person, count = snapshot.most_first
+    col3.image(
+        thumbnail(st.session_state.persons[most_first_person]["picture_url"], TILE_WIDTH),
+        width=TILE_WIDTH,
+        caption=f"{count} keer"
     )
-
-    df_person_full.fillna(0, inplace=True)
-    df_person_full["value"] = df_person_full.value_x + df_person_full.value_y
-    df_person_full.drop(columns=["value_x", "value_y"], inplace=True)
-    df_person_full["cummulative"] = df_person_full.value.cumsum()
     
-    df_person_full["week_date"] = pd.to_datetime(
-        df_person_full["week_nr"] + "-1", 
-        format="%G-%V-%u"
+     # --- Last person 
+    col4.subheader("Vaakst als Laatste")
+    # The person that was the latest of the week most often
+    most_last_person, count = snapshot.most_last
+
+    col4.image(
+        thumbnail(st.session_state.persons[most_last_person]["picture_url"], TILE_WIDTH),
+        width=TILE_WIDTH,
+        caption=f"{count} keer"
     )
 
-    fig_ts.add_trace(
-        go.Scatter(
-            x=df_person_full["week_date"],
-            y=df_person_full["cummulative"],
-            mode="lines+markers",
-            name=name
-        )
-    )
 
-    fig_ts.update_layout(
-    width=700,
-    dragmode="pan",
-    xaxis=dict(
-        rangeslider=dict(visible=True)
-    ),
-    legend=dict(
-        x=1,
-        y=1,
-        xanchor="left",
-        yanchor="top"
-    )
-)
+def straf_atjes(snapshot):
+    st.header("Straf Atjes")
+    col1, col2 = st.columns(2)
+
+    # --- Display bar cahart for punishment score ---
+    col1.subheader("Verdeling")
+    with col1:
+        render_svg(snapshot.bar_chart)
+
+    # --- Display "Waffle" chart ---
+    # Show number of drinks
+    col2.subheader("Atjes te gaan")
+    with col2:
+        for item in snapshot.drinks_to_go:
+            if item[1] > 0:
+                string = "🍾" * int(item[1])
+                st.write(f"**{item[0]}**: {string} ({item[1]:.0f})")
+
+
+def timeseries(snapshot):
+    st.title("Waffles Optijd Verstuurd")
+
+    # Radar for adjes waffles
 
-fig_ts.update_xaxes(tickformat="%Y-%V")
-fig_ts.update_yaxes(fixedrange=False)
+    # Cumulative on time waffles for all persons at once
+    fig_ts = get_timeseries_figure(snapshot.version, snapshot.timeseries_chart)
+
+    st.plotly_chart(fig_ts, use_container_width=True)
+
+
+# --- File upload and processing inside a form to avoid reruns ---
+upload_form(store)
+
+# --- Everything below comes from the snapshot shared by all sessions ---
+perf.section("snapshot")
+version = fingerprint(ts_version, st.session_state.drinks_done,
+                      st.session_state.persons,
+                      st.session_state.start_date_waffles)
+# Sessions keep showing the previous snapshot while a new one is built,
+# except the one that just uploaded
+snapshot = dashboard_snapshot(version, store, st.session_state.drinks_done,
+                              st.session_state.persons,
+                              st.session_state.start_date_waffles,
+                              wait=st.session_state.pop("uploaded", False))
+st.session_state.wednesdays = snapshot.wednesdays
+error = get_snapshots().error(version)
+if error is not None:
+    st.warning("Bijwerken mislukt, de vorige stand wordt getoond "
+               f"({type(error).__name__}: {error})")
+elif snapshot.version != version:
+    st.caption("Nieuwe gegevens worden verwerkt")
+
+# --- Display mathematties ---
+perf.section("ranking")
+ranking(snapshot)
+
+st.markdown("---")
+if snapshot.events_loaded:
+    # --- Show statistics
+    perf.section("statistieken")
+    statistics(snapshot)
+    st.markdown("---")
+    # --- Show how many drinks must be done
+    perf.section("straf atjes")
+    straf_atjes(snapshot)
+
+st.markdown("---")
+# Timeseries
+perf.section("timeseries")
+timeseries(snapshot)
 
-st.plotly_chart(fig_ts, use_container_width=True)
+render_perf_panel()
@@ -1,23 +1,13 @@
 import streamlit as st
 from streamlit_calendar import calendar
+import datetime
 import json
-import os
-import requests
-from PIL import Image
-from io import BytesIO
-import time
+
 import pandas as pd
-import matplotlib.pyplot as plt
-import matplotlib as mpl
-from matplotlib.ticker import MaxNLocator
-from svgpathtools import svg2paths
-from svgpath2mpl import parse_path
-import datetime
-import numpy as np
-import yaml
-from yaml.loader import SafeLoader
-import streamlit_authenticator as stauth
-from streamlit_gsheets import GSheetsConnection
+
+from functions import get_sheet_cache, get_event_store, get_calendar_events
+from figure_cache import fingerprint
+from calendar_events import view_range
 
 # --- Streamlit page config ---
 st.set_page_config(page_title="Wednesday Waffle Tracker",
@@ -26,7 +16,7 @@ st.title("Wednesday Waffle Tracker")
 
 # --- Sidebar for navigation ---
 with st.sidebar:
-    st.header("Opties en Navigatie")        
+    st.header("Opties en Navigatie")
     dev_acces = st.button("Terug naar app")
     if dev_acces:
         st.switch_page("pages/app.py")
@@ -37,13 +27,62 @@ with open("calendar_options.json") as f:
 
 with open("custom.css") as f:
     custom_css = f.read()
-    
+
+# --- Build events from the sheets ---
+sheets = get_sheet_cache()
+df_ts = sheets.read("score")
+df_adjes = sheets.read("adjes_gedaan")
+store = get_event_store(fingerprint(df_ts), df_ts)
+
+start_date = st.session_state.get("start_date_waffles", "2025-06-11")
+colors = {person: data.get("color")
+          for person, data in st.secrets["credentials"]["usernames"].items()}
+# Missed weeks run up to today, so a new day is a new version as well
+version = (fingerprint(df_ts), fingerprint(df_adjes),
+           datetime.date.today().isoformat())
+calendar_events = get_calendar_events(version, store, df_adjes, colors,
+                                      start_date)
+
+# --- Month navigation, only the shown month is sent to the calendar ---
+if "calendar_month" not in st.session_state:
+    st.session_state.calendar_month = datetime.date.today().replace(day=1)
+
+col1, col2, col3 = st.columns([1, 1, 1])
+if col1.button("Vorige maand"):
+    st.session_state.calendar_month = (
+        pd.Timestamp(st.session_state.calendar_month)
+        - pd.offsets.MonthBegin(1)).date()
+if col2.button("Deze maand"):
+    st.session_state.calendar_month = datetime.date.today().replace(day=1)
+if col3.button("Volgende maand"):
+    st.session_state.calendar_month = (
+        pd.Timestamp(st.session_state.calendar_month)
+        + pd.offsets.MonthBegin(1)).date()
+
+month = st.session_state.calendar_month
+first_day = int(calendar_options.get("firstDay", 1))
+view_start, view_end = view_range(month, first_day)
+
+# Keep the calendar's own navigation inside the loaded range
+calendar_options = {
+    **calendar_options,
+    "initialDate": month.isoformat(),
+    "validRange": {"start": view_start.isoformat(),
+                   "end": (view_end + datetime.timedelta(days=1)).isoformat()},
+}
+events = calendar_events.between(view_start, view_end)
+st.session_state.events = events
+
 # --- Display calendar ---
 st.header("Calender")
-if st.session_state.events:
+if not st.session_state.events and len(store) == 0:
+    st.info("No events found. Please upload and process a chat export.")
+else:
+    if not st.session_state.events:
+        # The month grid is still shown, the buttons above lead to the
+        # months with events
+        st.info(f"No events in {month.strftime('%B %Y')}.")
     calendar(events=st.session_state.events,
              options=calendar_options,
              custom_css=custom_css,
-             key='calendar')
-else:
-    st.info("No events found. Please upload and process a chat export.")
\ No newline at end of file
+             key=f"calendar-{month.isoformat()}")
@@ -1,29 +1,16 @@
 import streamlit as st
-from streamlit_calendar import calendar
-import json
-import os
-import requests
-from PIL import Image
-from io import BytesIO
-import time
 import pandas as pd
-import matplotlib.pyplot as plt
-import matplotlib as mpl
-from matplotlib.ticker import MaxNLocator
-from svgpathtools import svg2paths
-from svgpath2mpl import parse_path
-import datetime
-import numpy as np
-import yaml
-from yaml.loader import SafeLoader
-import streamlit_authenticator as stauth
-from streamlit_gsheets import GSheetsConnection
 import datetime
 
+import perf
+from functions import (get_sheet_cache, get_write_queue, start_perf,
+                       render_perf_panel)
+
 st.set_page_config(page_title="Wednesday Waffle Tracker",
                    layout="wide", page_icon=":waffle:")
 
 st.title("Voortgang bijwerken")
+start_perf("editor")
 # --- Sidebar for navigation ---
 with st.sidebar:
     st.header("Opties en Navigatie")        
@@ -34,14 +21,23 @@ with st.sidebar:
 cols = st.columns(2, width="stretch")
 cols[1].link_button("Ga naar Google Sheets","https://docs.google.com/spreadsheets/d/1sGugpoTuMUUzrRqjs2R-K-Av695rqk4VXY3gPLmUN6A/edit?gid=0#gid=0")
 
+sheets = get_sheet_cache()
+queue = get_write_queue()
 refresh = cols[0].button("Refresh", type="primary")
 if refresh:
-    st.cache_data.clear()
+    # Only drop the cached worksheets
+    sheets.invalidate("adjes_gedaan")
+    sheets.invalidate("score")
     st.rerun()  
 
-conn = st.connection("gsheets", type=GSheetsConnection)
-df_adjes = conn.read(worksheet="adjes_gedaan")
-df_score = conn.read(worksheet="score")
+perf.section("sheets")
+with perf.span("read adjes_gedaan"):
+    # Entries that are still being written show up right away
+    df_adjes = queue.with_pending("adjes_gedaan", sheets.read("adjes_gedaan"))
+with perf.span("read score"):
+    df_score = sheets.read("score")
+
+perf.section("invoer")
 
 col1, col2, col3 = st.columns(3)
 name = col1.selectbox(label="Selecteer persoon", options=df_adjes.name.unique())
@@ -53,19 +49,38 @@ apply_changes = st.button("Toepassen")
 
 if apply_changes:
     new_row = {"name": name, "drinks_done": drinks_added, "datum": datum_done}
-    df_adjes = pd.concat([df_adjes, pd.DataFrame([new_row])], ignore_index=True)
+    df_new = pd.DataFrame([new_row]).reindex(columns=df_adjes.columns)
     
-    conn.update(data=df_adjes)
+    # Queue the row, the background writer appends it to the sheet so the
+    # next entry can be made right away
+    queue.submit("adjes_gedaan", df_new)
     st.success("Atjes toegevoegd")
-    time.sleep(3)
-    df_adjes = conn.read()
+    
+    df_adjes = pd.concat([df_adjes, df_new], ignore_index=True)
     if "drinks_done"  in st.session_state:        
         st.session_state.drinks_done = df_adjes
-    st.cache_data.clear()
-    st.rerun()
 
-    
+
+@st.fragment(run_every="2s")
+def write_status():
+    # Only this part reruns to follow the background writer
+    pending = sum(queue.pending.values())
+    if queue.last_error is not None:
+        st.warning(f"Opslaan mislukt, {pending} atjes wachten op een nieuwe "
+                   f"poging ({queue.last_error})")
+    elif pending:
+        st.info(f"{pending} atjes worden opgeslagen...")
+    else:
+        st.caption(f"Alles opgeslagen ({queue.flushed} atjes weggeschreven "
+                   "sinds de start van de server)")
+
+write_status()
+
+
+perf.section("tabellen")
 st.data_editor(df_adjes)
 st.markdown("----")
 st.title("Atjes Database")
-st.data_editor(df_score)
\ No newline at end of file
+st.data_editor(df_score)
+
+render_perf_panel()
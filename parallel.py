@@ -0,0 +1,128 @@
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+
+# Exports smaller than this per worker are parsed serially, starting the
+# workers costs more than it saves
+MIN_RANGE_BYTES = 4 << 20
+
+_pools = {}
+
+
+def match_lines(text, regex):
+    """All matches of regex at the start of a stripped line of text.
+
+    Splitting text at any line start and concatenating the matches of the
+    parts gives the same result as matching the whole text.
+    """
+    # Strip every line in one go, same as line.strip() in a loop
+    text = "\n".join(map(str.strip, text.split("\n")))
+    return regex.findall(text)
+
+
+def compile_pattern(pattern):
+    # Anchor every match to the start of a line, like re.match per line
+    return re.compile(r"^(?:%s)" % pattern, re.MULTILINE)
+
+
+def line_ranges(data, n_ranges):
+    """Split bytes into at most n_ranges (start, end) pairs at line starts."""
+    size = len(data)
+    bounds = [0]
+    for i in range(1, n_ranges):
+        newline = data.find(b"\n", max(bounds[-1], size * i // n_ranges))
+        if newline == -1:
+            break
+        if newline + 1 < size:
+            bounds.append(newline + 1)
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _file_line_ranges(path, n_ranges):
+    # Same as line_ranges, but only reads around the split points
+    size = os.path.getsize(path)
+    bounds = [0]
+    with open(path, "rb") as f:
+        for i in range(1, n_ranges):
+            f.seek(max(bounds[-1], size * i // n_ranges))
+            f.readline()
+            if f.tell() >= size:
+                break
+            bounds.append(f.tell())
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _decode(data):
+    # Same newline handling as reading the export in text mode. Ranges
+    # start after a \n, so a \r\n pair is never split between two ranges.
+    return data.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+
+
+def _parse_range(source, start, end, pattern):
+    # Worker: parse one range of a file path, or a slice of bytes
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            f.seek(start)
+            data = f.read(end - start)
+    else:
+        data = source
+    return match_lines(_decode(data), compile_pattern(pattern))
+
+
+def _get_pool(workers):
+    # Workers are spawned, forking the multi-threaded Streamlit server isn't
+    # safe. Pools are kept so only the first parse pays for the start-up.
+    if workers not in _pools:
+        _pools[workers] = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    return _pools[workers]
+
+
+def parse_parallel(file, pattern, workers=None,
+                   min_range_bytes=MIN_RANGE_BYTES):
+    """Matches of pattern over a whole export, parsed in a process pool.
+
+    The export is split into byte ranges that start at a line start, one per
+    worker, and the matches are concatenated in file order. Continuation
+    lines of multi-line messages never start a match, so a message split
+    over two ranges gives the same result as parsing serially.
+    """
+    workers = workers or os.cpu_count() or 1
+    if isinstance(file, str):
+        size = os.path.getsize(file)
+    else:
+        data = file.read()
+        size = len(data)
+
+    n_ranges = max(1, min(workers, size // max(1, min_range_bytes)))
+    if n_ranges == 1:
+        if isinstance(file, str):
+            with open(file, "rb") as f:
+                data = f.read()
+        return match_lines(_decode(data), compile_pattern(pattern))
+
+    if isinstance(file, str):
+        jobs = [(file, start, end)
+                for start, end in _file_line_ranges(file, n_ranges)]
+    else:
+        jobs = [(data[start:end], start, end)
+                for start, end in line_ranges(data, n_ranges)]
+
+    pool = _get_pool(workers)
+    futures = [pool.submit(_parse_range, source, start, end, pattern)
+               for source, start, end in jobs]
+    records = []
+    for future in futures:
+        records.extend(future.result())
+    return records
+
+
+def shutdown():
+    """Stop the worker pools."""
+    while _pools:
+        _, pool = _pools.popitem()
+        pool.shutdown()
@@ -0,0 +1,148 @@
+import contextlib
+import contextvars
+import cProfile
+import functools
+import io
+import json
+import logging
+import marshal
+import pstats
+import time
+
+
+logger = logging.getLogger("waffle_tracker.perf")
+
+# Recorder of the script run in this thread, None when timing is off
+_current = contextvars.ContextVar("perf_recorder", default=None)
+
+
+class Recorder:
+    """Timing spans of a single script run.
+
+    Spans nest, and sections are top-level spans that end where the next
+    section starts, so a page can be split up without indenting it.
+    """
+
+    def __init__(self, run):
+        self.run = run
+        self.spans = []
+        self._depth = 0
+        self._section = None
+
+    def add(self, name, seconds, depth):
+        record = {"run": self.run, "span": name, "depth": depth,
+                  "ms": round(seconds * 1000, 3)}
+        self.spans.append(record)
+        logger.info(json.dumps(record))
+
+    def section(self, name):
+        self._end_section()
+        self._section = (name, time.perf_counter())
+        self._depth = 1
+
+    def _end_section(self):
+        if self._section is not None:
+            name, start = self._section
+            self.add(name, time.perf_counter() - start, 0)
+            self._section = None
+            self._depth = 0
+
+    def finish(self):
+        self._end_section()
+        return self.spans
+
+
+def start_run(run):
+    """Start recording spans for this thread, returns the Recorder."""
+    recorder = Recorder(run)
+    _current.set(recorder)
+    return recorder
+
+
+def stop_run():
+    recorder = _current.get()
+    _current.set(None)
+    if recorder is not None:
+        recorder.finish()
+    return recorder
+
+
+def recording():
+    """Whether spans of this thread are being recorded."""
+    return _current.get() is not None
+
+
+def section(name):
+    """Start a new top-level section, closing the previous one."""
+    recorder = _current.get()
+    if recorder is not None:
+        recorder.section(name)
+
+
+@contextlib.contextmanager
+def span(name):
+    """Time the enclosed block when a run is being recorded."""
+    recorder = _current.get()
+    if recorder is None:
+        yield
+        return
+
+    depth = recorder._depth
+    recorder._depth += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        recorder._depth = depth
+        recorder.add(name, time.perf_counter() - start, depth)
+
+
+def timed(func=None, *, name=None):
+    """Decorator form of span, named after the function by default."""
+    if func is None:
+        return functools.partial(timed, name=name)
+    span_name = name or func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with span(span_name):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+class Profile:
+    """cProfile capture of a script run.
+
+    ``dump`` gives the stats in the binary format read by pstats and
+    snakeviz, ``summary`` the top entries by cumulative time as text.
+    """
+
+    def __init__(self):
+        self._profiler = cProfile.Profile()
+
+    def start(self):
+        self._profiler.enable()
+        return self
+
+    def stop(self):
+        self._profiler.disable()
+        self._profiler.create_stats()
+        return self
+
+    def dump(self):
+        return marshal.dumps(self._profiler.stats)
+
+    def summary(self, limit=30):
+        out = io.StringIO()
+        pstats.Stats(self._profiler, stream=out) \
+            .sort_stats("cumulative").print_stats(limit)
+        return out.getvalue()
+
+
+def enable_logging(level=logging.INFO):
+    """Write the span records to stderr as JSON lines."""
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+    logger.setLevel(level)
@@ -0,0 +1,62 @@
+def _counts(persons):
+    # Counted as plain values, so equal counts keep the order in which the
+    # persons first appear and idxmax picks the same person as before. A
+    # categorical would order them by category instead.
+    return persons.astype(object).value_counts()
+
+
+class WeekRanking:
+    """Position of every waffle within its ISO week, computed once.
+
+    ``events`` needs the ``timestamp``, ``person``, ``day_nr``, ``week`` and
+    ``seconds`` columns of EventStore.events. Events are sorted by timestamp
+    once and numbered within their week, over all days and over Wednesdays
+    only, in both directions. The highlight tiles are lookups on those ranks.
+    """
+
+    def __init__(self, events):
+        ranked = events[["timestamp", "person", "day_nr", "week", "seconds"]] \
+            .sort_values("timestamp", kind="stable").reset_index(drop=True)
+
+        by_week = ranked.groupby("week", sort=False)
+        ranked["week_rank"] = by_week.cumcount()
+        ranked["week_rank_desc"] = by_week.cumcount(ascending=False)
+
+        # -1 for the waffles that weren't sent on Wednesday
+        on_wednesday = (ranked["day_nr"] == 2).to_numpy()
+        by_wednesday = ranked[on_wednesday].groupby("week", sort=False)
+        ranked["wednesday_rank"] = -1
+        ranked["wednesday_rank_desc"] = -1
+        ranked.loc[on_wednesday, "wednesday_rank"] = by_wednesday.cumcount()
+        ranked.loc[on_wednesday, "wednesday_rank_desc"] = \
+            by_wednesday.cumcount(ascending=False)
+
+        self.events = ranked
+        self._wednesday = ranked[on_wednesday]
+
+    def weeks_all_sent(self, n_persons):
+        """Weeks in which n_persons different persons sent on Wednesday."""
+        persons = self._wednesday.groupby("week")["person"].nunique()
+        return persons.index[persons == n_persons]
+
+    def earliest_wednesday(self):
+        """The Wednesday waffle sent at the earliest time of day."""
+        return self._wednesday.loc[self._wednesday["seconds"].idxmin()]
+
+    def last_wednesday(self):
+        """The last Wednesday waffle of the most recent week."""
+        return self._wednesday.iloc[-1]
+
+    def first_counts(self):
+        """How often every person sent the first Wednesday waffle of a week."""
+        first = self._wednesday[self._wednesday["wednesday_rank"] == 0]
+        return _counts(first["person"])
+
+    def last_counts(self):
+        """How often every person sent the last waffle of a week, any day."""
+        last = self.events[self.events["week_rank_desc"] == 0]
+        return _counts(last["person"])
+
+    def average_wednesday_time(self):
+        """Mean time of day of the Wednesday waffles per person, in seconds."""
+        return self._wednesday.groupby("person", observed=True)["seconds"].mean()
@@ -0,0 +1,160 @@
+import datetime
+
+import pandas as pd
+
+from weeks import week_calendar, week_key
+
+
+SUMMARY_COLUMNS = ["waffles", "on_time", "late", "missed", "double",
+                   "punishments", "drinks_done", "bonus", "drinks_to_go"]
+
+
+def weekly_counts(events):
+    """Wednesday and other-day waffles per (ISO week, person).
+
+    The week key is an integer ``iso_year * 100 + iso_week``.
+    """
+    timestamps = events["timestamp"]
+    on_wednesday = (timestamps.dt.dayofweek == 2).to_numpy()
+
+    counts = pd.DataFrame({
+        "week": week_key(timestamps),
+        "person": events["person"].to_numpy(),
+        "wednesday_count": on_wednesday.astype("int64"),
+        "not_wednesday_count": (~on_wednesday).astype("int64"),
+    })
+    return counts.groupby(["week", "person"], sort=False).sum().reset_index()
+
+
+def weekly_drinks(drinks_done):
+    """Adjes done per (ISO week, person) from the adjes_gedaan ledger."""
+    dates = pd.to_datetime(drinks_done["datum"], format="%d-%m-%Y",
+                           errors="coerce")
+    drinks = pd.DataFrame({
+        # Entries without a valid date end up in week 0
+        "week": week_key(dates),
+        "person": drinks_done["name"].to_numpy(),
+        "drinks_done": drinks_done["drinks_done"].to_numpy(),
+    })
+    return drinks.groupby(["week", "person"], sort=False).sum().reset_index()
+
+
+def score_weeks(weekly):
+    """Add the per-week scoring flags to the output of weekly_counts."""
+    wednesday = weekly["wednesday_count"]
+    not_wednesday = weekly["not_wednesday_count"]
+
+    weekly = weekly.copy()
+    # No Wednesday video, but there are non-Wednesday videos
+    weekly["late_waffles"] = ((wednesday == 0)
+                              & (not_wednesday > 0)).astype("int64")
+    # Extra Wednesday videos beyond the first one
+    weekly["double_wednesday_waffles"] = (wednesday - 1).clip(lower=0)
+    # At least one Wednesday video and at least one other video
+    weekly["other_waffles"] = ((wednesday > 0)
+                               & (not_wednesday > 0)).astype("int64")
+    weekly["on_time_waffles"] = wednesday - weekly["double_wednesday_waffles"]
+    return weekly
+
+
+def person_totals(weekly):
+    """Sum scored weeks per person, drinks included when the table has them."""
+    columns = {
+        "wednesday_count": "waffles",
+        "not_wednesday_count": "not_wednesday",
+        "on_time_waffles": "on_time",
+        "late_waffles": "late",
+        "double_wednesday_waffles": "double",
+    }
+    if "drinks_done" in weekly:
+        columns["drinks_done"] = "drinks_done"
+
+    # A plain sum of the columns, named aggregations cost a lot more on
+    # the small frames of an incremental sync
+    totals = weekly.groupby("person")[list(columns)].sum().rename(
+        columns=columns)
+    totals["waffles"] += totals.pop("not_wednesday")
+    return totals
+
+
+def summarize_totals(totals, wednesdays, drinks_done=None):
+    """Per-person summary from the output of person_totals.
+
+    A ledger passed as ``drinks_done`` replaces the drinks in ``totals``.
+    """
+    totals = totals[["waffles", "on_time", "late", "double"]
+                    + (["drinks_done"] if "drinks_done" in totals else [])]
+
+    if drinks_done is not None and not drinks_done.empty:
+        drinks = drinks_done.groupby("name")["drinks_done"].sum()
+    elif drinks_done is None and "drinks_done" in totals:
+        drinks = totals["drinks_done"]
+    else:
+        drinks = pd.Series(dtype="float64")
+
+    summary = totals.drop(columns="drinks_done", errors="ignore")
+    summary = summary.reindex(summary.index.union(drinks.index), fill_value=0)
+    summary = summary.astype("int64")
+    summary["drinks_done"] = drinks.reindex(summary.index, fill_value=0)
+
+    summary["missed"] = wednesdays - (summary["on_time"] + summary["late"])
+    summary["punishments"] = (summary["late"] + summary["missed"]
+                              + summary["double"])
+    # Drinks done beyond the late and missed waffles count as bonus
+    summary["bonus"] = (summary["drinks_done"].abs()
+                        - (summary["late"] + summary["missed"])).clip(lower=0)
+    summary["drinks_to_go"] = (wednesdays - summary["on_time"]
+                               + summary["drinks_done"])
+
+    # Ranking: most on time waffles first, then by name
+    summary.index.name = "person"
+    summary = summary.reset_index().sort_values(
+        by=["on_time", "person"], ascending=[False, True])
+    return summary.set_index("person")[SUMMARY_COLUMNS]
+
+
+def summarize_weeks(weekly, wednesdays, drinks_done=None):
+    """Per-person summary from scored weeks, see summarize_scores.
+
+    Without a ledger the drinks are taken from a ``drinks_done`` column of
+    the weekly table when it has one.
+    """
+    return summarize_totals(person_totals(weekly), wednesdays, drinks_done)
+
+
+def cumulative_on_time(events, start_date, end_date=None, persons=None):
+    """Cumulative on time waffles per Wednesday, one column per person.
+
+    Every week counts once when at least one video was sent on Wednesday. The
+    index holds the Monday of each ISO week from ``start_date`` up to
+    ``end_date`` (today by default), ``persons`` sets the columns.
+    """
+    if end_date is None:
+        end_date = datetime.date.today()
+    weeks = week_calendar(start_date, end_date).weeks(start_date, end_date)
+
+    # One entry per (week, person) with a Wednesday video
+    on_wednesday = events[events["timestamp"].dt.dayofweek == 2]
+    sent = pd.MultiIndex.from_arrays([
+        week_key(on_wednesday["timestamp"]),
+        on_wednesday["person"].to_numpy()]).unique()
+
+    matrix = pd.Series(1, index=sent, dtype="int64").unstack(fill_value=0)
+    matrix = matrix.reindex(index=weeks["week"].to_numpy(), columns=persons,
+                            fill_value=0)
+    matrix = matrix.cumsum()
+    matrix.index = pd.DatetimeIndex(weeks["week_start"].to_numpy())
+    return matrix
+
+
+def summarize_scores(events, wednesdays, drinks_done=None):
+    """Score every person in one grouped pass over the events.
+
+    ``events`` needs a datetime ``timestamp`` and a ``person`` column,
+    ``drinks_done`` is the adjes_gedaan ledger with ``name`` and
+    ``drinks_done``. Returns one row per person in ranking order with the
+    columns in SUMMARY_COLUMNS. Persons that only appear in the ledger get a
+    row with ``waffles`` 0.
+    """
+    weekly = score_weeks(weekly_counts(events))
+    return summarize_weeks(weekly, wednesdays, drinks_done)
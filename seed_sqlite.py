@@ -0,0 +1,96 @@
+"""Fill a new SQLite database for the "sqlite" storage backend.
+
+The worksheets are copied from the Google sheets, or the score worksheet is
+rebuilt from a WhatsApp chat export. Run from the repository root:
+
+    python seed_sqlite.py --from-sheets [--path waffles.db]
+    python seed_sqlite.py --from-chat "WhatsApp-chat.txt" [--start-date 2025-06-11]
+
+``--from-sheets`` uses the Streamlit GSheets connection of the app, so it
+needs the same secrets. A chat has no adjes, adjes_gedaan stays empty then.
+Worksheets that already have rows are left alone unless ``--force`` is
+given.
+"""
+import argparse
+
+import pandas as pd
+
+from archive import PATTERN, VIDEO_NOTE
+from event_store import SHEET_FORMAT
+from functions import load_chat_objects
+from storage import WORKSHEETS, SQLiteBackend
+
+
+def sheets_worksheets(connection="gsheets"):
+    """Every worksheet of the app as read from the Google sheets."""
+    import streamlit as st
+    from streamlit_gsheets import GSheetsConnection
+
+    from storage import GSheetsBackend
+
+    backend = GSheetsBackend(st.connection(connection,
+                                           type=GSheetsConnection))
+    # The connection also returns the empty rows below the data
+    return {worksheet: backend.read(worksheet).dropna(how="all")
+            for worksheet in WORKSHEETS}
+
+
+def chat_worksheets(path, start_date=None):
+    """The score worksheet with the video notes of a chat export."""
+    events = load_chat_objects(path, PATTERN, VIDEO_NOTE,
+                               start_date=start_date)
+    events = events[["timestamp", "person"]].drop_duplicates()
+    return {"score": pd.DataFrame({
+        "timestamp": events["timestamp"].dt.strftime(SHEET_FORMAT),
+        "person": events["person"],
+    })}
+
+
+def seed(backend, worksheets, force=False):
+    """Replace the worksheets, returns the rows written per worksheet.
+
+    Worksheets that already have rows are skipped unless force is set.
+    """
+    written = {}
+    for worksheet, df in worksheets.items():
+        if not force and not backend.read(worksheet).empty:
+            continue
+        backend.update(worksheet, df.reset_index(drop=True))
+        written[worksheet] = len(df)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--from-sheets", action="store_true",
+                        help="copy the worksheets of the Google sheets")
+    source.add_argument("--from-chat", metavar="EXPORT",
+                        help="score worksheet from a chat export, .txt or .zip")
+    parser.add_argument("--path", default="waffles.db")
+    parser.add_argument("--connection", default="gsheets")
+    parser.add_argument("--start-date", default="2025-06-11")
+    parser.add_argument("--force", action="store_true",
+                        help="replace worksheets that already have rows")
+    args = parser.parse_args()
+
+    if args.from_sheets:
+        worksheets = sheets_worksheets(args.connection)
+    else:
+        worksheets = chat_worksheets(args.from_chat, args.start_date)
+
+    backend = SQLiteBackend(args.path)
+    try:
+        written = seed(backend, worksheets, force=args.force)
+    finally:
+        backend.close()
+
+    for worksheet in worksheets:
+        if worksheet in written:
+            print(f"{worksheet}: {written[worksheet]} rows")
+        else:
+            print(f"{worksheet}: has rows already, skipped (use --force)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+import logging
+import threading
+import time
+
+import perf
+from weeks import count_wednesdays
+
+
+logger = logging.getLogger("waffle_tracker.snapshot")
+
+class DashboardSnapshot:
+    """Everything the dashboard shows for one version of the worksheets.
+
+    Built once and only read afterwards, so all sessions can share it:
+
+    - ``wednesdays``: Wednesdays from the start date up to the last waffle
+    - ``scores``: summary per person, see
+      aggregates.WeeklyAggregate.summary_for
+    - ``sort_order``: persons with waffles, best first
+    - ``weeks_all_sent``: weeks in which everybody sent a waffle on time
+    - ``earliest``, ``latest``: (person, timestamp) of the extreme
+      Wednesday waffles
+    - ``most_first``, ``most_last``: (person, count) of who was first and
+      last of the week most often
+    - ``drinks_to_go``: (name, drinks) of the adjes ledger, most first
+    - ``bar_chart``, ``timeseries_chart``: the rendered chart payloads
+
+    The two chart renderers get the frame to draw and return the payload,
+    which keeps streamlit out of this module.
+    """
+
+    def __init__(self, version, store, drinks_done, aggregate, persons,
+                 start_date, render_bars, render_timeseries):
+        from scoring import cumulative_on_time
+
+        self.version = version
+        self.events_loaded = len(store) > 0
+        self.scores = None
+        self.weeks_all_sent = 0
+        self.earliest = self.latest = None
+        self.most_first = self.most_last = None
+        self.drinks_to_go = []
+        self.bar_chart = None
+
+        end_date = store.max_timestamp().date() if self.events_loaded else None
+        self.wednesdays = count_wednesdays(start_date, end_date)
+
+        events = store.events
+        if self.events_loaded:
+            with perf.span("weekly aggregate sync"):
+                self.scores = aggregate.summary_for(
+                    events[["timestamp", "person"]], drinks_done,
+                    self.wednesdays)
+            self.sort_order = self.scores[self.scores.waffles > 0].index.tolist()
+
+            with perf.span("statistieken"):
+                ranking = store.ranking
+                self.weeks_all_sent = len(ranking.weeks_all_sent(len(persons)))
+                earliest = ranking.earliest_wednesday()
+                latest = ranking.last_wednesday()
+                self.earliest = (earliest.person, earliest.timestamp)
+                self.latest = (latest.person, latest.timestamp)
+                first_counts = ranking.first_counts()
+                last_counts = ranking.last_counts()
+                self.most_first = (first_counts.idxmax(), first_counts.max())
+                self.most_last = (last_counts.idxmax(), last_counts.max())
+
+            with perf.span("straf atjes"):
+                bars = self.scores.loc[self.sort_order,
+                                       ["missed", "late", "bonus"]]
+                self.bar_chart = render_bars(bars)
+                drinks_to_go = self.scores["drinks_to_go"].reindex(
+                    drinks_done.name.unique())
+                self.drinks_to_go = sorted(drinks_to_go.items(),
+                                           key=lambda x: x[1], reverse=True)
+        else:
+            self.sort_order = list(persons)
+
+        with perf.span("timeseries"):
+            cumulative = cumulative_on_time(events, start_date,
+                                            persons=list(persons))
+            self.timeseries_chart = render_timeseries(cumulative)
+
+
+class SnapshotPublisher:
+    """Latest DashboardSnapshot, rebuilt in a background thread.
+
+    ``get`` returns the snapshot of the asked version when it is built. If
+    not, it starts building that version and returns the previous snapshot
+    in the meantime, so only the very first call waits. A build that
+    finishes after a newer one never replaces it. A version whose build
+    failed is not built again until ``retry``, ``error`` tells why it failed.
+    """
+
+    def __init__(self, build):
+        self._build = build
+        self._ready = threading.Condition()
+        self._current = None
+        self._building = {}
+        self._started = 0
+        self._published = 0
+        self._failed = {}
+        self.builds = 0
+        self.last_build_seconds = None
+
+    def _run(self, generation, version, args):
+        start = time.perf_counter()
+        perf.start_run("snapshot")
+        try:
+            snapshot = self._build(version, *args)
+            error = None
+        except Exception as exc:
+            logger.exception("Building dashboard snapshot %s failed", version)
+            snapshot, error = None, exc
+        finally:
+            perf.stop_run()
+
+        with self._ready:
+            del self._building[version]
+            if error is not None:
+                self._failed[version] = error
+            elif generation > self._published:
+                self._current = snapshot
+                self._published = generation
+                self.builds += 1
+                self.last_build_seconds = time.perf_counter() - start
+            self._ready.notify_all()
+
+    def error(self, version):
+        """The exception the build of version failed with, or None."""
+        with self._ready:
+            return self._failed.get(version)
+
+    def retry(self):
+        """Build failed versions again on their next ``get``."""
+        with self._ready:
+            self._failed.clear()
+
+    def get(self, version, *args, wait=False):
+        """Snapshot of version, or the previous one while it is built.
+
+        With ``wait`` the call blocks until version is built, for a session
+        that just changed the data and should see its own change. When the
+        build failed the previous snapshot is returned, check ``error``.
+        """
+        with self._ready:
+            current = self._current
+            if current is not None and current.version == version:
+                return current
+            if version not in self._building and version not in self._failed:
+                self._started += 1
+                self._building[version] = self._started
+                threading.Thread(target=self._run,
+                                 args=(self._started, version, args),
+                                 name="snapshot-build", daemon=True).start()
+
+            def done():
+                if version not in self._building:
+                    return True
+                if wait:
+                    return False
+                return self._current is not None
+
+            self._ready.wait_for(done)
+            if self._current is None:
+                # The first build failed, there is nothing to fall back on
+                raise self._failed[version]
+            return self._current
@@ -0,0 +1,516 @@
+import abc
+import atexit
+import collections
+import contextlib
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+logger = logging.getLogger("waffle_tracker.storage")
+
+
+class SheetWriteError(Exception):
+    pass
+
+
+def _to_rows(df):
+    # Plain python values, as they end up in the sheet
+    df = df.astype(object).where(df.notna(), "")
+    return df.values.tolist()
+
+
+def _payload_bytes(rows):
+    return len(json.dumps(rows, default=str).encode("utf-8"))
+
+
+class StorageBackend(abc.ABC):
+    """Interface of the worksheet stores behind SheetCache.
+
+    ``read`` returns a worksheet as a DataFrame, ``version`` changes whenever
+    the worksheet changed, or is None when the backend can't tell,
+    ``append_rows`` appends rows in worksheet column order and returns the
+    number of rows written, ``update`` replaces the worksheet with a
+    DataFrame. ``name`` tells the stores apart, for state kept per store.
+    """
+
+    name = ""
+
+    @abc.abstractmethod
+    def read(self, worksheet):
+        ...
+
+    @abc.abstractmethod
+    def version(self, worksheet):
+        ...
+
+    @abc.abstractmethod
+    def append_rows(self, worksheet, rows):
+        ...
+
+    @abc.abstractmethod
+    def update(self, worksheet, df):
+        ...
+
+    def close(self):
+        """Release connections, nothing to do for most backends."""
+
+
+class GSheetsBackend(StorageBackend):
+    """Worksheet access through the streamlit GSheets connection."""
+
+    def __init__(self, conn, name="gsheets"):
+        self._conn = conn
+        self.name = name
+        self._spreadsheet = None
+        self._has_version = True
+
+    def read(self, worksheet):
+        # Caching is left to SheetCache
+        return self._conn.read(worksheet=worksheet, ttl=0)
+
+    def _open_spreadsheet(self):
+        # Not part of the public API of the connection, so it may be gone
+        # or fail in another version of st-gsheets-connection
+        if self._spreadsheet is None:
+            self._spreadsheet = self._conn.client._open_spreadsheet()
+        return self._spreadsheet
+
+    def version(self, worksheet):
+        # Drive keeps one modified time for the whole spreadsheet, a single
+        # metadata call instead of downloading the sheet
+        if not self._has_version:
+            return None
+        try:
+            return self._open_spreadsheet().get_lastUpdateTime()
+        except Exception:
+            # Without a version SheetCache falls back to the ttl alone
+            logger.warning("No spreadsheet version, only the ttl is used",
+                           exc_info=True)
+            self._has_version = False
+            return None
+
+    def append_rows(self, worksheet, rows):
+        # Append below the last row instead of rewriting the sheet, the
+        # response tells how many rows were written
+        ws = self._conn.client._select_worksheet(worksheet=worksheet)
+        response = ws.append_rows(rows, value_input_option="USER_ENTERED")
+        return response.get("updates", {}).get("updatedRows", 0)
+
+    def update(self, worksheet, df):
+        self._conn.update(data=df, worksheet=worksheet)
+
+
+class FakeSheetBackend(StorageBackend):
+    """In-memory stand-in for the spreadsheet.
+
+    Every read and write is recorded in ``operations`` with the number of
+    rows and the payload size, so the volume can be measured without Google.
+    """
+
+    def __init__(self, sheets=None):
+        self.sheets = {name: df.copy() for name, df in (sheets or {}).items()}
+        self.name = f"fake:{id(self)}"
+        self.operations = []
+        self._versions = {name: 0 for name in self.sheets}
+
+    def read(self, worksheet):
+        df = self.sheets[worksheet]
+        rows = [df.columns.tolist()] + _to_rows(df)
+        self.operations.append({"op": "read", "worksheet": worksheet,
+                                "rows": len(rows),
+                                "bytes": _payload_bytes(rows)})
+        return df.copy()
+
+    def version(self, worksheet):
+        return self._versions[worksheet]
+
+    def append_rows(self, worksheet, rows):
+        old = self.sheets[worksheet]
+        new = pd.DataFrame(rows, columns=old.columns)
+        self.sheets[worksheet] = pd.concat([old, new], ignore_index=True)
+        self._versions[worksheet] += 1
+        self.operations.append({"op": "append", "worksheet": worksheet,
+                                "rows": len(rows),
+                                "bytes": _payload_bytes(rows)})
+        return len(rows)
+
+    def update(self, worksheet, df):
+        rows = [df.columns.tolist()] + _to_rows(df)
+        self.sheets[worksheet] = df.copy()
+        self._versions[worksheet] = self._versions.get(worksheet, 0) + 1
+        self.operations.append({"op": "update", "worksheet": worksheet,
+                                "rows": len(rows),
+                                "bytes": _payload_bytes(rows)})
+
+
+# Columns and SQLite types of the worksheets the app uses
+WORKSHEETS = {
+    "score": [("timestamp", "TEXT"), ("person", "TEXT")],
+    "adjes_gedaan": [("name", "TEXT"), ("drinks_done", "INTEGER"),
+                     ("datum", "TEXT")],
+}
+INDEXES = {
+    "score": ["timestamp", "person"],
+    "adjes_gedaan": ["name"],
+}
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+class SQLiteBackend(StorageBackend):
+    """Worksheets as tables in a local SQLite file.
+
+    Rows keep their insertion order through the rowid, a meta table holds a
+    version per worksheet that is bumped on every write. Connections come
+    from a fixed pool, so threads of different sessions don't reconnect.
+    The duration of the last operations is kept in ``operations``.
+    """
+
+    def __init__(self, path="waffles.db", pool_size=4, worksheets=WORKSHEETS):
+        self.path = path
+        self.name = f"sqlite:{os.path.abspath(path)}"
+        self.worksheets = dict(worksheets)
+        self.operations = collections.deque(maxlen=1000)
+        self._pool = queue.Queue()
+        for _ in range(pool_size):
+            self._pool.put(self._connect())
+
+        with self._connection() as conn, conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS meta "
+                         "(worksheet TEXT PRIMARY KEY, version INTEGER)")
+            for worksheet, columns in self.worksheets.items():
+                self._create(conn, worksheet, columns)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        # Readers don't block the writer and the other way around
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextlib.contextmanager
+    def _connection(self):
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def _create(self, conn, worksheet, columns):
+        table = _quote(worksheet)
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {table} (%s)" % ", ".join(
+            f"{_quote(name)} {kind}".strip() for name, kind in columns))
+        indexed = [name for name in INDEXES.get(worksheet, [])
+                   if name in dict(columns)]
+        if indexed:
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {_quote(worksheet + '_index')} "
+                f"ON {table} (%s)" % ", ".join(map(_quote, indexed)))
+
+    def _columns(self, conn, worksheet):
+        info = conn.execute(f"PRAGMA table_info({_quote(worksheet)})")
+        columns = [row[1] for row in info]
+        if not columns:
+            raise KeyError(worksheet)
+        return columns
+
+    def _bump(self, conn, worksheet):
+        conn.execute("INSERT INTO meta VALUES (?, 1) ON CONFLICT(worksheet) "
+                     "DO UPDATE SET version = version + 1", (worksheet,))
+
+    def _record(self, op, worksheet, rows, start):
+        self.operations.append({"op": op, "worksheet": worksheet,
+                                "rows": rows,
+                                "seconds": time.perf_counter() - start})
+
+    def read(self, worksheet):
+        start = time.perf_counter()
+        with self._connection() as conn:
+            columns = self._columns(conn, worksheet)
+            df = pd.read_sql_query(
+                "SELECT %s FROM %s ORDER BY rowid"
+                % (", ".join(map(_quote, columns)), _quote(worksheet)), conn)
+        self._record("read", worksheet, len(df), start)
+        return df
+
+    def version(self, worksheet):
+        start = time.perf_counter()
+        with self._connection() as conn:
+            row = conn.execute("SELECT version FROM meta WHERE worksheet = ?",
+                               (worksheet,)).fetchone()
+        self._record("version", worksheet, 0, start)
+        return row[0] if row else 0
+
+    def append_rows(self, worksheet, rows):
+        start = time.perf_counter()
+        with self._connection() as conn, conn:
+            columns = self._columns(conn, worksheet)
+            cursor = conn.executemany(
+                "INSERT INTO %s VALUES (%s)"
+                % (_quote(worksheet), ", ".join("?" * len(columns))),
+                [[None if value == "" else value for value in row]
+                 for row in rows])
+            self._bump(conn, worksheet)
+        self._record("append", worksheet, len(rows), start)
+        return cursor.rowcount
+
+    def update(self, worksheet, df):
+        start = time.perf_counter()
+        types = dict(self.worksheets.get(worksheet, []))
+        columns = [(name, types.get(name, "")) for name in df.columns]
+        with self._connection() as conn, conn:
+            conn.execute(f"DROP TABLE IF EXISTS {_quote(worksheet)}")
+            self._create(conn, worksheet, columns)
+            rows = df.astype(object).where(df.notna(), None).values.tolist()
+            conn.executemany(
+                "INSERT INTO %s VALUES (%s)"
+                % (_quote(worksheet), ", ".join("?" * len(columns))), rows)
+            self._bump(conn, worksheet)
+        self._record("update", worksheet, len(df), start)
+
+    def close(self):
+        while not self._pool.empty():
+            self._pool.get().close()
+
+
+class SheetWriter:
+    """Collects new rows per worksheet and appends them in one call each.
+
+    The frames passed to append must have the columns in the same order as
+    the worksheet.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._pending = {}
+
+    def append(self, worksheet, df):
+        if not df.empty:
+            self._pending.setdefault(worksheet, []).extend(_to_rows(df))
+
+    @property
+    def pending(self):
+        return {worksheet: len(rows) for worksheet, rows in self._pending.items()}
+
+    def flush(self):
+        """Write all pending rows, returns the rows written per worksheet."""
+        written = {}
+        while self._pending:
+            worksheet, rows = next(iter(self._pending.items()))
+            n_written = self.backend.append_rows(worksheet, rows)
+            # The rows stay pending when the write wasn't confirmed
+            if n_written != len(rows):
+                raise SheetWriteError(
+                    f"{worksheet}: {n_written} of {len(rows)} rows written")
+            del self._pending[worksheet]
+            written[worksheet] = n_written
+        return written
+
+
+class WriteBehindQueue:
+    """Appends rows to the backend from a background thread.
+
+    ``submit`` only queues the rows, so the caller never waits for the
+    spreadsheet. The writer waits until no rows came in for ``debounce``
+    seconds and then appends everything queued per worksheet in one call.
+    A failed write is retried with exponential backoff. Rows stay
+    pending until the backend confirmed them, ``with_pending`` adds them to
+    a frame read from the backend.
+    """
+
+    def __init__(self, backend, debounce=2.0, backoff=1.0, max_backoff=60.0):
+        self.backend = backend
+        self.debounce = debounce
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.flushed = 0
+        self.retries = 0
+        self.last_error = None
+        self.last_flush = None
+        self._pending = {}
+        self._last_submit = 0.0
+        self._closing = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name="write-behind")
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, worksheet, df):
+        """Queue the rows of df, in worksheet column order."""
+        rows = _to_rows(df)
+        if rows:
+            with self._cond:
+                self._pending.setdefault(worksheet, []).extend(rows)
+                self._last_submit = time.monotonic()
+                self._cond.notify()
+        return len(rows)
+
+    @property
+    def pending(self):
+        with self._cond:
+            return {worksheet: len(rows)
+                    for worksheet, rows in self._pending.items() if rows}
+
+    def with_pending(self, worksheet, df):
+        """df with the rows still queued for worksheet appended."""
+        with self._cond:
+            rows = list(self._pending.get(worksheet, []))
+        if not rows:
+            return df
+        return pd.concat([df, pd.DataFrame(rows, columns=df.columns)],
+                         ignore_index=True)
+
+    def _next_batch(self):
+        with self._cond:
+            while not any(self._pending.values()) and not self._closing:
+                self._cond.wait()
+            # Entries often come in bursts, wait for the burst to end
+            while not self._closing:
+                remaining = self._last_submit + self.debounce - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            return {worksheet: list(rows)
+                    for worksheet, rows in self._pending.items() if rows}
+
+    def _write(self, batch):
+        for worksheet, rows in batch.items():
+            n_written = self.backend.append_rows(worksheet, rows)
+            if n_written != len(rows):
+                raise SheetWriteError(
+                    f"{worksheet}: {n_written} of {len(rows)} rows written")
+            with self._cond:
+                # Rows submitted during the write stay queued
+                del self._pending[worksheet][:len(rows)]
+                self.flushed += len(rows)
+
+    def _run(self):
+        delay = self.backoff
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return
+            try:
+                self._write(batch)
+            except Exception as e:
+                self.retries += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+                with self._cond:
+                    if self._closing:
+                        return
+                    self._cond.wait(delay)
+                delay = min(delay * 2, self.max_backoff)
+                continue
+            delay = self.backoff
+            self.last_error = None
+            self.last_flush = time.time()
+
+    def close(self, timeout=10.0):
+        """Write what is still queued and stop the writer."""
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+
+class SheetCache:
+    """Parquet copies of the worksheets on disk, shared by all sessions.
+
+    A cached sheet is served as is for ``ttl`` seconds. After that the
+    backend version is compared first and the sheet is only downloaded again
+    when it changed, or when the backend has no version. Writes through the cache invalidate the sheet.
+    With ``passthrough`` every read goes straight to the backend, for local
+    backends that read faster than the parquet copy. ``cache_dir`` is still
+    created, the other per-sheet state is kept there.
+    """
+
+    def __init__(self, backend, cache_dir=".sheet_cache", ttl=300,
+                 passthrough=False):
+        self.backend = backend
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.passthrough = passthrough
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _paths(self, worksheet):
+        base = os.path.join(self.cache_dir, worksheet)
+        return base + ".parquet", base + ".json"
+
+    def _load_meta(self, worksheet):
+        meta_path = self._paths(worksheet)[1]
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save_meta(self, worksheet, meta):
+        meta_path = self._paths(worksheet)[1]
+        with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(meta_path + ".tmp", meta_path)
+
+    def _store(self, worksheet, df, version):
+        data_path = self._paths(worksheet)[0]
+        try:
+            df.to_parquet(data_path + ".tmp", index=False)
+        except (TypeError, ValueError, ImportError):
+            # Mixed types in a column can't be stored, just don't cache
+            return
+        os.replace(data_path + ".tmp", data_path)
+        self._save_meta(worksheet, {"version": version,
+                                    "checked_at": time.time()})
+
+    def read(self, worksheet):
+        if self.passthrough:
+            return self.backend.read(worksheet)
+        with self._lock:
+            meta = self._load_meta(worksheet)
+            data_path = self._paths(worksheet)[0]
+            if meta is not None and os.path.exists(data_path):
+                if time.time() - meta["checked_at"] < self.ttl:
+                    return pd.read_parquet(data_path)
+
+                # Stale, but the sheet might not have changed
+                version = self.backend.version(worksheet)
+                if version is not None and version == meta["version"]:
+                    meta["checked_at"] = time.time()
+                    self._save_meta(worksheet, meta)
+                    return pd.read_parquet(data_path)
+            else:
+                version = self.backend.version(worksheet)
+
+            df = self.backend.read(worksheet)
+            self._store(worksheet, df, version)
+            return df
+
+    def version(self, worksheet):
+        return self.backend.version(worksheet)
+
+    def append_rows(self, worksheet, rows):
+        try:
+            return self.backend.append_rows(worksheet, rows)
+        finally:
+            self.invalidate(worksheet)
+
+    def update(self, worksheet, df):
+        try:
+            self.backend.update(worksheet, df)
+        finally:
+            self.invalidate(worksheet)
+
+    def invalidate(self, worksheet):
+        with self._lock:
+            for path in self._paths(worksheet):
+                if os.path.exists(path):
+                    os.remove(path)
@@ -0,0 +1,89 @@
+import pandas as pd
+
+from aggregates import RECENT_WEEKS, WeeklyAggregate
+from scoring import summarize_scores
+
+
+def make_events(n_weeks, persons=("Anna", "Bob", "Carl")):
+    # Anna on Wednesday, Bob on Thursday and Carl twice on Wednesday in
+    # every other week
+    rows = []
+    for week in range(n_weeks):
+        wednesday = pd.Timestamp("2025-01-01") + pd.Timedelta(weeks=week)
+        rows.append((wednesday + pd.Timedelta(hours=9), persons[0]))
+        rows.append((wednesday + pd.Timedelta(days=1), persons[1]))
+        if week % 2:
+            rows.append((wednesday + pd.Timedelta(hours=10), persons[2]))
+            rows.append((wednesday + pd.Timedelta(hours=11), persons[2]))
+    return pd.DataFrame(rows, columns=["timestamp", "person"])
+
+
+def make_drinks(rows):
+    return pd.DataFrame(rows, columns=["name", "drinks_done", "datum"])
+
+
+EVENTS = make_events(3 * RECENT_WEEKS)
+DRINKS = make_drinks([("Bob", -2, "08-01-2025"), ("Carl", 1, "15-01-2025")])
+WEDNESDAYS = 3 * RECENT_WEEKS
+
+
+def assert_matches_full_regroup(aggregate, events, drinks):
+    pd.testing.assert_frame_equal(
+        aggregate.summary_for(events, drinks, WEDNESDAYS),
+        summarize_scores(events, WEDNESDAYS, drinks), check_dtype=False)
+
+
+def test_syncing_row_by_row_matches_a_full_regroup():
+    aggregate = WeeklyAggregate()
+    for n_rows in range(0, len(EVENTS) + 1, 5):
+        aggregate.sync(EVENTS.iloc[:n_rows], DRINKS.iloc[:1])
+    assert_matches_full_regroup(aggregate, EVENTS, DRINKS)
+    # Old weeks were moved out of the recent table, each week only once
+    assert not aggregate._history.empty
+    assert not aggregate.weekly.duplicated(["week", "person"]).any()
+
+
+def test_adje_in_an_old_week_is_added_to_that_week():
+    aggregate = WeeklyAggregate()
+    aggregate.sync(EVENTS, DRINKS)
+    drinks = pd.concat([DRINKS, make_drinks([("Anna", -1, "01-01-2025")])],
+                       ignore_index=True)
+
+    assert_matches_full_regroup(aggregate, EVENTS, drinks)
+
+
+def test_changed_last_row_rebuilds():
+    aggregate = WeeklyAggregate()
+    aggregate.sync(EVENTS, DRINKS)
+    events = EVENTS.copy()
+    events.loc[len(events) - 1, "person"] = "Anna"
+
+    assert_matches_full_regroup(aggregate, events, DRINKS)
+
+
+def test_shorter_sheet_rebuilds():
+    aggregate = WeeklyAggregate()
+    aggregate.sync(EVENTS, DRINKS)
+
+    assert_matches_full_regroup(aggregate, EVENTS.iloc[:10], DRINKS)
+
+
+def test_saved_table_is_loaded_again(tmp_path):
+    path = str(tmp_path / "weekly_aggregate.parquet")
+    WeeklyAggregate(path).sync(EVENTS.iloc[:-4], DRINKS)
+
+    aggregate = WeeklyAggregate(path)
+
+    assert aggregate._synced["events"][0] == len(EVENTS) - 4
+    assert_matches_full_regroup(aggregate, EVENTS, DRINKS)
+
+
+def test_reset_forgets_everything(tmp_path):
+    path = str(tmp_path / "weekly_aggregate.parquet")
+    aggregate = WeeklyAggregate(path)
+    aggregate.sync(EVENTS, DRINKS)
+
+    aggregate.reset()
+
+    assert aggregate.weekly.empty
+    assert WeeklyAggregate(path).weekly.empty
@@ -0,0 +1,50 @@
+import zipfile
+
+import pytest
+
+from archive import PATTERN, VIDEO_NOTE, list_media
+from functions import load_chat, load_chat_objects
+
+
+CHAT = (
+    "11-06-2025 09:00 - Anna: PTV-20250611-WA0001.mp4 (file attached)\n"
+    "11-06-2025 09:05 - Bob: VID-20250611-WA0002.mp4 (file attached)\n"
+    "11-06-2025 09:06 - Bob: Kijk dit filmpje\n"
+    "11-06-2025 21:00 - Bob: PTV-20250611-WA0003.mp4 (file attached)\n"
+    "12-06-2025 10:00 - Carl: IMG-20250612-WA0004.jpg (file attached)\n"
+    "12-06-2025 11:00 - Carl: <Video note omitted>\n"
+    "12-06-2025 11:05 - Anna: leuke video note!\n"
+)
+
+
+@pytest.fixture
+def export(tmp_path):
+    path = tmp_path / "WhatsApp Chat with Mathematties.zip"
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("WhatsApp Chat with Mathematties.txt", CHAT)
+        for name in ["PTV-20250611-WA0001.mp4", "VID-20250611-WA0002.mp4",
+                     "PTV-20250611-WA0003.mp4", "IMG-20250612-WA0004.jpg"]:
+            zf.writestr(name, b"\0" * 16)
+    return str(path)
+
+
+def test_only_video_notes_count_in_an_export_with_media(export):
+    df = load_chat_objects(export, PATTERN, VIDEO_NOTE)
+
+    assert df["person"].tolist() == ["Anna", "Bob", "Carl"]
+    assert not df["message"].str.startswith("VID-").any()
+
+
+def test_streamed_and_full_parse_agree(export):
+    chat = load_chat(export, PATTERN)
+    full = chat[chat["message"].str.contains(VIDEO_NOTE, case=False)]
+
+    assert full["message"].tolist() == \
+        load_chat_objects(export, PATTERN, VIDEO_NOTE)["message"].tolist()
+
+
+def test_list_media_reads_the_listing(export):
+    media = list_media(export)
+
+    assert media["kind"].tolist() == ["PTV", "VID", "PTV", "IMG"]
+    assert media["size"].sum() == 64
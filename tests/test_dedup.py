@@ -0,0 +1,101 @@
+import pandas as pd
+import pytest
+
+from dedup import DedupIndex, canonical_minutes
+
+
+SHEET = pd.DataFrame({
+    "timestamp": ["11-06-2025 09:00:00", "11-06-2025 21:00",
+                  "18/06/2025 08:00:00", "2025-06-25 10:30:00"],
+    "person": ["Anna", "Bob", "Anna ", "Carl"],
+})
+
+
+def chat(rows):
+    df = pd.DataFrame(rows, columns=["timestamp", "person"])
+    return df.assign(timestamp=pd.to_datetime(df["timestamp"], format="mixed"))
+
+
+@pytest.fixture
+def index():
+    index = DedupIndex()
+    index.sync(SHEET)
+    return index
+
+
+@pytest.mark.parametrize("text", [
+    "18-06-2025 08:00:00", "18-06-2025 08:00", "18/06/2025 08:00:00",
+    "18/06/2025 08:00", "2025-06-18 08:00:00", " 2025-06-18 08:00 ",
+])
+def test_every_sheet_format_gives_the_same_minute(text):
+    expected = canonical_minutes(pd.Series(pd.to_datetime(["2025-06-18 08:00"])))
+
+    assert canonical_minutes([text]).tolist() == expected.tolist()
+
+
+def test_seconds_are_dropped_and_garbage_is_minus_one():
+    minutes = canonical_minutes(["18-06-2025 08:00:59", "gisteren", ""])
+
+    assert minutes[0] == canonical_minutes(["18-06-2025 08:00"])[0]
+    assert minutes[1:].tolist() == [-1, -1]
+
+
+def test_split_classifies_an_upload(index):
+    upload = pd.concat([chat([
+        # Stored in the canonical format
+        ("2025-06-11 09:00", "Anna"),
+        # Stored without seconds
+        ("2025-06-11 21:00", "Bob"),
+        # Stored with slashes and a trailing space in the name
+        ("2025-06-18 08:00", "Anna"),
+        ("2025-07-02 09:00", "Bob"),
+    ]), pd.DataFrame({"timestamp": ["geen datum"], "person": ["Carl"]})],
+        ignore_index=True)
+
+    new, counts = index.split(upload)
+
+    assert counts == {"new": 1, "known": 1, "conflicting": 2, "invalid": 1}
+    assert new["person"].tolist() == ["Bob"]
+
+
+def test_repeats_within_an_upload_are_added_once(index):
+    upload = chat([("2025-07-02 09:00", "Bob"), ("2025-07-02 09:00", " Bob"),
+                   ("2025-07-02 09:00:30", "Bob")])
+
+    new, counts = index.split(upload)
+
+    assert len(new) == 1
+    assert counts["new"] == 1 and counts["known"] == 2
+
+
+def test_sync_only_adds_appended_rows(index):
+    sheet = pd.concat([SHEET, pd.DataFrame({
+        "timestamp": ["02-07-2025 09:00:00"], "person": ["Bob"]})],
+        ignore_index=True)
+
+    index.sync(sheet)
+
+    assert len(index) == 5
+    assert index.split(chat([("2025-07-02 09:00", "Bob")]))[1]["known"] == 1
+
+
+def test_sync_after_an_edited_row_rebuilds(index):
+    sheet = SHEET.copy()
+    sheet.loc[1, "person"] = "Carl"
+
+    index.sync(sheet)
+
+    _, counts = index.split(chat([("2025-06-11 21:00", "Bob"),
+                                  ("2025-06-11 21:00", "Carl")]))
+    assert counts["new"] == 1 and counts["conflicting"] == 1
+    assert len(index) == len(SHEET)
+
+
+def test_index_is_loaded_again(tmp_path):
+    path = str(tmp_path / "dedup.parquet")
+    DedupIndex(path).sync(SHEET)
+
+    index = DedupIndex(path)
+
+    assert len(index) == len(SHEET)
+    assert index.split(chat([("2025-06-11 09:00", "Anna")]))[1]["known"] == 1
@@ -0,0 +1,40 @@
+import pandas as pd
+import pytest
+
+from event_store import EventStore
+
+
+@pytest.fixture
+def store():
+    return EventStore(pd.DataFrame({
+        "timestamp": ["11-06-2025 09:00:00", "12-06-2025 21:30:00"],
+        "person": ["Anna", "Bob"],
+    }))
+
+
+def test_events_are_shared_not_copied(store):
+    assert store.events is store.events
+
+
+@pytest.mark.parametrize("column, value", [
+    ("timestamp", pd.Timestamp("2025-01-01")), ("person", "Bob"),
+    ("day_nr", 0), ("week", 202501), ("date", pd.Timestamp("2025-01-01")),
+    ("seconds", 0),
+])
+def test_shared_events_cant_be_changed(store, column, value):
+    # pandas raises ValueError for the numpy columns and an AssertionError
+    # for the datetime ones
+    with pytest.raises((ValueError, AssertionError)):
+        store.events.loc[0, column] = value
+
+    assert store.events.loc[1, "person"] == "Bob"
+    assert store.events.loc[0, "seconds"] == 9 * 3600
+
+
+def test_a_copy_can_be_changed(store):
+    events = store.events.copy()
+    events.loc[0, "person"] = "Bob"
+    events["late"] = events["day_nr"] != 2
+
+    assert store.events.loc[0, "person"] == "Anna"
+    assert "late" not in store.events
@@ -0,0 +1,106 @@
+import io
+
+import pandas as pd
+import pytest
+
+from archive import PATTERN, VIDEO_NOTE
+from ingest import (clear_checkpoint, load_chat_objects_incremental,
+                    load_checkpoint, make_checkpoint, resume_offset,
+                    save_checkpoint)
+
+
+TARGET = "sqlite:/data/waffles.db/score"
+
+FIRST = (
+    "01-06-2025 10:00 - Anna: Hallo allemaal\n"
+    "11-06-2025 09:00 - Anna: <Video note omitted>\n"
+    "11-06-2025 21:00 - Bob: <Video note omitted>\n"
+    "12-06-2025 08:00 - Bob: Morgen weer\n"
+).encode("utf-8")
+MORE = (
+    "18-06-2025 08:00 - Anna: <Video note omitted>\n"
+    "18-06-2025 08:30 - Bob: Goedemorgen\n"
+).encode("utf-8")
+
+
+def upload(data, checkpoint=None, max_timestamp=pd.Timestamp("2025-06-11 21:00"),
+           target=TARGET, start_date="2025-06-11"):
+    return load_chat_objects_incremental(io.BytesIO(data), PATTERN, VIDEO_NOTE,
+                                         start_date=start_date,
+                                         checkpoint=checkpoint, target=target,
+                                         max_timestamp=max_timestamp)
+
+
+@pytest.fixture
+def checkpoint():
+    return upload(FIRST, max_timestamp=pd.NaT)[1]
+
+
+def test_checkpoint_remembers_the_newest_video_note(checkpoint):
+    assert checkpoint["last_timestamp"] == "11-06-2025 21:00"
+    assert checkpoint["target"] == TARGET
+    assert checkpoint["offset"] == len(FIRST.rstrip(b"\n"))
+
+
+def test_appended_export_only_parses_the_new_part(checkpoint):
+    df, new_checkpoint = upload(FIRST + MORE, checkpoint)
+
+    assert resume_offset(FIRST + MORE, checkpoint, VIDEO_NOTE, "2025-06-11",
+                         TARGET, pd.Timestamp("2025-06-11 21:00")) > 0
+    assert df["person"].tolist() == ["Anna"]
+    assert new_checkpoint["last_timestamp"] == "18-06-2025 08:00"
+
+
+def test_resume_without_new_video_notes_keeps_the_newest(checkpoint):
+    extra = "19-06-2025 10:00 - Bob: Geen waffle\n".encode("utf-8")
+
+    df, new_checkpoint = upload(FIRST + extra, checkpoint)
+
+    assert df.empty
+    assert new_checkpoint["last_timestamp"] == "11-06-2025 21:00"
+
+
+@pytest.mark.parametrize("data, settings", [
+    # Truncated export
+    (FIRST[:40], {}),
+    # Re-exported with a different start
+    (b"01-06-2025 10:01 - Carl: Hoi\n" + FIRST[30:] + MORE, {}),
+    # Changed filter
+    (FIRST + MORE, {"start_date": "2025-06-12"}),
+    # The sheet was emptied
+    (FIRST + MORE, {"max_timestamp": pd.NaT}),
+    # The sheet lost its last rows
+    (FIRST + MORE, {"max_timestamp": pd.Timestamp("2025-06-11 09:00")}),
+    # Another backend or worksheet
+    (FIRST + MORE, {"target": "gsheets:gsheets/score"}),
+])
+def test_full_parse_when_the_checkpoint_doesnt_apply(checkpoint, data,
+                                                     settings):
+    settings = {"start_date": "2025-06-11", "target": TARGET,
+                "max_timestamp": pd.Timestamp("2025-06-11 21:00"), **settings}
+
+    assert resume_offset(data, checkpoint, VIDEO_NOTE, **settings) == 0
+
+
+def test_emptied_sheet_gets_every_video_note_again(checkpoint):
+    df, _ = upload(FIRST, checkpoint, max_timestamp=pd.NaT)
+
+    assert df["person"].tolist() == ["Anna", "Bob"]
+
+
+def test_checkpoint_without_video_notes_resumes_on_an_empty_sheet():
+    data = "01-06-2025 10:00 - Anna: Hallo\n".encode("utf-8")
+    checkpoint = make_checkpoint(data, VIDEO_NOTE, "2025-06-11", TARGET)
+
+    assert resume_offset(data + MORE, checkpoint, VIDEO_NOTE, "2025-06-11",
+                         TARGET, pd.NaT) == len(data) - 1
+
+
+def test_saved_checkpoint_can_be_cleared(tmp_path, checkpoint):
+    path = str(tmp_path / "checkpoint.json")
+
+    save_checkpoint(checkpoint, path)
+    assert load_checkpoint(path) == checkpoint
+    clear_checkpoint(path)
+    assert load_checkpoint(path) is None
+    clear_checkpoint(path)
@@ -0,0 +1,118 @@
+import pandas as pd
+
+from event_store import SHEET_FORMAT, EventStore
+
+
+def old_tiles(df_events, n_persons):
+    # The tile code of pages/app.py before the ranking index
+    df_events = df_events.copy()
+    df_events["day"] = df_events.timestamp.dt.day_name()
+    df_events["time"] = df_events.timestamp.dt.time
+    iso = df_events.timestamp.dt.isocalendar()
+    df_events["week_nr"] = (iso.year.astype(str) + "-"
+                            + iso.week.astype(str).str.zfill(2))
+    df_wednesday = df_events.loc[df_events.day == "Wednesday"]
+
+    all_sent = df_wednesday[["person", "week_nr"]].groupby("week_nr")["person"] \
+        .apply(set).reset_index()
+    all_sent = all_sent[all_sent["person"].apply(len) == n_persons]
+
+    earliest = df_wednesday.sort_values(by="time").reset_index(drop=True).loc[0]
+
+    latest = df_wednesday.sort_values(by=["timestamp"]) \
+        .drop_duplicates("week_nr", keep="last")
+    latest = latest.sort_values(by=["day_nr", "timestamp"]) \
+        .reset_index(drop=True).loc[len(latest) - 1]
+
+    first_counts = df_wednesday.sort_values("timestamp").groupby("week_nr") \
+        .first()["person"].value_counts()
+    last_counts = df_events.sort_values("timestamp").groupby("week_nr") \
+        .last()["person"].value_counts()
+    return (len(all_sent), (earliest.person, earliest.timestamp),
+            (latest.person, latest.timestamp),
+            (first_counts.idxmax(), first_counts.max()),
+            (last_counts.idxmax(), last_counts.max()))
+
+
+def new_tiles(ranking, n_persons):
+    earliest = ranking.earliest_wednesday()
+    latest = ranking.last_wednesday()
+    first_counts = ranking.first_counts()
+    last_counts = ranking.last_counts()
+    return (len(ranking.weeks_all_sent(n_persons)),
+            (earliest.person, earliest.timestamp),
+            (latest.person, latest.timestamp),
+            (first_counts.idxmax(), first_counts.max()),
+            (last_counts.idxmax(), last_counts.max()))
+
+
+def make_store(rows):
+    return EventStore(pd.DataFrame({
+        "timestamp": [pd.Timestamp(t).strftime(SHEET_FORMAT) for t, _ in rows],
+        "person": [person for _, person in rows],
+    }))
+
+
+def assert_same_tiles(store, n_persons):
+    # The old code read the persons as plain strings from the sheet
+    old = old_tiles(store.events.astype({"person": object}), n_persons)
+    assert new_tiles(store.ranking, n_persons) == old
+
+
+def test_tiles_match_old_code():
+    store = make_store([
+        ("2025-06-11 08:10", "Bob"), ("2025-06-11 09:30", "Anna"),
+        ("2025-06-12 10:00", "Carl"),
+        ("2025-06-18 07:45", "Anna"), ("2025-06-18 12:00", "Carl"),
+        ("2025-06-18 20:00", "Bob"),
+        ("2025-06-25 22:15", "Carl"), ("2025-06-26 09:00", "Anna"),
+    ])
+
+    assert_same_tiles(store, 3)
+    ranking = store.ranking
+    assert list(ranking.weeks_all_sent(3)) == [202525]
+    assert ranking.earliest_wednesday().person == "Anna"
+    assert ranking.last_wednesday().person == "Carl"
+
+
+def test_ties_pick_the_same_person_as_old_code():
+    # Zed and Anna are both first twice and last twice, Zed came first.
+    # Counting on the categorical would pick Anna, sorted first by name.
+    store = make_store([
+        ("2025-06-11 08:00", "Zed"), ("2025-06-11 09:00", "Anna"),
+        ("2025-06-18 08:00", "Anna"), ("2025-06-18 09:00", "Zed"),
+        ("2025-06-25 08:00", "Anna"), ("2025-06-25 09:00", "Zed"),
+        ("2025-07-02 08:00", "Zed"), ("2025-07-02 09:00", "Anna"),
+    ])
+
+    assert_same_tiles(store, 2)
+    assert store.ranking.first_counts().idxmax() == "Zed"
+    assert store.ranking.last_counts().idxmax() == "Anna"
+
+
+def test_week_without_wednesday_waffles():
+    # Nobody sent on Wednesday 2025-06-18, only late waffles that week
+    store = make_store([
+        ("2025-06-11 08:00", "Anna"), ("2025-06-11 09:00", "Bob"),
+        ("2025-06-19 10:00", "Bob"), ("2025-06-20 10:00", "Anna"),
+    ])
+
+    assert_same_tiles(store, 2)
+    ranking = store.ranking
+    assert list(ranking.weeks_all_sent(2)) == [202524]
+    # Only weeks with a Wednesday waffle have a first, every week a last
+    assert ranking.first_counts().to_dict() == {"Anna": 1}
+    assert ranking.last_counts().to_dict() == {"Bob": 1, "Anna": 1}
+    assert ranking.last_wednesday().timestamp == pd.Timestamp("2025-06-11 09:00")
+
+
+def test_average_wednesday_time_per_person():
+    store = make_store([
+        ("2025-06-11 08:00", "Anna"), ("2025-06-18 10:00", "Anna"),
+        ("2025-06-19 10:00", "Bob"),
+    ])
+
+    average = store.ranking.average_wednesday_time()
+
+    assert average["Anna"] == 9 * 3600
+    assert pd.isna(average.get("Bob"))
@@ -0,0 +1,151 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from scoring import (SUMMARY_COLUMNS, cumulative_on_time, summarize_scores,
+                     summarize_weeks, score_weeks, weekly_counts)
+
+
+def old_loop_scores(events, wednesdays, drinks_done):
+    # The inline code of pages/app.py before the scoring module
+    df_waffles = events.copy()
+    df_waffles["day"] = df_waffles.timestamp.dt.day_name()
+    df_waffles["week_nr"] = (
+        df_waffles['timestamp'].dt.isocalendar().year.astype(str) + '-' +
+        df_waffles['timestamp'].dt.isocalendar().week.astype(str).str.zfill(2))
+    df_waffles["wednesday_entries"] = (df_waffles["day"] == "Wednesday").astype(int)
+    df_waffles["not_wednesday_entries"] = (df_waffles["day"] != "Wednesday").astype(int)
+    grouped = df_waffles.groupby(["week_nr", "person"]).agg(
+        wednesday_count=("wednesday_entries", "sum"),
+        not_wednesday_count=("not_wednesday_entries", "sum")).reset_index()
+    grouped["late_waffles"] = 0
+    grouped.loc[(grouped["wednesday_count"] == 0)
+                & (grouped["not_wednesday_count"] > 0), "late_waffles"] = 1
+    grouped["double_wednesday_waffles"] = 0
+    grouped.loc[grouped["wednesday_count"] > 1, "double_wednesday_waffles"] = \
+        grouped["wednesday_count"] - 1
+
+    scores = {}
+    for name in grouped.person.unique():
+        filtered_df = grouped[grouped["person"] == name]
+        on_time = np.sum(filtered_df["wednesday_count"]
+                         - filtered_df["double_wednesday_waffles"])
+        late = np.sum(filtered_df.late_waffles)
+        missed = wednesdays - (on_time + late)
+        double = np.sum(filtered_df.double_wednesday_waffles)
+        drinks = drinks_done[drinks_done["name"] == name].drinks_done.sum()
+        scores[name] = {
+            "on_time": on_time, "late": late, "missed": missed,
+            "double": double, "punishments": late + missed + double,
+            "bonus": max(0, abs(drinks) - (late + missed)),
+            "drinks_to_go": wednesdays - on_time + drinks,
+        }
+    return pd.DataFrame.from_dict(scores, orient="index")
+
+
+def make_events(rows):
+    return pd.DataFrame({
+        "timestamp": pd.to_datetime([timestamp for timestamp, _ in rows]),
+        "person": [person for _, person in rows],
+    })
+
+
+def make_drinks(rows):
+    return pd.DataFrame({"name": [name for name, _ in rows],
+                         "drinks_done": [drinks for _, drinks in rows],
+                         "datum": "11-06-2025"})
+
+
+# Three weeks from Wednesday 2025-06-11 and the week around new year, which
+# spans two years: Anna is always on time and sends an extra one in week
+# two, Bob is on time once, late twice and misses week three, Carl is late
+# twice and on time in week three
+EVENTS = make_events([
+    ("2025-06-11 09:00", "Anna"), ("2025-06-11 21:00", "Bob"),
+    ("2025-06-13 10:00", "Carl"),
+    ("2025-06-18 08:00", "Anna"), ("2025-06-18 23:59", "Anna"),
+    ("2025-06-19 00:01", "Bob"), ("2025-06-16 12:00", "Carl"),
+    ("2025-06-25 12:00", "Anna"), ("2025-06-25 13:00", "Carl"),
+    ("2025-06-27 13:00", "Carl"),
+    ("2025-12-31 12:00", "Anna"), ("2026-01-02 12:00", "Bob"),
+])
+DRINKS = make_drinks([("Anna", 0), ("Bob", -2), ("Carl", -1), ("Bob", 1)])
+WEDNESDAYS = 4
+
+
+def assert_same_scores(summary, expected):
+    got = summary.loc[expected.index, expected.columns]
+    np.testing.assert_array_equal(got.to_numpy(float),
+                                  expected.to_numpy(float))
+
+
+def test_summarize_scores_matches_old_loop():
+    summary = summarize_scores(EVENTS, WEDNESDAYS, DRINKS)
+    expected = old_loop_scores(EVENTS, WEDNESDAYS, DRINKS)
+
+    assert list(summary.columns) == SUMMARY_COLUMNS
+    assert sorted(summary.index) == sorted(expected.index)
+    assert_same_scores(summary, expected)
+
+
+def test_summarize_scores_ranks_on_time_then_name():
+    summary = summarize_scores(EVENTS, WEDNESDAYS, DRINKS)
+
+    # Bob and Carl both have one on time waffle
+    assert summary.index.tolist() == ["Anna", "Bob", "Carl"]
+    assert summary.loc["Anna", "double"] == 1
+    assert summary.loc["Anna", "waffles"] == 5
+
+
+def test_summarize_weeks_matches_summarize_scores():
+    weekly = score_weeks(weekly_counts(EVENTS))
+
+    pd.testing.assert_frame_equal(summarize_weeks(weekly, WEDNESDAYS, DRINKS),
+                                  summarize_scores(EVENTS, WEDNESDAYS, DRINKS))
+
+
+def test_without_wednesday_waffles_every_week_is_late():
+    events = make_events([("2025-06-12 10:00", "Anna"),
+                          ("2025-06-14 10:00", "Anna"),
+                          ("2025-06-19 10:00", "Anna"),
+                          ("2025-06-20 10:00", "Bob")])
+    drinks = make_drinks([("Anna", -1)])
+
+    summary = summarize_scores(events, 2, drinks)
+
+    assert_same_scores(summary, old_loop_scores(events, 2, drinks))
+    assert summary["on_time"].tolist() == [0, 0]
+    assert summary.loc["Anna", "late"] == 2
+    assert summary.loc["Bob", "missed"] == 1
+
+
+@pytest.mark.parametrize("drinks", [make_drinks([]), None])
+def test_no_events_and_no_ledger_gives_no_rows(drinks):
+    events = make_events([])
+
+    summary = summarize_scores(events, 3, drinks)
+
+    assert summary.empty
+    assert list(summary.columns) == SUMMARY_COLUMNS
+    assert old_loop_scores(events, 3, make_drinks([])).empty
+
+
+def test_ledger_only_persons_get_a_row():
+    # The old loop only scored persons with waffles
+    summary = summarize_scores(make_events([]), 3, make_drinks([("Anna", -2)]))
+
+    assert summary.index.tolist() == ["Anna"]
+    assert summary.loc["Anna", "waffles"] == 0
+    assert summary.loc["Anna", "missed"] == 3
+    assert summary.loc["Anna", "drinks_to_go"] == 1
+
+
+def test_cumulative_on_time_counts_each_week_once():
+    cumulative = cumulative_on_time(EVENTS, "2025-06-11", "2025-06-25",
+                                    persons=["Anna", "Bob", "Carl"])
+
+    assert cumulative.index.tolist() == list(
+        pd.to_datetime(["2025-06-09", "2025-06-16", "2025-06-23"]))
+    assert cumulative["Anna"].tolist() == [1, 2, 3]
+    assert cumulative["Bob"].tolist() == [1, 1, 1]
+    assert cumulative["Carl"].tolist() == [0, 0, 1]
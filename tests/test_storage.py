@@ -0,0 +1,84 @@
+import pandas as pd
+import pytest
+
+from storage import (FakeSheetBackend, SheetCache, SheetWriteError, SheetWriter,
+                     _payload_bytes)
+
+
+def make_score(timestamps, person="Anna"):
+    return pd.DataFrame({"timestamp": timestamps,
+                         "person": [person] * len(timestamps)})
+
+
+OLD = make_score([f"0{day}-06-2025 09:00:00" for day in range(1, 10)])
+NEW = make_score(["11-06-2025 09:00:00", "11-06-2025 21:00:00"], "Bob")
+ADJES = pd.DataFrame({"name": ["Carl"], "drinks_done": [1],
+                      "datum": ["11-06-2025"]})
+
+
+class ShortBackend(FakeSheetBackend):
+    """Confirms one row less than it was asked to append."""
+
+    def append_rows(self, worksheet, rows):
+        return super().append_rows(worksheet, rows[:-1])
+
+
+def writes(backend):
+    return [op for op in backend.operations if op["op"] != "read"]
+
+
+@pytest.fixture
+def backend():
+    return FakeSheetBackend({"score": OLD, "adjes_gedaan": ADJES.iloc[:0]})
+
+
+def test_only_the_new_rows_are_written(backend):
+    writer = SheetWriter(backend)
+
+    writer.append("score", NEW)
+    assert writer.flush() == {"score": 2}
+
+    assert writes(backend) == [{
+        "op": "append", "worksheet": "score", "rows": 2,
+        "bytes": _payload_bytes(NEW.values.tolist())}]
+    pd.testing.assert_frame_equal(backend.sheets["score"],
+                                  pd.concat([OLD, NEW], ignore_index=True))
+
+
+def test_appends_are_batched_per_worksheet(backend):
+    writer = SheetWriter(backend)
+
+    writer.append("score", NEW.iloc[:1])
+    writer.append("adjes_gedaan", ADJES)
+    writer.append("score", NEW.iloc[1:])
+    # Nothing new, nothing to write
+    writer.append("score", NEW.iloc[:0])
+    assert writer.pending == {"score": 2, "adjes_gedaan": 1}
+    assert writer.flush() == {"score": 2, "adjes_gedaan": 1}
+
+    assert [(op["worksheet"], op["rows"]) for op in writes(backend)] == \
+        [("score", 2), ("adjes_gedaan", 1)]
+    assert writer.pending == {}
+    assert writer.flush() == {}
+
+
+def test_unconfirmed_rows_stay_pending():
+    backend = ShortBackend({"score": OLD})
+    writer = SheetWriter(backend)
+    writer.append("score", NEW)
+
+    with pytest.raises(SheetWriteError, match="1 of 2 rows"):
+        writer.flush()
+
+    assert writer.pending == {"score": 2}
+
+
+def test_passthrough_cache_reads_the_backend(tmp_path, backend):
+    cache = SheetCache(backend, cache_dir=str(tmp_path), passthrough=True)
+
+    cache.read("score")
+    cache.append_rows("score", NEW.values.tolist())
+
+    assert len(cache.read("score")) == len(OLD) + len(NEW)
+    assert [op["op"] for op in backend.operations] == ["read", "append", "read"]
+    assert list(tmp_path.iterdir()) == []
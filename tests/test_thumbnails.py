@@ -0,0 +1,101 @@
+import io
+
+import pytest
+from PIL import Image
+
+from thumbnails import ThumbnailCache, fetch_url
+
+
+class LocalFetch:
+    """Reads the pictures from disk instead of the picture host."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, path):
+        self.calls.append(path)
+        with open(path, "rb") as f:
+            return f.read()
+
+
+def make_picture(path, size=(400, 300), mode="RGB"):
+    Image.new(mode, size, "red").save(path)
+    return str(path)
+
+
+def width_of(data):
+    with Image.open(io.BytesIO(data)) as image:
+        return image.width
+
+
+@pytest.fixture
+def fetch():
+    return LocalFetch()
+
+
+@pytest.fixture
+def cache(tmp_path, fetch):
+    return ThumbnailCache(str(tmp_path / "cache"), fetch=fetch)
+
+
+def test_get_resizes_and_caches(tmp_path, cache, fetch):
+    url = make_picture(tmp_path / "anna.jpg")
+
+    assert width_of(cache.get(url, 200)) == 200
+    assert width_of(cache.get(url, 200)) == 200
+    # Smaller pictures aren't scaled up
+    assert width_of(cache.get(url, 1000)) == 400
+    assert fetch.calls == [url, url]
+
+
+def test_prefetch_fetches_each_picture_once_for_all_widths(tmp_path, cache,
+                                                           fetch):
+    urls = [make_picture(tmp_path / f"{name}.png", mode="RGBA")
+            for name in ["anna", "bob"]]
+
+    assert cache.prefetch(urls + urls, [300, 200]) == []
+    assert cache.prefetch(urls, [300, 200]) == []
+
+    assert sorted(fetch.calls) == sorted(urls)
+    assert width_of(cache.get(urls[0], 300)) == 300
+    assert len(fetch.calls) == 2
+
+
+def test_failed_fetch_is_not_retried_for_a_while(tmp_path, cache, fetch):
+    missing = str(tmp_path / "missing.jpg")
+
+    assert cache.prefetch([missing], [300, 200]) == [missing]
+    assert cache.prefetch([missing], [300, 200]) == [missing]
+    with pytest.raises(FileNotFoundError):
+        cache.get(missing, 300)
+
+    assert fetch.calls == [missing]
+
+
+def test_failed_fetch_is_retried_after_retry_after(tmp_path, fetch):
+    cache = ThumbnailCache(str(tmp_path / "cache"), fetch=fetch, retry_after=0)
+    url = str(tmp_path / "later.jpg")
+
+    assert cache.prefetch([url], [200]) == [url]
+    make_picture(url)
+
+    assert cache.prefetch([url], [200]) == []
+    assert width_of(cache.get(url, 200)) == 200
+    assert fetch.calls == [url, url]
+
+
+def test_broken_picture_counts_as_failed(tmp_path, cache, fetch):
+    url = tmp_path / "broken.jpg"
+    url.write_bytes(b"not a picture")
+
+    assert cache.prefetch([str(url)], [200]) == [str(url)]
+    with pytest.raises(OSError):
+        cache.get(str(url), 200)
+    assert len(fetch.calls) == 1
+
+
+@pytest.mark.parametrize("url", ["file:///etc/passwd", "/etc/passwd",
+                                 "beer.png", "ftp://example.com/a.png"])
+def test_fetch_url_only_allows_http(url):
+    with pytest.raises(ValueError):
+        fetch_url(url)
@@ -0,0 +1,150 @@
+import hashlib
+import io
+import os
+import threading
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+def fetch_url(url, timeout=10):
+    """Image bytes of an http(s) URL.
+
+    Other schemes and local paths raise ValueError, the picture URLs come
+    from the secrets and must not read files from the server.
+    """
+    if urllib.parse.urlsplit(url).scheme not in ("http", "https"):
+        raise ValueError(f"not an http(s) URL: {url!r}")
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return response.read()
+
+
+def resize(data, width):
+    """Scale image bytes down to width pixels.
+
+    Pictures with transparency are stored as PNG, all others as JPEG.
+    """
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as image:
+        if image.width > width:
+            height = max(1, round(image.height * width / image.width))
+            image = image.resize((width, height), Image.LANCZOS)
+        out = io.BytesIO()
+        if image.mode in ("RGBA", "LA", "P"):
+            image.convert("RGBA").save(out, format="PNG", optimize=True)
+        else:
+            image.convert("RGB").save(out, format="JPEG", quality=85)
+    return out.getvalue()
+
+
+class ThumbnailCache:
+    """Profile pictures resized to the displayed widths, cached on disk.
+
+    Each picture is fetched once for all widths. The cache directory is kept
+    under ``max_bytes`` by removing the least recently used thumbnails. A
+    picture that couldn't be fetched isn't tried again for ``retry_after``
+    seconds, until then get raises the same error and prefetch skips it.
+    """
+
+    def __init__(self, cache_dir=".thumbnail_cache", max_bytes=50 << 20,
+                 fetch=fetch_url, max_workers=8, retry_after=600):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.fetch = fetch
+        self.max_workers = max_workers
+        self.retry_after = retry_after
+        self._lock = threading.Lock()
+        self._failed = {}
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, url, width):
+        name = hashlib.sha256(url.encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.cache_dir, f"{name}_{width}.thumb")
+
+    def _read(self, path):
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        # The modified time orders the thumbnails for eviction
+        os.utime(path)
+        return data
+
+    def _recent_failure(self, url):
+        with self._lock:
+            failed_at, error = self._failed.get(url, (None, None))
+            if failed_at is None:
+                return None
+            if time.monotonic() - failed_at >= self.retry_after:
+                del self._failed[url]
+                return None
+            return error
+
+    def _store(self, url, widths):
+        try:
+            original = self.fetch(url)
+            resized = [resize(original, width) for width in widths]
+        except Exception as e:
+            with self._lock:
+                self._failed[url] = (time.monotonic(), e)
+            raise
+        thumbnails = {}
+        for width, data in zip(widths, resized):
+            path = self._path(url, width)
+            with open(path + ".tmp", "wb") as f:
+                f.write(data)
+            os.replace(path + ".tmp", path)
+            thumbnails[width] = data
+        self._evict()
+        return thumbnails
+
+    def _evict(self):
+        with self._lock:
+            entries = []
+            for entry in os.scandir(self.cache_dir):
+                if entry.name.endswith(".thumb"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                os.remove(path)
+                total -= size
+
+    def get(self, url, width):
+        """Thumbnail bytes, fetched and resized when not cached yet."""
+        data = self._read(self._path(url, width))
+        if data is None:
+            error = self._recent_failure(url)
+            if error is not None:
+                raise error.with_traceback(None)
+            data = self._store(url, [width])[width]
+        return data
+
+    def prefetch(self, urls, widths):
+        """Fetch the pictures missing any of the widths concurrently.
+
+        Returns the URLs that couldn't be fetched, now or recently.
+        """
+        missing = [url for url in dict.fromkeys(urls)
+                   if not all(os.path.exists(self._path(url, width))
+                              for width in widths)]
+        failed = [url for url in missing
+                  if self._recent_failure(url) is not None]
+        missing = [url for url in missing if url not in failed]
+        if not missing:
+            return failed
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {url: pool.submit(self._store, url, widths)
+                       for url in missing}
+            for url, future in futures.items():
+                try:
+                    future.result()
+                except Exception:
+                    failed.append(url)
+        return failed
@@ -0,0 +1,94 @@
+import datetime
+import functools
+
+import numpy as np
+import pandas as pd
+
+
+def week_key(dates):
+    """Integer ISO week key ``iso_year * 100 + iso_week`` of datetime values.
+
+    Computed on the day numbers instead of through isocalendar, missing dates
+    get key 0.
+    """
+    days = np.asarray(dates, dtype="datetime64[D]")
+    missing = np.isnat(days)
+    # 1970-01-01 was a Thursday, weekday counts from Monday
+    weekday = (days.astype("int64") + 3) % 7
+    # The ISO year of a week is the year of its Thursday
+    thursday = days + (3 - weekday).astype("timedelta64[D]")
+    year = thursday.astype("datetime64[Y]")
+    week = (thursday - year).astype("int64") // 7 + 1
+    keys = (year.astype("int64") + 1970) * 100 + week
+    return np.where(missing, 0, keys)
+
+
+class WeekCalendar:
+    """One row per ISO week from start_date up to end_date.
+
+    ``table`` holds the integer ``week`` key, the Monday in ``week_start``
+    and the ``wednesday`` of the week.
+    """
+
+    def __init__(self, start_date, end_date):
+        start = pd.Timestamp(start_date)
+        week_start = pd.date_range(start - pd.Timedelta(days=start.dayofweek),
+                                   pd.Timestamp(end_date), freq="W-MON")
+        self.table = pd.DataFrame({
+            "week": week_key(week_start),
+            "week_start": week_start,
+            "wednesday": week_start + pd.Timedelta(days=2),
+        })
+        self._wednesdays = self.table["wednesday"].to_numpy()
+
+    def _span(self, start_date, end_date):
+        # Positions of the first and past the last Wednesday in the range
+        first = np.searchsorted(self._wednesdays,
+                                np.datetime64(pd.Timestamp(start_date)), "left")
+        last = np.searchsorted(self._wednesdays,
+                               np.datetime64(pd.Timestamp(end_date)), "right")
+        return first, max(first, last)
+
+    def weeks(self, start_date, end_date):
+        """The rows whose Wednesday lies between the two dates, inclusive."""
+        first, last = self._span(start_date, end_date)
+        return self.table.iloc[first:last]
+
+    def count_wednesdays(self, start_date, end_date):
+        first, last = self._span(start_date, end_date)
+        return int(last - first)
+
+
+@functools.lru_cache(maxsize=16)
+def _season_calendar(start_date, end_year):
+    return WeekCalendar(start_date, datetime.date(end_year, 12, 31))
+
+
+def week_calendar(start_date, end_date=None):
+    """WeekCalendar covering start_date up to at least end_date.
+
+    Calendars run to the end of a year and are kept, so all calls within
+    a season share one table.
+    """
+    if end_date is None:
+        end_date = datetime.date.today()
+    start_date = pd.Timestamp(start_date).date()
+    end_date = pd.Timestamp(end_date).date()
+    return _season_calendar(start_date, max(end_date, start_date).year)
+
+
+def count_wednesdays(start_date, end_date=None):
+    """Number of Wednesdays from start_date up to and including end_date.
+
+    Answered from the precomputed week calendar of the season.
+    """
+    if end_date is None:
+        end_date = datetime.date.today()
+    start_date = pd.Timestamp(start_date).date()
+    end_date = pd.Timestamp(end_date).date()
+
+    # Ensure start_date <= end_date
+    if start_date > end_date:
+        return 0
+    return week_calendar(start_date, end_date).count_wednesdays(start_date,
+                                                                end_date)